@@ -22,15 +22,26 @@ then
     if python structure_test.py
     then
         cd ya_news
-        export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
+        export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.test_settings"}"
         if pytest --tb=line 1>&2;
         then
             cd ../ya_note
             unset DJANGO_SETTINGS_MODULE
-            export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanote.settings"}"
+            export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanote.test_settings"}"
             if pytest --tb=line 1>&2;
             then
-                exit 0
+                cd ../ya_host
+                unset DJANGO_SETTINGS_MODULE
+                export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yahost.test_settings"}"
+                if pytest --tb=line 1>&2;
+                then
+                    exit 0
+                else
+                    status=$?
+                    print_message " При запуске упали тесты общего хоста. Проверьте тесты ya_host " "=" 1
+                    echo \`\`\` 1>&2
+                    exit $status
+                fi
             else
                 status=$?
                 print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
@@ -0,0 +1,8 @@
+"""
+Общий код YaNews и YaNote: журнал, сжатие и раздача статики,
+middleware, ограничение частоты, чтение с реплик, основа JSON API
+и сервер с fork рабочих процессов.
+
+Проекты подключают каталог ya_common в sys.path из своих пакетов
+настроек; поведение настраивается их settings.
+"""
@@ -0,0 +1,184 @@
+"""
+Основа JSON API проектов.
+
+Данные выбираются через ``values()``, без создания экземпляров моделей.
+Клиент выбирает поля параметром ``fields``, а страницы листает по
+непрозрачному курсору ``cursor`` из поля ``next`` предыдущего ответа.
+
+Вход — по сессии, поэтому запись требует заголовка ``X-CSRFToken`` со
+значением куки ``csrftoken``: её ставит любой ответ API. Без него
+клиент получает 403 в JSON от ``csrf_failure``, а не HTML-страницу.
+"""
+import base64
+import json
+from http import HTTPStatus
+
+from django.db.models import F
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.utils.functional import cached_property
+from django.views.csrf import csrf_failure as html_csrf_failure
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, types):
+    """
+    Ключ из курсора: список строк, по одной на поле ключа, каждая
+    приводится своим типом из types.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if (
+            not isinstance(values, list) or len(values) != len(types)
+            or not all(isinstance(value, str) for value in values)
+        ):
+            raise ValueError(cursor)
+        return [parse(value) for parse, value in zip(types, values)]
+    except (ValueError, OverflowError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'Некорректный курсор.')
+
+
+def cursor_id(value):
+    """Значение id из курсора: больше 2**63 - 1 база не примет."""
+    pk = int(value)
+    if not 0 <= pk < 2 ** 63:
+        raise ValueError(value)
+    return pk
+
+
+def csrf_failure(request, reason=''):
+    """CSRF_FAILURE_VIEW: представлениям API — JSON, остальным — HTML."""
+    view_class = getattr(
+        getattr(request.resolver_match, 'func', None), 'view_class', None
+    )
+    if getattr(view_class, 'json_errors', False):
+        return JsonResponse(
+            {'detail': f'Ошибка CSRF: {reason}'},
+            status=HTTPStatus.FORBIDDEN,
+        )
+    return html_csrf_failure(request, reason)
+
+
+class ApiMixin:
+    """
+    Общее поведение представлений API.
+
+    ``fields`` сопоставляет имя поля в ответе с выражением для
+    ``values()``; ``key_fields`` — поля сортировки для курсора,
+    ``key_types`` — их типы.
+    """
+    fields = {}
+    key_fields = ('id',)
+    key_types = (cursor_id,)
+    page_size = 20
+    max_page_size = 100
+    # Ошибки, в том числе CSRF, отдаются в JSON.
+    json_errors = True
+
+    def dispatch(self, request, *args, **kwargs):
+        get_token(request)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse(
+                {'detail': error.detail}, status=error.status
+            )
+
+    def handle_no_permission(self):
+        return JsonResponse(
+            {'detail': 'Требуется авторизация.'},
+            status=HTTPStatus.UNAUTHORIZED,
+        )
+
+    def require_login(self):
+        if not self.request.user.is_authenticated:
+            raise ApiError(HTTPStatus.UNAUTHORIZED, 'Требуется авторизация.')
+
+    @cached_property
+    def selected_fields(self):
+        requested = self.request.GET.get('fields')
+        if not requested:
+            return list(self.fields)
+        names = requested.split(',')
+        unknown = set(names) - set(self.fields)
+        if unknown:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST,
+                'Неизвестные поля: ' + ', '.join(sorted(unknown)),
+            )
+        return names
+
+    def values(self, queryset):
+        """Запрос, возвращающий словари с выбранными и ключевыми полями."""
+        names = set(self.selected_fields) | set(self.key_fields)
+        plain = [name for name in names if self.fields[name] == name]
+        renamed = {
+            name: F(self.fields[name])
+            for name in names if self.fields[name] != name
+        }
+        return queryset.values(*plain, **renamed)
+
+    def serialize(self, row):
+        return {name: row[name] for name in self.selected_fields}
+
+    def seek(self, queryset, key):
+        """Строки после ключа курсора; по умолчанию по возрастанию id."""
+        return queryset.filter(id__gt=key[0])
+
+    def page(self, queryset):
+        """Страница результатов и курсор следующей страницы."""
+        try:
+            limit = min(
+                int(self.request.GET.get('limit', self.page_size)),
+                self.max_page_size,
+            )
+            if limit < 1:
+                raise ValueError(limit)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Некорректный limit.')
+        cursor = self.request.GET.get('cursor')
+        if cursor:
+            queryset = self.seek(
+                queryset, decode_cursor(cursor, self.key_types)
+            )
+        rows = list(self.values(queryset)[:limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(
+                [str(rows[-1][name]) for name in self.key_fields]
+            )
+        return JsonResponse({
+            'results': [self.serialize(row) for row in rows],
+            'next': next_cursor,
+        })
+
+    def detail(self, queryset, status=HTTPStatus.OK):
+        row = self.values(queryset).first()
+        if row is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        return JsonResponse(self.serialize(row), status=status)
+
+    def json_body(self):
+        try:
+            data = json.loads(self.request.body or b'{}')
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Некорректный JSON.')
+        if not isinstance(data, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Ожидается объект JSON.')
+        return data
+
+    def validate(self, form):
+        if not form.is_valid():
+            raise ApiError(HTTPStatus.BAD_REQUEST, form.errors)
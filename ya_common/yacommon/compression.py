@@ -0,0 +1,68 @@
+"""
+Сжатие ответов: выбор кодировки по Accept-Encoding и сами кодеки.
+
+Brotli используется, только если установлен пакет ``brotli``;
+без него остаётся gzip.
+"""
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Кодировки в порядке предпочтения сервера.
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+# Расширения файлов, которые имеет смысл сжимать заранее.
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.map',
+)
+
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def compress(data, encoding):
+    """Сжимает байты выбранной кодировкой."""
+    if encoding == 'br':
+        return brotli.compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """
+    Сжимает поток по частям.
+
+    Каждая часть сбрасывается сразу, чтобы клиент не ждал конца потока.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor()
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def accepted_encodings(header):
+    """Кодировки из заголовка Accept-Encoding, кроме явно запрещённых."""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(header, available=ENCODINGS):
+    """Лучшая из доступных кодировок, которую принимает клиент."""
+    accepted = accepted_encodings(header or '')
+    for encoding in available:
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return None
@@ -0,0 +1,166 @@
+"""
+Журнал проекта: JSON-строки, которые пишет отдельный поток.
+
+``JsonQueueHandler`` только кладёт запись в очередь, а форматирует и
+пишет её ``QueueListener`` в своём потоке, поэтому медленный диск не
+задерживает запрос. Если очередь переполнена, запись отбрасывается и
+учитывается в ``dropped``: журнал не должен останавливать сайт.
+
+Записи внутри запроса получают поля контекста ``request_id`` и
+``url_name`` из ``RequestLogMiddleware``. ``SampleFilter`` пропускает
+только долю записей частых логгеров: решение принимается один раз на
+запрос, поэтому попавший в выборку запрос виден в журнале целиком.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord('', 0, '', 0, '', (), None))
+) | {'message', 'asctime'}
+
+_context = ContextVar('log_context', default=None)
+
+
+def bind_context(**fields):
+    """Поля контекста для записей до reset_context(token)."""
+    return _context.set(fields)
+
+
+def reset_context(token):
+    _context.reset(token)
+
+
+def get_context():
+    return _context.get() or {}
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись одной строкой JSON: стандартные поля, контекст и extra."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(
+            (key, value) for key, value in vars(record).items()
+            if key not in RECORD_ATTRIBUTES
+        )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """
+    Пропускает долю записей логгеров из rates: {'имя логгера': доля}.
+
+    Доля логгера наследуется потомками, как и уровень.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1
+
+    def filter(self, record):
+        rate = self.rate(record.name)
+        if rate >= 1:
+            return True
+        sample = get_context().get('sample')
+        return (random.random() if sample is None else sample) < rate
+
+
+class JsonQueueHandler(QueueHandler):
+    """
+    Очередь перед записью JSON в файл filename или в поток stream,
+    по умолчанию в stderr.
+
+    Поток записи запускается сразу и перезапускается в дочернем
+    процессе после fork: поток родителя в него не переходит.
+    """
+
+    def __init__(self, filename=None, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.dropped = 0
+        if filename:
+            self.target = WatchedFileHandler(filename, encoding='utf-8')
+        else:
+            self.target = logging.StreamHandler(stream or sys.stderr)
+        self.target.setFormatter(JsonFormatter())
+        self.listener = None
+        self.start()
+        atexit.register(self.stop)
+        os.register_at_fork(after_in_child=self.restart)
+
+    def start(self):
+        self.listener = QueueListener(
+            self.queue, self.target, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def stop(self):
+        """Дописывает очередь и останавливает поток записи."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def close(self):
+        """logging.shutdown() тоже дописывает очередь."""
+        self.stop()
+        super().close()
+
+    def restart(self):
+        self.queue = queue.Queue(self.queue_size)
+        self.start()
+
+    def prepare(self, record):
+        """
+        Готовит запись к передаче в поток записи: подставляет аргументы
+        сообщения и добавляет контекст — в другом потоке его не видно.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.target.formatter.formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        for key, value in get_context().items():
+            if key != 'sample':
+                record.__dict__.setdefault(key, value)
+        # django.request пишет ответы 4xx и 5xx уже после middleware,
+        # без контекста, но с самим запросом.
+        request = record.__dict__.pop('request', None)
+        if hasattr(request, 'request_id'):
+            record.__dict__.setdefault('request_id', request.request_id)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
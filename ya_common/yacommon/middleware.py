@@ -0,0 +1,245 @@
+"""Middleware проектов: сжатие ответов и журнал запросов."""
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import empty
+
+from .compression import choose_encoding, compress, compress_stream
+from .logs import bind_context, get_context, reset_context
+
+request_logger = logging.getLogger('yacommon.requests')
+sql_logger = logging.getLogger('yacommon.sql')
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml',
+    'image/svg+xml',
+)
+
+# Содержимое этих тегов чувствительно к пробелам и не минифицируется.
+PRESERVED_TAGS = re.compile(
+    r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.S | re.I
+)
+INDENTATION = re.compile(r'\n\s+')
+
+UNRESOLVED = '<unresolved>'
+
+_stats = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+
+def minify_html(html):
+    """Убирает отступы и пустые строки вне тегов с предформатированием."""
+    parts = []
+    position = 0
+    for match in PRESERVED_TAGS.finditer(html):
+        parts.append(INDENTATION.sub('\n', html[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(INDENTATION.sub('\n', html[position:]))
+    return ''.join(parts)
+
+
+def record_compression(url_name, original, compressed, cpu):
+    """Учитывает один сжатый ответ в статистике по имени URL."""
+    with _stats_lock:
+        _stats[url_name].update(
+            responses=1, original=original, compressed=compressed, cpu=cpu
+        )
+
+
+def compression_stats():
+    """
+    Статистика сжатия по именам URL.
+
+    Для каждого URL — число ответов, средняя степень сжатия
+    и среднее процессорное время на ответ в микросекундах.
+    """
+    with _stats_lock:
+        return {
+            url_name: {
+                'responses': stat['responses'],
+                'ratio': stat['original'] / max(stat['compressed'], 1),
+                'cpu_us': stat['cpu'] / stat['responses'] * 1e6,
+            }
+            for url_name, stat in _stats.items()
+        }
+
+
+def reset_compression_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _counted_stream(chunks, url_name, encoding):
+    """Сжимает поток и по его окончании записывает статистику."""
+    original = compressed = 0
+    cpu = 0.0
+
+    def source():
+        nonlocal original
+        for chunk in chunks:
+            original += len(chunk)
+            yield chunk
+
+    stream = compress_stream(source(), encoding)
+    while True:
+        started = time.process_time()
+        chunk = next(stream, None)
+        cpu += time.process_time() - started
+        if chunk is None:
+            break
+        compressed += len(chunk)
+        yield chunk
+    record_compression(url_name, original, compressed, cpu)
+
+
+class CompressionMiddleware:
+    """
+    Минифицирует HTML и сжимает ответы gzip или brotli.
+
+    Ответы короче COMPRESSION_MIN_SIZE байт отдаются несжатыми:
+    на них сжатие тратит больше времени, чем экономит трафика.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get('Content-Type', '')
+        if (
+            response.has_header('Content-Encoding')
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+        if (
+            settings.HTML_MINIFY
+            and not response.streaming
+            and content_type.startswith('text/html')
+        ):
+            response.content = minify_html(
+                response.content.decode(response.charset)
+            ).encode(response.charset)
+            response['Content-Length'] = str(len(response.content))
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+        # Без маршрута — одна запись на всех: адреса сканеров и ошибок
+        # 404 иначе копились бы в статистике без конца.
+        url_name = (
+            request.resolver_match.view_name
+            if request.resolver_match else UNRESOLVED
+        )
+        if response.streaming:
+            response.streaming_content = _counted_stream(
+                response.streaming_content, url_name, encoding
+            )
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            started = time.process_time()
+            compressed = compress(response.content, encoding)
+            cpu = time.process_time() - started
+            if len(compressed) >= len(response.content):
+                return response
+            record_compression(
+                url_name, len(response.content), len(compressed), cpu
+            )
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^(W/)?', 'W/', response['ETag'])
+        response['Content-Encoding'] = encoding
+        return response
+
+
+def loaded_user_id(request):
+    """
+    Id пользователя, если его уже загрузили для ответа: ради журнала
+    сессию и пользователя из базы не читаем.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or getattr(user, '_wrapped', None) is empty:
+        return None
+    return user.pk if user.is_authenticated else None
+
+
+class RequestLogMiddleware:
+    """
+    Строка журнала ``yacommon.requests`` на каждый запрос: id запроса,
+    имя URL, id пользователя, статус, число и время запросов к базе,
+    длительность.
+
+    Id запроса приходит от прокси в X-Request-ID или создаётся здесь.
+    Если включён DEBUG у логгера ``yacommon.sql``, в него пишется и каждый
+    запрос к базе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # uuid4() читает os.urandom, а id запроса не секрет.
+        request.request_id = (
+            request.META.get('HTTP_X_REQUEST_ID')
+            or f'{random.getrandbits(128):032x}'
+        )
+        token = bind_context(
+            request_id=request.request_id, sample=random.random()
+        )
+        log_sql = sql_logger.isEnabledFor(logging.DEBUG)
+        queries = 0
+        db_time = 0.0
+
+        def observe(execute, sql, params, many, context):
+            nonlocal queries, db_time
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - started
+                queries += 1
+                db_time += duration
+                if log_sql:
+                    sql_logger.debug('%s', sql, extra={
+                        'alias': context['connection'].alias,
+                        'duration_ms': round(duration * 1000, 3),
+                    })
+
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(observe)
+                    )
+                response = self.get_response(request)
+            request_logger.info(
+                '%s %s %s',
+                request.method, request.path, response.status_code,
+                extra={
+                    'user_id': loaded_user_id(request),
+                    'status': response.status_code,
+                    'queries': queries,
+                    'db_ms': round(db_time * 1000, 3),
+                    'duration_ms': round(
+                        (time.perf_counter() - started) * 1000, 3
+                    ),
+                },
+            )
+        finally:
+            reset_context(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        get_context()['url_name'] = request.resolver_match.view_name
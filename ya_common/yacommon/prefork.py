@@ -0,0 +1,100 @@
+"""
+Сервер с предварительной загрузкой и fork рабочих процессов.
+
+Родитель один раз импортирует проект и выполняет ``preload``, затем
+открывает сокет и порождает рабочие процессы через fork: они получают
+уже загруженные модули и шаблоны и сразу принимают соединения.
+Только для систем с ``os.fork``. Запускается модулем prefork проекта:
+``python -m yanews.prefork --workers 4 --bind 127.0.0.1:8000``.
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.db import connections
+
+
+class QuietHandler(WSGIRequestHandler):
+    """Обработчик без записи каждого запроса в stderr."""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def spawn(server, on_exit=None):
+    """Порождает рабочий процесс, обслуживающий общий сокет."""
+    pid = os.fork()
+    if pid:
+        return pid
+
+    def stop(signum, frame):
+        # Текущий запрос дообслуживается: shutdown() только просит
+        # serve_forever выйти из цикла и ждёт этого, поэтому вызывается
+        # не из обработчика, а из отдельного потока.
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    finally:
+        # os._exit не вызывает atexit: то, что проект дописывает при
+        # выходе, и очередь журнала дописываются явно.
+        if on_exit is not None:
+            on_exit()
+        logging.shutdown()
+        os._exit(0)
+
+
+def serve(application, bind, workers, on_exit=None):
+    """
+    Обслуживает application на адресе bind (``хост:порт``), перезапуская
+    упавшие рабочие процессы; on_exit вызывается в каждом при выходе.
+    """
+    host, _, port = bind.rpartition(':')
+    server = make_server(
+        host, int(port), application, handler_class=QuietHandler
+    )
+    # Соединения с базой не должны достаться рабочим процессам по наследству.
+    connections.close_all()
+    children = {spawn(server, on_exit) for _ in range(workers)}
+
+    def stop(signum, frame):
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while True:
+        pid, _ = os.wait()
+        children.discard(pid)
+        children.add(spawn(server, on_exit))
+
+
+def argument_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--bind', default='127.0.0.1:8000')
+    return parser
+
+
+def set_workers(workers):
+    """
+    Сообщает настройкам число рабочих процессов; вызывается до загрузки
+    проекта: проверки кешей сверяют их с WEB_CONCURRENCY.
+    """
+    os.environ['WEB_CONCURRENCY'] = str(workers)
+
+
+def prepare():
+    """Проверяет настройки и загружает проект до fork."""
+    from django.core.management import call_command
+
+    from .startup import preload
+
+    call_command('check')
+    preload()
@@ -0,0 +1,103 @@
+"""
+Чтение с реплик базы данных.
+
+Запись всегда идёт в основную базу ``default``. Представления с
+``ReplicaReadMixin`` читают со случайной реплики из
+``REPLICA_DATABASES``. После любого изменяющего запроса
+пользователь на ``REPLICA_PIN_SECONDS`` секунд «прилипает» к основной
+базе, чтобы сразу увидеть свои изменения, даже если реплика отстаёт.
+"""
+import random
+import sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_database = ContextVar('read_database', default=None)
+
+
+@contextmanager
+def read_from_replica():
+    """Внутри блока чтения уходят на одну из реплик."""
+    replicas = settings.REPLICA_DATABASES
+    token = _read_database.set(random.choice(replicas) if replicas else None)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Чтения — на реплику, если она выбрана, запись — в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Схема реплик копируется вместе с данными основной базы."""
+        return db not in settings.REPLICA_DATABASES
+
+
+class ReplicaReadMixin:
+    """Читает данные представления с реплики."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+            return super().dispatch(request, *args, **kwargs)
+        # Сессия и пользователь загружаются лениво, и внутри блока их
+        # прочитали бы с отстающей реплики. В режиме ESI странице
+        # пользователь не нужен, а чтение сессии добавило бы Vary: Cookie.
+        if not getattr(request, 'esi', False):
+            request.user.is_authenticated
+        with read_from_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            # Шаблон выполняет ленивые запросы, поэтому рендерим здесь.
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+class ReplicaPinMiddleware:
+    """После успешной записи закрепляет пользователя за основной базой."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+def copy_database(source, target):
+    """Копирует файл SQLite целиком через backup API."""
+    source_db = sqlite3.connect(source)
+    target_db = sqlite3.connect(target)
+    try:
+        source_db.backup(target_db)
+    finally:
+        source_db.close()
+        target_db.close()
+
+
+def replicate():
+    """Заменяет реплики копией основной базы: имитация репликации."""
+    primary = settings.DATABASES['default']['NAME']
+    for alias in settings.REPLICA_DATABASES:
+        copy_database(primary, settings.DATABASES[alias]['NAME'])
@@ -0,0 +1,146 @@
+"""
+Время запуска проекта.
+
+Профиль импорта снимается в отдельном процессе с ``python -X importtime``
+и группируется по приложениям из INSTALLED_APPS. ``preload`` заранее
+выполняет ленивую работу Django: в режиме prefork её делает один
+родительский процесс, а рабочие получают результат готовым при fork.
+"""
+import io
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.template import engines
+from django.urls import get_resolver
+
+IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def run_python(code, *options):
+    """Запускает код в новом интерпретаторе; возвращает stderr и время."""
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': os.environ.get(
+            'DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE
+        ),
+    }
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *options, '-c', code],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        check=True,
+    )
+    return result.stderr, time.perf_counter() - started
+
+
+def parse_importtime(output):
+    """Пары (модуль, собственное время в мкс) из вывода -X importtime."""
+    entries = []
+    for line in output.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            entries.append((match.group(4), int(match.group(1))))
+    return entries
+
+
+def group_by_app(entries):
+    """
+    Собственное время импорта, сложенное по приложениям.
+
+    Модуль относится к приложению с самым длинным подходящим
+    именем пакета; остальные — к своему пакету верхнего уровня.
+    """
+    names = sorted(
+        (config.name for config in apps.get_app_configs()),
+        key=len, reverse=True,
+    )
+    groups = Counter()
+    for module, self_time in entries:
+        group = next(
+            (
+                name for name in names
+                if module == name or module.startswith(name + '.')
+            ),
+            module.split('.')[0],
+        )
+        groups[group] += self_time
+    return groups
+
+
+def import_profile(module):
+    """Время импорта module по приложениям и пакетам, в мкс."""
+    output, _ = run_python(f'import {module}', '-X', 'importtime')
+    return group_by_app(parse_importtime(output))
+
+
+def first_request(application, path):
+    """Выполняет GET-запрос к WSGI-приложению и возвращает тело ответа."""
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    return b''.join(application(environ, lambda status, headers: None))
+
+
+def cold_start(path, runs=3):
+    """
+    Медианное время от запуска интерпретатора до первого ответа.
+
+    Так стартует рабочий процесс без предварительной загрузки.
+    """
+    module = settings.SETTINGS_MODULE.rpartition('.')[0] + '.wsgi'
+    code = (
+        f'from {module} import application\n'
+        f'from {__name__} import first_request\n'
+        f'first_request(application, {path!r})'
+    )
+    return statistics.median(run_python(code)[1] for _ in range(runs))
+
+
+def fork_start(application, path, runs=3):
+    """
+    Медианное время от fork до первого ответа рабочего процесса.
+
+    Так стартует рабочий процесс в режиме prefork после ``preload``.
+    """
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        pid = os.fork()
+        if not pid:
+            try:
+                first_request(application, path)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def template_names():
+    """Имена всех шаблонов из каталогов шаблонов проекта."""
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for path in Path(directory).rglob('*.html'):
+            yield path.relative_to(directory).as_posix()
+
+
+def preload():
+    """Импортирует все представления и компилирует все шаблоны."""
+    get_resolver().url_patterns
+    for engine in engines.all():
+        for name in template_names():
+            engine.get_template(name)
@@ -0,0 +1,157 @@
+"""
+Статические файлы в боевом режиме.
+
+``collectstatic`` сохраняет файлы под именами с хешем содержимого и кладёт
+рядом сжатые копии, а ``StaticFilesApplication`` раздаёт их прямо из
+процесса WSGI: файлы с хешем в имени браузер может кешировать навсегда.
+"""
+import json
+import mimetypes
+import os
+from collections import namedtuple
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .compression import (
+    COMPRESSIBLE_EXTENSIONS, ENCODINGS, SUFFIXES, choose_encoding, compress
+)
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60'
+
+StaticFile = namedtuple('StaticFile', (
+    'path', 'size', 'content_type', 'etag', 'last_modified', 'immutable',
+    'variants',
+))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хешированные имена файлов и сжатые копии, созданные при сборке."""
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if not kwargs.get('dry_run'):
+            for hashed_name in sorted(set(self.hashed_files.values())):
+                self.compress_file(hashed_name)
+
+    def compress_file(self, name):
+        """Сохраняет сжатые копии файла, если они заметно меньше."""
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        for encoding in ENCODINGS:
+            compressed = compress(data, encoding)
+            if len(compressed) < len(data) * 0.95:
+                with open(path + SUFFIXES[encoding], 'wb') as target:
+                    target.write(compressed)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # collectstatic ещё не запускался: разработка или тесты.
+            return name
+
+
+class StaticFilesApplication:
+    """
+    WSGI-обёртка, раздающая собранную статику из STATIC_ROOT.
+
+    Список файлов читается один раз при старте. Остальные
+    запросы передаются в обёрнутое приложение.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = os.fspath(root or settings.STATIC_ROOT)
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = self.scan()
+
+    def __call__(self, environ, start_response):
+        static = self.files.get(environ.get('PATH_INFO', ''))
+        if static is None or environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+        return self.serve(static, environ, start_response)
+
+    def hashed_names(self):
+        """Имена файлов с хешем из манифеста collectstatic."""
+        manifest = os.path.join(
+            self.root, CompressedManifestStaticFilesStorage.manifest_name
+        )
+        try:
+            with open(manifest) as source:
+                return set(json.load(source)['paths'].values())
+        except (OSError, ValueError, KeyError):
+            return set()
+
+    def scan(self):
+        """Описания всех файлов, доступных по URL."""
+        files = {}
+        hashed_names = self.hashed_names()
+        suffixes = tuple(SUFFIXES.values())
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(suffixes):
+                    continue
+                path = os.path.join(directory, name)
+                url = os.path.relpath(path, self.root).replace(os.sep, '/')
+                files[self.prefix + url] = self.describe(
+                    path, url in hashed_names
+                )
+        return files
+
+    @staticmethod
+    def describe(path, immutable):
+        stat = os.stat(path)
+        variants = {}
+        for encoding in ENCODINGS:
+            variant = path + SUFFIXES[encoding]
+            if os.path.exists(variant):
+                variants[encoding] = (variant, os.path.getsize(variant))
+        return StaticFile(
+            path=path,
+            size=stat.st_size,
+            content_type=(
+                mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            ),
+            etag=f'"{stat.st_size:x}-{int(stat.st_mtime):x}"',
+            last_modified=formatdate(stat.st_mtime, usegmt=True),
+            immutable=immutable,
+            variants=variants,
+        )
+
+    def serve(self, static, environ, start_response):
+        encoding = choose_encoding(
+            environ.get('HTTP_ACCEPT_ENCODING'), tuple(static.variants)
+        )
+        # У сжатой копии другие байты, значит, и ETag свой: иначе кеш
+        # отдал бы по If-None-Match сжатое тело клиенту без сжатия.
+        etag = f'{static.etag[:-1]}-{encoding}"' if encoding else static.etag
+        headers = [
+            ('Cache-Control', IMMUTABLE if static.immutable else REVALIDATE),
+            ('ETag', etag),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if environ.get('HTTP_IF_NONE_MATCH') == etag:
+            start_response('304 Not Modified', headers)
+            return []
+        path, size = static.variants.get(
+            encoding, (static.path, static.size)
+        )
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        headers += [
+            ('Content-Type', static.content_type),
+            ('Content-Length', str(size)),
+            ('Last-Modified', static.last_modified),
+        ]
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'))
@@ -0,0 +1,123 @@
+"""
+Ограничение частоты запросов на запись.
+
+Для каждого пользователя и каждого IP-адреса заводится «корзина токенов»:
+запрос забирает один токен, а корзина равномерно пополняется до своей
+ёмкости за период, указанный в настройке ``THROTTLE_RATES``. Состояние
+корзин хранится в кеше ``THROTTLE_CACHE``, общем для рабочих процессов:
+по умолчанию это таблица в БД, её можно заменить на memcached или redis.
+
+Корзину читают и записывают под блокировкой: её ставит ``cache.add``,
+который в этих кешах добавляет ключ только одному из одновременных
+запросов. Иначе два процесса прочли бы одно состояние, и каждый забрал
+бы «последний» токен.
+"""
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from http import HTTPStatus
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+# Блокировка корзины: сколько раз и с какой паузой её ждать и через
+# сколько секунд кеш снимет её за упавшим процессом.
+LOCK_ATTEMPTS = 10
+LOCK_DELAY = 0.005
+LOCK_TIMEOUT = 1
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Разбирает строку вида '10/m' в пару (ёмкость, период в секундах)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+@contextmanager
+def bucket_lock(cache, key):
+    """Блокирует корзину key; отдаёт False, если дождаться не удалось."""
+    lock = f'{key}:lock'
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock, 1, LOCK_TIMEOUT):
+            break
+        time.sleep(LOCK_DELAY)
+    else:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        cache.delete(lock)
+
+
+def take_token(key, rate, now=None):
+    """
+    Забирает токен из корзины key.
+
+    Возвращает 0, если токен есть, иначе — сколько секунд
+    осталось ждать до появления следующего токена.
+    """
+    capacity, period = parse_rate(rate)
+    cache = caches[settings.THROTTLE_CACHE]
+    with bucket_lock(cache, key) as locked:
+        if not locked:
+            # Корзину всё это время меняли другие запросы: их и так много.
+            return LOCK_TIMEOUT
+        # Кеш общий для процессов: нужны часы, общие для них.
+        now = time.time() if now is None else now
+        state = cache.get(key)
+        if state is None:
+            tokens = capacity
+        else:
+            tokens, stamp = state
+            tokens = min(capacity, tokens + (now - stamp) * capacity / period)
+        if tokens < 1:
+            return (1 - tokens) * period / capacity
+        cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def get_throttle_wait(request, scope):
+    """Проверяет корзины пользователя и IP-адреса для области scope."""
+    if not settings.THROTTLE_ENABLED:
+        return 0
+    rates = settings.THROTTLE_RATES[scope]
+    idents = {}
+    if request.user.is_authenticated:
+        idents['user'] = request.user.pk
+    idents['ip'] = request.META.get('REMOTE_ADDR')
+    # Отказ корзины пользователя не расходует токен общей корзины IP.
+    for kind, ident in idents.items():
+        if kind in rates:
+            wait = take_token(f'throttle:{scope}:{kind}:{ident}', rates[kind])
+            if wait:
+                return wait
+    return 0
+
+
+def too_many_requests(wait):
+    """Ответ 429 с заголовком Retry-After."""
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.',
+        status=HTTPStatus.TOO_MANY_REQUESTS,
+    )
+    response['Retry-After'] = str(ceil(wait))
+    return response
+
+
+class ThrottleMixin:
+    """Ограничивает частоту запросов на запись к представлению."""
+    throttle_scope = None
+    throttle_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.throttle_scope and request.method in self.throttle_methods:
+            wait = get_throttle_wait(request, self.throttle_scope)
+            if wait:
+                return too_many_requests(wait)
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from yahost import PROJECT_DIRS
+
+pytestmark = pytest.mark.django_db
+
+PASSWORD = 'password'
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='user', password=PASSWORD
+    )
+
+
+def template_dir(response):
+    """Каталог проекта, из которого взят базовый шаблон страницы."""
+    [base] = [
+        template for template in response.templates
+        if template.name == 'base.html'
+    ]
+    return base.origin.name.rsplit('/templates/', 1)[0]
+
+
+@pytest.mark.parametrize('site', ('news', 'notes'))
+def test_same_template_name_per_site(client, site):
+    """Проверяет, что одноимённые шаблоны берутся из проекта сайта."""
+    for login_url in ('/news/auth/login/', '/notes/auth/login/'):
+        client.get(login_url)
+
+    response = client.get(f'/{site}/auth/login/')
+
+    assert response.status_code == HTTPStatus.OK
+    assert template_dir(response) == str(PROJECT_DIRS[site])
+
+
+@pytest.mark.parametrize('url, login_url', (
+    ('/notes/notes/', '/notes/auth/login/'),
+    ('/news/edit_comment/1/', '/news/auth/login/'),
+))
+def test_login_url_per_site(client, url, login_url):
+    """Проверяет, что аноним идёт на вход своего сайта."""
+    response = client.get(url)
+
+    assert response.url == f'{login_url}?next={url}'
+
+
+@pytest.mark.parametrize('site', ('news', 'notes'))
+def test_login_redirect_per_site(client, user, site):
+    """Проверяет переход после входа на главную своего сайта."""
+    response = client.post(
+        f'/{site}/auth/login/',
+        {'username': user.username, 'password': PASSWORD},
+    )
+
+    assert response.url == reverse(f'{site}:home')
+
+
+def test_session_is_shared(client, user):
+    """Проверяет, что вход на одном сайте действует на другом."""
+    client.post(
+        '/notes/auth/login/',
+        {'username': user.username, 'password': PASSWORD},
+    )
+
+    response = client.get(reverse('news:user_nav'))
+
+    assert user.username in response.content.decode()
+    assert reverse('users:logout', current_app='news-users') in (
+        response.content.decode()
+    )
@@ -0,0 +1,17 @@
+"""
+Общий хост YaNews и YaNote: оба приложения в одном процессе.
+
+Пакеты проектов ya_news и ya_note и их общий код из ya_common
+импортируются отсюда как есть, поэтому их каталоги добавляются
+в sys.path.
+"""
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+PROJECT_DIRS = {'news': ROOT_DIR / 'ya_news', 'notes': ROOT_DIR / 'ya_note'}
+COMMON_DIR = ROOT_DIR / 'ya_common'
+
+for project_dir in (*PROJECT_DIRS.values(), COMMON_DIR):
+    if str(project_dir) not in sys.path:
+        sys.path.append(str(project_dir))
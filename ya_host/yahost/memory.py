@@ -0,0 +1,108 @@
+"""
+Сравнение резидентной памяти: два проекта против общего хоста.
+
+Для каждого проекта запускается отдельный интерпретатор, который
+поднимает Django с базой в памяти, прогревает страницы обоих сайтов,
+какие у него есть, и сообщает свой RSS — столько занимает один
+рабочий процесс после прогрева.
+
+Запуск из каталога ya_host: ``python -m yahost.memory --workers 4``.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from yahost import PROJECT_DIRS, ROOT_DIR
+
+PROJECTS = (
+    ('yanews', PROJECT_DIRS['news']),
+    ('yanote', PROJECT_DIRS['notes']),
+    ('yahost', ROOT_DIR / 'ya_host'),
+)
+
+WARM_UP = '''
+import gc
+import resource
+
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+django.setup()
+call_command('migrate', run_syncdb=True, verbosity=0)
+user = get_user_model().objects.create(username='memory')
+client = Client(SERVER_NAME='localhost')
+client.force_login(user)
+urls = []
+if apps.is_installed('news'):
+    from news.models import Comment, News
+    news = News.objects.create(title='Новость', text='Текст')
+    Comment.objects.create(news=news, author=user, text='Комментарий')
+    urls += [reverse('news:home'), reverse('news:detail', args=(news.pk,))]
+if apps.is_installed('notes'):
+    from notes.models import Note
+    note = Note.objects.create(
+        title='Заметка', text='*Текст*', slug='memory', author=user
+    )
+    urls += [
+        reverse('notes:home'), reverse('notes:list'),
+        reverse('notes:detail', args=(note.slug,)),
+    ]
+for url in urls * 3:
+    assert client.get(url).status_code == 200, url
+gc.collect()
+try:
+    with open('/proc/self/status') as status:
+        rss = next(
+            int(line.split()[1]) for line in status
+            if line.startswith('VmRSS:')
+        )
+except OSError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(rss)
+'''
+
+
+def worker_rss(package, project_dir):
+    """RSS прогретого рабочего процесса проекта в КиБ."""
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': f'{package}.test_settings',
+        'DEBUG': 'False',
+    }
+    result = subprocess.run(
+        [sys.executable, '-c', WARM_UP],
+        cwd=project_dir, env=env, capture_output=True, text=True,
+        check=True,
+    )
+    return int(result.stdout.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help='Рабочих процессов на каждое развёртывание.',
+    )
+    args = parser.parse_args()
+    rss = {
+        package: worker_rss(package, project_dir)
+        for package, project_dir in PROJECTS
+    }
+    separate = rss['yanews'] + rss['yanote']
+    for package, value in rss.items():
+        print(f'{package}: {value / 1024:.1f} MiB на процесс')
+    print(
+        f'узел, {args.workers} процесса на развёртывание: '
+        f'отдельно {separate * args.workers / 1024:.1f} MiB, '
+        f'хост {rss["yahost"] * args.workers / 1024:.1f} MiB '
+        f'({rss["yahost"] / separate:.0%})'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Общий хост: YaNews и YaNote в одном процессе.
+
+Настройки самих приложений берутся из их проектов, здесь — только то,
+что у хоста общее: база с пользователями и сессиями, middleware,
+шаблоны по сайтам (yahost.sites), кеши и журнал.
+"""
+from pathlib import Path
+
+from decouple import config
+
+from yahost import PROJECT_DIRS
+from yahost.sites import site_url
+from yanews import settings as news_settings
+from yanews.settings import (  # noqa: F401
+    ACTIVITY_ROLLUP_GRACE, COMMENT_STREAM_BROKER, COMMENT_STREAM_HEARTBEAT,
+    COMMENT_STREAM_QUEUE_SIZE, COMMENTS_PAGE_SIZE, EDGE_CACHE_SECONDS,
+    MOST_DISCUSSED_COUNT,
+    NEWS_ARCHIVE_AFTER_DAYS, NEWS_ARCHIVE_CACHE_TIMEOUT,
+    NEWS_ARCHIVE_EDGE_SECONDS, NEWS_ARCHIVE_PAGE_SIZE, NEWS_CACHE,
+    NEWS_CACHE_TIMEOUT, NEWS_CACHE_VERSION, NEWS_COUNT_ON_HOME_PAGE,
+    WEB_CONCURRENCY,
+)
+from yanote import settings as note_settings
+from yanote.settings import (  # noqa: F401
+    NOTE_AUTOSAVE_BACKGROUND, NOTE_AUTOSAVE_DEBOUNCE, NOTE_AUTOSAVE_MAX_DELAY,
+    NOTE_HTML_CACHE, NOTE_MARKDOWN_EXTENSIONS, NOTE_SNAPSHOT_EVERY,
+    NOTES_BATCH_LIMIT,
+)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SECRET_KEY = config('SECRET_KEY')
+
+DEBUG = config('DEBUG', default=False, cast=bool)
+
+# Боевой профиль шаблонов: скомпилированные шаблоны кешируются в памяти.
+CACHED_TEMPLATES = config('CACHED_TEMPLATES', default=not DEBUG, cast=bool)
+
+ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'news.apps.NewsConfig',
+    'notes.apps.NotesConfig',
+]
+
+MIDDLEWARE = [
+    'yacommon.middleware.RequestLogMiddleware',
+    'yahost.sites.SiteMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'yacommon.middleware.CompressionMiddleware',
+    'yanews.middleware.EdgeMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    # Куки закрепления за основной базой у приложений одна и та же.
+    'yacommon.routers.ReplicaPinMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yahost.urls'
+
+# API обоих приложений отвечает на ошибку CSRF в JSON.
+CSRF_FAILURE_VIEW = 'yacommon.api.csrf_failure'
+
+# Сайты хоста: префикс адреса и каталог шаблонов проекта. Первый
+# сегмент пути совпадает с модулем адресов приложения.
+HOST_SITES = {
+    site: {'templates': project_dir / 'templates'}
+    for site, project_dir in PROJECT_DIRS.items()
+}
+HOST_DEFAULT_SITE = 'news'
+
+TEMPLATE_LOADERS = [
+    'yahost.sites.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'OPTIONS': {
+            'loaders': [
+                ('yahost.sites.CachedLoader', TEMPLATE_LOADERS),
+            ] if CACHED_TEMPLATES else TEMPLATE_LOADERS,
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yahost.wsgi.application'
+
+
+CACHES = {**news_settings.CACHES, **note_settings.CACHES}
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
+
+# Реплики только для чтения — копии основной базы, которые обновляет
+# команда replicate. В тестах реплики указывают на тестовую основную базу.
+DATABASE_REPLICAS = config('DATABASE_REPLICAS', default=0, cast=int)
+REPLICA_DATABASES = [
+    f'replica{index}' for index in range(1, DATABASE_REPLICAS + 1)
+]
+for alias in REPLICA_DATABASES:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Шарды заметок — как в YaNote, первый из них — основная база.
+NOTE_SHARDS = config('NOTE_SHARDS', default=1, cast=int)
+NOTE_SHARD_DATABASES = ['default'] + [
+    f'notes{index}' for index in range(1, NOTE_SHARDS)
+]
+for alias in NOTE_SHARD_DATABASES[1:]:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+    }
+NOTE_INDEX_DATABASE = 'default'
+
+# Заметки — в шардах автора, остальное маршрутизатор реплик читает
+# с реплики внутри представлений с ReplicaReadMixin обоих приложений.
+DATABASE_ROUTERS = [
+    'notes.shards.AuthorShardRouter',
+    'yacommon.routers.PrimaryReplicaRouter',
+]
+
+# Сколько секунд после записи пользователь читает из основной базы.
+REPLICA_PIN_SECONDS = 10
+
+
+AUTH_PASSWORD_VALIDATORS = note_settings.AUTH_PASSWORD_VALIDATORS
+
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'Europe/Moscow'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+
+STATICFILES_DIRS = [project_dir / 'static' for project_dir in PROJECT_DIRS.values()]
+
+STATIC_ROOT = BASE_DIR / 'collected_static'
+
+# collectstatic сохраняет файлы с хешем в имени и сжатые копии.
+STATICFILES_STORAGE = 'yacommon.staticfiles.CompressedManifestStaticFilesStorage'
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Вход и переход после входа — на том сайте, где их запросили.
+LOGIN_URL = site_url('users:login')
+LOGIN_REDIRECT_URL = site_url('{site}:home')
+
+# Ограничение частоты запросов на запись: у областей приложений разные
+# имена, поэтому таблицы просто объединяются.
+THROTTLE_ENABLED = True
+THROTTLE_CACHE = 'throttle'
+THROTTLE_RATES = {**news_settings.THROTTLE_RATES, **note_settings.THROTTLE_RATES}
+
+# Сжатие ответов: более короткие ответы отдаются как есть.
+COMPRESSION_MIN_SIZE = 1024
+HTML_MINIFY = True
+
+# Журнал (yacommon.logs): строки запросов обоих сайтов пишет
+# yacommon.middleware.RequestLogMiddleware.
+LOG_FILE = config('LOG_FILE', default='')
+LOG_SQL = config('LOG_SQL', default=False, cast=bool)
+LOG_SAMPLING = {'yacommon.sql': 0.1}
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sample': {'()': 'yacommon.logs.SampleFilter', 'rates': LOG_SAMPLING},
+    },
+    'handlers': {
+        'json': {
+            'class': 'yacommon.logs.JsonQueueHandler',
+            'filename': LOG_FILE,
+            'filters': ['sample'],
+        },
+    },
+    'root': {'handlers': ['json'], 'level': 'WARNING'},
+    'loggers': {
+        logger: {'handlers': ['json'], 'level': 'INFO', 'propagate': False}
+        for logger in ('django', 'yacommon', 'yanews', 'yanote', 'news', 'notes')
+    },
+}
+LOGGING['loggers']['yacommon.sql'] = {'level': 'DEBUG' if LOG_SQL else 'INFO'}
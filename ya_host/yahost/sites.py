@@ -0,0 +1,80 @@
+"""
+Сайты хоста: YaNews под ``/news/``, YaNote под ``/notes/``.
+
+Сайт запроса определяется первым сегментом пути. От него зависят:
+
+- шаблоны: у проектов есть одноимённые ``base.html``,
+  ``includes/header.html`` и ``registration/*``, поэтому загрузчики
+  ищут их в каталоге templates проекта текущего сайта;
+- страницы входа и регистрации: у каждого сайта свой экземпляр
+  пространства имён ``users``, и ``{% url 'users:login' %}`` ведёт
+  на вход своего сайта;
+- ``LOGIN_URL`` и ``LOGIN_REDIRECT_URL``: ленивые адреса, которые
+  вычисляются для сайта запроса.
+
+Пользователи и сессии общие: вход на одном сайте действует на обоих.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.loaders import cached, filesystem
+from django.urls import reverse
+from django.utils.functional import lazy
+
+_site = ContextVar('site', default=None)
+
+
+def current_site():
+    return _site.get() or settings.HOST_DEFAULT_SITE
+
+
+def site_for_path(path):
+    prefix = path.lstrip('/').partition('/')[0]
+    return prefix if prefix in settings.HOST_SITES else None
+
+
+def users_namespace(site):
+    """Экземпляр пространства имён ``users`` для сайта."""
+    return f'{site}-users'
+
+
+def site_reverse(viewname):
+    """Адрес viewname на текущем сайте; ``{site}`` — имя сайта."""
+    site = current_site()
+    return reverse(
+        viewname.format(site=site), current_app=users_namespace(site)
+    )
+
+
+site_url = lazy(site_reverse, str)
+
+
+class SiteMiddleware:
+    """Запоминает сайт запроса на время его обработки."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        site = site_for_path(request.path_info)
+        token = _site.set(site)
+        # По нему {% url 'users:...' %} выбирает вход своего сайта.
+        request.current_app = users_namespace(site or current_site())
+        try:
+            return self.get_response(request)
+        finally:
+            _site.reset(token)
+
+
+class Loader(filesystem.Loader):
+    """Шаблоны из каталога templates проекта текущего сайта."""
+
+    def get_dirs(self):
+        return [settings.HOST_SITES[current_site()]['templates']]
+
+
+class CachedLoader(cached.Loader):
+    """Кеш скомпилированных шаблонов, свой для каждого сайта."""
+
+    def cache_key(self, template_name, skip=None):
+        return f'{current_site()}:{super().cache_key(template_name, skip)}'
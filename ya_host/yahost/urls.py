@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import views as auth_views
+from django.contrib.auth.forms import UserCreationForm
+from django.urls import include, path
+from django.views.generic import CreateView, RedirectView
+
+from yahost.sites import site_url, users_namespace
+
+urlpatterns = [
+    path(
+        '',
+        RedirectView.as_view(url=f'/{settings.HOST_DEFAULT_SITE}/'),
+        name='home',
+    ),
+    path('admin/', admin.site.urls),
+]
+
+auth_urls = [
+    path(
+        'login/',
+        auth_views.LoginView.as_view(),
+        name='login',
+    ),
+    path(
+        'logout/',
+        auth_views.LogoutView.as_view(
+            template_name='registration/logout.html'
+        ),
+        name='logout',
+    ),
+    path(
+        'signup/',
+        CreateView.as_view(
+            form_class=UserCreationForm,
+            success_url=site_url('{site}:home'),
+            template_name='registration/signup.html',
+        ),
+        name='signup'
+    ),
+]
+
+# Каждый сайт — приложение и свои страницы входа под его префиксом.
+for site in settings.HOST_SITES:
+    urlpatterns += [
+        path(f'{site}/', include(f'{site}.urls')),
+        path(
+            f'{site}/auth/',
+            include((auth_urls, 'users'), namespace=users_namespace(site)),
+        ),
+    ]
@@ -0,0 +1,18 @@
+"""
+WSGI config for yahost project.
+
+It exposes the WSGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+from yacommon.staticfiles import StaticFilesApplication
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yahost.settings')
+
+application = StaticFilesApplication(get_wsgi_application())
@@ -0,0 +1,154 @@
+"""
+Сводка активности обсуждений.
+
+Считать «самые обсуждаемые» на лету — значит группировать всю таблицу
+комментариев. Вместо этого ``refresh_activity`` раскладывает новые
+комментарии по часам в ``CommentActivity``, начиная с отметки
+в ``RollupState``, а ``most_discussed`` складывает часовые счётчики
+за нужное окно. Удалённые комментарии из сводки не вычитаются:
+их убирает полный пересчёт ``rebuild_activity``.
+
+Время ``created`` ставится до фиксации транзакции, поэтому комментарий
+может стать виден позже более новых. Отметка отстаёт от текущего
+момента на ``ACTIVITY_ROLLUP_GRACE`` секунд, а id уже учтённых
+комментариев позже отметки хранятся в ``RollupState.counted``:
+опоздавший комментарий попадёт в сводку при следующем обновлении,
+учтённый не посчитается дважды.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .cache import get_news_many
+from .models import Comment, CommentActivity, RollupState
+
+ROLLUP_NAME = 'comment_activity'
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def floor_hour(moment):
+    """Начало часа, в который попадает момент, по времени проекта."""
+    return timezone.localtime(moment).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+def rollup_watermark(now, previous=EPOCH):
+    """
+    Отметка сводки на момент now: на ACTIVITY_ROLLUP_GRACE секунд
+    раньше, но не раньше прежней.
+    """
+    return max(
+        previous, now - timedelta(seconds=settings.ACTIVITY_ROLLUP_GRACE)
+    )
+
+
+def refresh_activity(now=None):
+    """
+    Добавляет в сводку комментарии, созданные после отметки.
+
+    Комментарии «из будущего» не учитываются, чтобы отметка не
+    убежала вперёд. Возвращает число учтённых комментариев.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(
+            name=ROLLUP_NAME, defaults={'watermark': EPOCH}
+        )
+        watermark = rollup_watermark(now, state.watermark)
+        counted = set(state.counted)
+        counts = Counter({
+            (row['news_id'], row['hour']): row['count']
+            for row in Comment.objects
+            .filter(created__gt=state.watermark, created__lte=watermark)
+            .exclude(id__in=counted)
+            .annotate(hour=TruncHour('created'))
+            .values('news_id', 'hour')
+            .annotate(count=Count('id'))
+            .order_by()
+        })
+        # Комментарии после новой отметки читаются построчно: в список
+        # учтённых попадают ровно те id, что прочитаны.
+        fresh = list(
+            Comment.objects
+            .filter(created__gt=watermark, created__lte=now)
+            .order_by('id')
+            .values_list('id', 'news_id', 'created')
+        )
+        for pk, news_id, created in fresh:
+            if pk not in counted:
+                counts[news_id, floor_hour(created)] += 1
+        fresh_ids = [pk for pk, _, _ in fresh]
+        if not counts and fresh_ids == state.counted:
+            return 0
+        existing = {
+            (activity.news_id, activity.hour): activity
+            for activity in CommentActivity.objects.filter(
+                hour__gte=min((hour for _, hour in counts), default=now),
+                news_id__in={news_id for news_id, _ in counts},
+            )
+        }
+        created, updated = [], []
+        for (news_id, hour), count in counts.items():
+            activity = existing.get((news_id, hour))
+            if activity is None:
+                created.append(CommentActivity(
+                    news_id=news_id, hour=hour, count=count
+                ))
+            else:
+                activity.count += count
+                updated.append(activity)
+        CommentActivity.objects.bulk_update(updated, ['count'])
+        CommentActivity.objects.bulk_create(created)
+        state.watermark = watermark
+        state.counted = fresh_ids
+        state.save()
+    return sum(counts.values())
+
+
+def rebuild_activity(now=None):
+    """Пересчитывает сводку с нуля."""
+    with transaction.atomic():
+        CommentActivity.objects.all().delete()
+        RollupState.objects.filter(name=ROLLUP_NAME).delete()
+        return refresh_activity(now)
+
+
+def most_discussed(since, until=None, limit=None):
+    """
+    Новости с наибольшим числом комментариев за окно [since, until).
+
+    Границы окна округляются вниз до часа. У каждой новости
+    заполняется атрибут ``comment_total``.
+    """
+    activity = CommentActivity.objects.filter(hour__gte=floor_hour(since))
+    if until is not None:
+        activity = activity.filter(hour__lt=floor_hour(until))
+    totals = list(
+        activity.values('news_id')
+        .annotate(total=Sum('count'))
+        .order_by('-total', '-news_id')
+        [:limit or settings.MOST_DISCUSSED_COUNT]
+    )
+    news = get_news_many(row['news_id'] for row in totals)
+    result = []
+    for row in totals:
+        item = news[row['news_id']]
+        item.comment_total = row['total']
+        result.append(item)
+    return result
+
+
+def discussed_today_and_week(now=None):
+    """Самые обсуждаемые новости за сегодня и за последние семь дней."""
+    now = timezone.localtime(now)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        'today': most_discussed(midnight),
+        'week': most_discussed(now - timedelta(days=7)),
+    }
@@ -0,0 +1,125 @@
+"""
+JSON API новостей и комментариев.
+
+Общее поведение — поля, курсоры, ошибки и CSRF в JSON — в yacommon.api.
+"""
+from datetime import date
+from http import HTTPStatus
+
+from django.http import HttpResponse
+from django.views import View
+
+from yacommon.api import ApiError, ApiMixin, cursor_id
+from yacommon.routers import ReplicaReadMixin
+from yacommon.throttling import ThrottleMixin
+
+from .cache import get_news
+from .forms import CommentForm
+from .live import publish_comment
+from .models import Comment, News
+from .views import CommentBase
+
+
+class CommentFieldsMixin:
+    fields = {
+        'id': 'id',
+        'news_id': 'news_id',
+        'author_id': 'author_id',
+        'author_name': 'author__username',
+        'parent_id': 'parent_id',
+        'text': 'text',
+        'created': 'created',
+    }
+
+
+class NewsListApi(ApiMixin, ReplicaReadMixin, View):
+    """Новости от новых к старым."""
+    fields = {'id': 'id', 'title': 'title', 'text': 'text', 'date': 'date'}
+    key_fields = ('date', 'id')
+    key_types = (date.fromisoformat, cursor_id)
+
+    def seek(self, queryset, key):
+        return queryset.before(*key)
+
+    def get(self, request):
+        return self.page(News.objects.newest_first())
+
+
+class NewsDetailApi(ApiMixin, ReplicaReadMixin, View):
+    """Одна новость."""
+    fields = NewsListApi.fields
+
+    def get(self, request, pk):
+        return self.detail(News.objects.filter(pk=pk))
+
+
+class NewsCommentsApi(
+        CommentFieldsMixin,
+        ApiMixin,
+        ThrottleMixin,
+        ReplicaReadMixin,
+        View
+):
+    """Комментарии к новости: чтение для всех, создание для авторизованных."""
+    throttle_scope = 'comment'
+
+    def get(self, request, pk):
+        if get_news(pk) is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Новость не найдена.')
+        return self.page(Comment.objects.filter(news_id=pk).order_by('id'))
+
+    def post(self, request, pk):
+        self.require_login()
+        if get_news(pk) is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Новость не найдена.')
+        data = self.json_body()
+        form = CommentForm(data)
+        self.validate(form)
+        comment = form.save(commit=False)
+        comment.news_id = pk
+        if data.get('parent_id') is not None:
+            comment.reply_to(self.get_parent(pk, data['parent_id']))
+        comment.author = request.user
+        comment.save()
+        publish_comment(comment)
+        return self.detail(
+            Comment.objects.filter(pk=comment.pk), status=HTTPStatus.CREATED
+        )
+
+    def get_parent(self, news_id, parent_id):
+        parent = None
+        if isinstance(parent_id, int):
+            parent = Comment.objects.filter(
+                pk=parent_id, news_id=news_id
+            ).first()
+        if parent is None:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, 'Нет такого комментария к новости.'
+            )
+        return parent
+
+
+class CommentApi(CommentFieldsMixin, ApiMixin, CommentBase, View):
+    """Свой комментарий: чтение, изменение и удаление."""
+    throttle_scope = 'comment'
+    throttle_methods = ('PATCH',)
+
+    def get(self, request, pk):
+        return self.detail(self.get_queryset().filter(pk=pk))
+
+    def patch(self, request, pk):
+        comment = self.get_queryset().filter(pk=pk).first()
+        if comment is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        form = CommentForm(
+            {'text': comment.text, **self.json_body()}, instance=comment
+        )
+        self.validate(form)
+        form.save()
+        return self.detail(self.get_queryset().filter(pk=pk))
+
+    def delete(self, request, pk):
+        deleted, _ = self.get_queryset().filter(pk=pk).delete()
+        if not deleted:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
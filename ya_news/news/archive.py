@@ -0,0 +1,76 @@
+"""
+Архив старых новостей.
+
+Новости старше ``NEWS_ARCHIVE_AFTER_DAYS`` дней вместе с комментариями
+переносятся в ``ArchivedNews`` и ``ArchivedComment``, а из рабочих таблиц
+удаляются: те остаются небольшими, и их индексы помещаются в кеш.
+Страница архивной новости не собирается заново: в ``ArchivedNews.html``
+хранится снимок, отрисованный в момент переноса.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .maintenance import iterate_chunks
+from .models import ArchivedComment, ArchivedNews, Comment, News
+
+SNAPSHOT_TEMPLATE = 'includes/article.html'
+
+
+def render_snapshot(news):
+    """HTML новости со всеми комментариями, каким его видит аноним."""
+    return render_to_string(SNAPSHOT_TEMPLATE, {
+        'news': news, 'comments': news.comment_set.all(), 'archived': True,
+    })
+
+
+def archive_chunk(ids):
+    """Переносит новости с перечисленными id в архив одной транзакцией."""
+    archived_news, archived_comments = [], []
+    with transaction.atomic():
+        for news in News.objects.filter(id__in=ids).prefetch_related(
+                Prefetch(
+                    'comment_set',
+                    Comment.objects.select_related('author').in_order(),
+                )
+        ):
+            archived_news.append(ArchivedNews(
+                id=news.id,
+                title=news.title,
+                date=news.date,
+                html=render_snapshot(news),
+            ))
+            archived_comments.extend(
+                ArchivedComment(
+                    id=comment.id,
+                    news_id=news.id,
+                    author_id=comment.author_id,
+                    text=comment.text,
+                    created=comment.created,
+                )
+                for comment in news.comment_set.all()
+            )
+        ArchivedNews.objects.bulk_create(archived_news)
+        ArchivedComment.objects.bulk_create(archived_comments)
+        News.objects.filter(id__in=ids).delete()
+    return len(archived_news), len(archived_comments)
+
+
+def archive_news(days, chunk_size=100):
+    """
+    Переносит в архив новости старше days дней.
+
+    Возвращает число перенесённых новостей и комментариев.
+    """
+    before = timezone.localdate() - timedelta(days=days)
+    total_news = total_comments = 0
+    for chunk in iterate_chunks(
+            News.objects.filter(date__lt=before), chunk_size=chunk_size
+    ):
+        news, comments = archive_chunk([row.id for row in chunk])
+        total_news += news
+        total_comments += comments
+    return total_news, total_comments
@@ -0,0 +1,776 @@
+"""
+Микробенчмарки приложения.
+
+Запускаются командой ``python manage.py benchmark [имя ...]``.
+Каждый бенчмарк — генератор пар (метрика, значение).
+"""
+import asyncio
+import io
+import itertools
+import logging
+import random
+import re
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connection
+from django.db.models import Count
+from django.template.backends.django import DjangoTemplates
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from yacommon.compression import ENCODINGS
+from yacommon.logs import JsonFormatter, JsonQueueHandler, SampleFilter
+from yacommon.middleware import (
+    CompressionMiddleware, compression_stats, reset_compression_stats
+)
+from yacommon.staticfiles import StaticFilesApplication
+from yacommon.throttling import get_throttle_wait
+from yanews.edge import EdgeCache
+
+from .activity import most_discussed, refresh_activity
+from .cache import (
+    get_news, get_news_many, news_cache, news_cache_stats,
+    reset_news_cache_stats
+)
+from .live import channel_name, get_broker, sse_event
+from .maintenance import JOBS, iterate, peak_rss, reset_peak_rss
+from .models import Comment, News
+from .periods import PAGE_FIELDS, news_page, period_bounds
+from .views import NewsDetail, NewsDetailView, NewsList
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """Регистрирует функцию как бенчмарк под её именем."""
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def per_call(func, number=1000, repeat=5):
+    """Лучшее время одного вызова func в микросекундах."""
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return best / number * 1e6
+
+
+def template_engines():
+    """Движки шаблонов проекта без кеширования и с кешированием."""
+    params = settings.TEMPLATES[0]
+    cached = [('django.template.loaders.cached.Loader',
+               settings.TEMPLATE_LOADERS)]
+    for label, loaders in (
+        ('uncached', settings.TEMPLATE_LOADERS),
+        ('cached', cached),
+    ):
+        yield label, DjangoTemplates({
+            'NAME': f'benchmark-{label}',
+            'DIRS': params['DIRS'],
+            'APP_DIRS': False,
+            'OPTIONS': {**params['OPTIONS'], 'loaders': loaders},
+        })
+
+
+def fetch(application, url, accept_encoding='', etag=None, cookie=None):
+    """Запрашивает адрес у WSGI-приложения: (статус, байты тела, заголовки)."""
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'HTTP_ACCEPT_ENCODING': accept_encoding,
+    }
+    if etag:
+        environ['HTTP_IF_NONE_MATCH'] = etag
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = int(status.split()[0])
+        response['headers'] = dict(headers)
+
+    result = application(environ, start_response)
+    body = b''.join(result)
+    if hasattr(result, 'close'):
+        result.close()
+    return response['status'], len(body), response['headers']
+
+
+@contextmanager
+def keep_connections():
+    """
+    Запросы к WSGI-приложению без закрытия соединений с базой.
+
+    Иначе конец запроса закроет соединение посреди транзакции бенчмарка.
+    """
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        yield
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+
+
+def measure_compression(view, url, user, **kwargs):
+    """Размер ответа до и после минификации и сжатия каждой кодировкой."""
+    middleware = CompressionMiddleware(
+        lambda request: view(request, **kwargs).render()
+    )
+
+    def get(accept_encoding=''):
+        request = RequestFactory().get(
+            url, HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        request.user = user
+        request.resolver_match = resolve(url)
+        return middleware(request)
+
+    with override_settings(HTML_MINIFY=False):
+        yield 'original', f'{len(get().content)} B'
+    yield 'minified', f'{len(get().content)} B'
+    for encoding in ENCODINGS:
+        reset_compression_stats()
+        for _ in range(20):
+            response = get(encoding)
+        for url_name, stat in compression_stats().items():
+            yield f'{url_name} {encoding}', (
+                '{} B, ratio {:.1f}x, {:.0f} µs CPU'.format(
+                    len(response.content), stat['ratio'], stat['cpu_us']
+                )
+            )
+
+
+@benchmark
+def throttle():
+    """Накладные расходы проверки частоты запросов на один запрос."""
+    request = RequestFactory().post('/')
+    request.user = get_user_model()(pk=1)
+    rates = {'bench': {'user': '1000000000/s', 'ip': '1000000000/s'}}
+    with override_settings(THROTTLE_RATES=rates):
+        yield 'throttle check', '{:.1f} µs'.format(
+            per_call(lambda: get_throttle_wait(request, 'bench'))
+        )
+
+
+def detail_context(request, news):
+    """Контекст страницы новости, как его собирает NewsDetail."""
+    view = NewsDetail()
+    view.setup(request, pk=news.pk)
+    view.object = view.get_object()
+    return view.get_context_data(object=view.object)
+
+
+@benchmark
+def templates():
+    """Время отрисовки главной и детальной страниц новости."""
+    author = get_user_model().objects.create(username='benchmark')
+    news = [
+        News.objects.create(title=f'Новость {index}', text='Текст. ' * 50)
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+    ]
+    Comment.objects.bulk_create(
+        Comment(news=news[0], author=author, text='Первая\nвторая строка')
+        for _ in range(100)
+    )
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    contexts = {
+        'news/home.html': {'object_list': list(NewsList().get_queryset())},
+        'news/detail.html': detail_context(request, news[0]),
+    }
+    for label, engine in template_engines():
+        for name, context in contexts.items():
+            yield f'{name} ({label})', '{:.0f} µs'.format(per_call(
+                lambda: engine.get_template(name).render(context, request),
+                number=50,
+            ))
+
+
+@benchmark
+def comment_html():
+    """Отрисовка тысячи комментариев: фильтр linebreaksbr или готовый HTML."""
+    author = get_user_model().objects.create(username='benchmark')
+    news = News.objects.create(title='Новость', text='Текст')
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Строка <b>и</b>\n' * 5)
+        for _ in range(1000)
+    )
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    template = dict(template_engines())['cached'].get_template(
+        'news/detail.html'
+    )
+
+    def render_time():
+        # Вся тысяча комментариев — на одной странице.
+        with override_settings(COMMENTS_PAGE_SIZE=1000):
+            context = detail_context(request, news)
+        assert len(context['comments']) == 1000
+        return '{:.1f} ms'.format(per_call(
+            lambda: template.render(context, request), number=10
+        ) / 1000)
+
+    yield 'linebreaksbr', render_time()
+    for metric, value in JOBS['render_html']():
+        yield f'backfill {metric}', value
+    yield 'text_html', render_time()
+
+
+@benchmark
+def static():
+    """Запросы и байты на загрузку страницы: до и после сборки статики."""
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    with tempfile.TemporaryDirectory() as root, override_settings(
+            STATIC_ROOT=root, DEBUG=False
+    ):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        application = StaticFilesApplication(None, root=root)
+        html = render_to_string('news/home.html', request=request).encode()
+        urls = re.findall(
+            r'(?:href|src)="({}[^"]+)"'.format(re.escape(settings.STATIC_URL)),
+            html.decode(),
+        )
+        first = [fetch(application, url, 'gzip, br') for url in urls]
+        plain = sum(fetch(application, url)[1] for url in urls)
+        revalidated = [
+            fetch(application, url, 'gzip, br', headers['ETag'])
+            for url, (_, _, headers) in zip(urls, first)
+            if 'immutable' not in headers['Cache-Control']
+        ]
+    yield 'local assets per page', len(urls)
+    yield 'without caching: requests per view', 1 + len(urls)
+    yield 'without caching: bytes per view', len(html) + plain
+    yield 'first visit: requests', 1 + len(first)
+    yield 'first visit: bytes', len(html) + sum(size for _, size, _ in first)
+    yield 'repeat visit: requests', 1 + len(revalidated)
+    yield 'repeat visit: bytes', len(html) + sum(
+        size for _, size, _ in revalidated
+    )
+
+
+@benchmark
+def compression():
+    """Сжатие детальной страницы новости с двумястами комментариями."""
+    author = get_user_model().objects.create(username='benchmark')
+    news = News.objects.create(title='Новость', text='Текст. ' * 50)
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Первая\nвторая строка')
+        for _ in range(200)
+    )
+    yield from measure_compression(
+        NewsDetailView.as_view(),
+        reverse('news:detail', args=(news.pk,)),
+        AnonymousUser(),
+        pk=news.pk,
+    )
+
+
+@benchmark
+def api():
+    """Пропускная способность JSON API в сравнении с HTML-страницами."""
+    author = get_user_model().objects.create(username='benchmark')
+    news = [
+        News.objects.create(title=f'Новость {index}', text='Текст. ' * 50)
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+    ]
+    Comment.objects.bulk_create(
+        Comment(news=news[0], author=author, text='Первая\nвторая строка')
+        for _ in range(100)
+    )
+    client = Client(SERVER_NAME='localhost')
+    pages = (
+        ('news:home', reverse('news:home')),
+        ('api news', reverse('news:api_news_list') + '?limit=10'),
+        ('news:detail', reverse('news:detail', args=(news[0].pk,))),
+        ('api comments', reverse(
+            'news:api_news_comments', args=(news[0].pk,)
+        ) + '?limit=100'),
+    )
+    for label, url in pages:
+        yield label, '{:.0f} req/s'.format(
+            1e6 / per_call(lambda: client.get(url), number=20, repeat=3)
+        )
+
+
+@benchmark
+def activity():
+    """Самые обсуждаемые за неделю: группировка на лету и по сводке."""
+    author = get_user_model().objects.create(username='benchmark')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст')
+        for index in range(30)
+    )
+    news = list(News.objects.values_list('pk', flat=True))
+    first = Comment.objects.count()
+    hours = 24 * 14
+    per_hour = 300
+    Comment.objects.bulk_create(
+        Comment(news_id=news[index % len(news)], author=author, text='Текст')
+        for index in range(hours * per_hour)
+    )
+    # auto_now_add не даёт задать дату при создании, поэтому сдвигаем
+    # комментарии по часам за две недели после вставки.
+    now = timezone.now()
+    first_id = Comment.objects.order_by('id').values_list(
+        'id', flat=True
+    )[first]
+    for hour in range(hours):
+        start = first_id + hour * per_hour
+        Comment.objects.filter(id__gte=start, id__lt=start + per_hour).update(
+            created=now - timedelta(hours=hour)
+        )
+    since = now - timedelta(days=7)
+
+    def live():
+        return list(
+            Comment.objects.filter(created__gte=since)
+            .values('news_id').annotate(total=Count('id'))
+            .order_by('-total')[:settings.MOST_DISCUSSED_COUNT]
+        )
+
+    yield 'comments', hours * per_hour
+    yield 'live GROUP BY', '{:.0f} µs'.format(per_call(live, number=20))
+    yield 'rollup build', '{:.0f} ms'.format(
+        per_call(refresh_activity, number=1, repeat=1) / 1000
+    )
+    yield 'rollup query', '{:.0f} µs'.format(
+        per_call(lambda: most_discussed(since), number=20)
+    )
+    Comment.objects.create(news_id=news[0], author=author, text='Текст')
+    yield 'incremental refresh', '{:.0f} µs'.format(
+        per_call(refresh_activity, number=1, repeat=1)
+    )
+
+
+def traced(func):
+    """Время выполнения func в секундах и пик выделенной Python памяти."""
+    tracemalloc.start()
+    try:
+        seconds = per_call(func, number=1, repeat=1) / 1e6
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return '{:.2f} s, peak {:.1f} MiB'.format(seconds, peak / 2 ** 20)
+
+
+@benchmark
+def maintenance():
+    """Проход по всем комментариям: модели целиком против порций строк."""
+    author = get_user_model().objects.create(username='benchmark')
+    news = News.objects.create(title='Новость', text='Текст')
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Длинный текст. ' * 40)
+        for _ in range(50000)
+    )
+
+    def models():
+        return sum(1 for comment in Comment.objects.all() if comment.news_id)
+
+    def rows():
+        return sum(
+            1 for row in iterate(Comment.objects, ('news_id',)) if row.news_id
+        )
+
+    yield 'comments', Comment.objects.count()
+    yield 'Comment.objects.all()', traced(models)
+    yield 'keyset rows', traced(rows)
+
+
+@benchmark
+def edge():
+    """Страницы новостей напрямую и через общий кеш с ESI."""
+    author = get_user_model().objects.create(username='benchmark')
+    news = [
+        News.objects.create(title=f'Новость {index}', text='Текст. ' * 50)
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+    ]
+    Comment.objects.bulk_create(
+        Comment(news=item, author=author, text='Комментарий')
+        for item in news for _ in range(20)
+    )
+    client = Client()
+    client.force_login(author)
+    session = client.cookies.output(attrs=[], header='', sep=';').strip()
+    # Четыре анонимных запроса на один запрос пользователя.
+    traffic = itertools.cycle([
+        (url, cookie)
+        for url in [reverse('news:home')] + [
+            reverse('news:detail', args=(item.pk,)) for item in news
+        ]
+        for cookie in (None, None, None, None, session)
+    ])
+    for label, application in (
+        ('direct', WSGIHandler()),
+        ('edge', EdgeCache(WSGIHandler())),
+    ):
+        with keep_connections():
+            micros = per_call(
+                lambda: fetch(application, *next(traffic)),
+                number=200, repeat=3,
+            )
+        yield label, '{:.0f} req/s'.format(1e6 / micros)
+    yield 'edge hit ratio', f'{application.hit_ratio():.1%}'
+
+
+@benchmark
+def stream(subscribers=10000):
+    """Открытые потоки комментариев в одном процессе и рассылка по ним."""
+    from yanews.asgi import application
+
+    news = News.objects.create(title='Новость', text='Текст')
+    channel = channel_name(news.pk)
+    broker = get_broker()
+    scope = {
+        'type': 'http', 'method': 'GET', 'query_string': b'', 'headers': [],
+        'path': reverse('news:comment_stream', args=(news.pk,)),
+    }
+    message = sse_event('<div>Комментарий</div>', event='comment')
+    results = {}
+
+    async def load():
+        disconnects = asyncio.Queue()
+        delivered = asyncio.Event()
+        received = itertools.count(1)
+
+        async def send(event):
+            if event.get('body') == message and (
+                next(received) == subscribers
+            ):
+                delivered.set()
+
+        reset_peak_rss()
+        rss = peak_rss()
+        tracemalloc.start()
+        started = timeit.default_timer()
+        tasks = [
+            asyncio.ensure_future(application(scope, disconnects.get, send))
+            for _ in range(subscribers)
+        ]
+        while broker.subscriber_count(channel) < subscribers:
+            await asyncio.sleep(0.01)
+        results['connect'] = timeit.default_timer() - started
+        results['memory'], _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results['rss'] = rss and peak_rss() - rss
+
+        started = timeit.default_timer()
+        # Публикация из другого потока, как из представления под ASGI.
+        await sync_to_async(broker.publish, thread_sensitive=False)(
+            channel, message
+        )
+        await delivered.wait()
+        results['fan-out'] = timeit.default_timer() - started
+
+        for _ in tasks:
+            disconnects.put_nowait({'type': 'http.disconnect'})
+        await asyncio.gather(*tasks)
+
+    # Проверки новости выполняются в этом потоке, в транзакции бенчмарка.
+    async_to_sync(load)()
+    yield 'subscribers', subscribers
+    yield 'connect all (traced)', '{:.2f} s'.format(results['connect'])
+    yield 'memory per subscriber', '{:.1f} KiB'.format(
+        results['memory'] / subscribers / 1024
+    )
+    if results['rss'] is not None:
+        yield 'peak RSS growth', '{:.1f} MiB'.format(results['rss'] / 1024)
+    yield 'fan-out to all', '{:.0f} ms'.format(results['fan-out'] * 1000)
+
+
+def comment_tree(news, author, size, roots=500):
+    """
+    Дерево из size комментариев: roots веток, ответы на случайные
+    комментарии предыдущего уровня.
+    """
+    level = [None] * roots
+    created = 0
+    while created < size:
+        count = min(size - created, max(len(level), roots))
+        Comment.objects.bulk_create(
+            Comment(news=news, author=author, text=f'Комментарий {index}',
+                    parent_id=random.choice(level))
+            for index in range(count)
+        )
+        created += count
+        level = list(
+            Comment.objects.order_by('-id').values_list('id', flat=True)
+            [:count]
+        )
+
+
+def render_recursive(comments):
+    """Ветки через parent: запрос ответов на каждый комментарий."""
+    html = []
+    for comment in comments:
+        html.append(render_to_string(
+            'includes/comment.html', {'comment': comment}
+        ))
+        html.extend(render_recursive(
+            comment.replies.select_related('author').order_by('id')
+        ))
+    return html
+
+
+@benchmark
+def threads(size=10000):
+    """Страница новости с деревом из 10 тысяч комментариев."""
+    author = get_user_model().objects.create(username='benchmark')
+    news = News.objects.create(title='Новость', text='Текст')
+    random.seed(1)
+    comment_tree(news, author, size)
+    comments = Comment.objects.filter(news=news).select_related('author')
+    last = comments.in_order().values_list('path', flat=True)[size - 51]
+
+    def page(after=None, count=None):
+        page, has_next = comments.page(after, count)
+        return render_to_string('includes/comment_list.html', {
+            'comments': page,
+            'comments_next': page[-1].path if has_next else None,
+        })
+
+    def recursive():
+        return render_recursive(
+            comments.filter(parent=None).order_by('id')
+        )
+
+    def count_queries(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    yield 'comments', comments.count()
+    yield 'max depth', max(comment.depth for comment in comments)
+    for label, render, repeat in (
+        ('first page (path)', page, 5),
+        ('last page (path)', lambda: page(last), 5),
+        ('whole tree (path)', lambda: page(count=size), 1),
+        ('whole tree (parent recursion)', recursive, 1),
+    ):
+        queries = []
+        with connection.execute_wrapper(count_queries):
+            render()
+        yield label, '{:.1f} ms, {} queries'.format(
+            per_call(render, number=1, repeat=repeat) / 1000, len(queries)
+        )
+
+
+@benchmark
+def news_objects(count=200, requests=2000, edit_every=100):
+    """Чтение новостей по id: из базы и через кеш news.cache."""
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст. ' * 50)
+        for index in range(count)
+    )
+    pks = list(News.objects.order_by('id').values_list('id', flat=True))
+    batch = pks[:settings.MOST_DISCUSSED_COUNT]
+    get_news_many(batch)
+    for label, func in (
+        ('get (database)', lambda: News.objects.get(pk=pks[0])),
+        ('get (cache)', lambda: get_news(pks[0])),
+        (f'get many {len(batch)} (database)',
+         lambda: News.objects.in_bulk(batch)),
+        (f'get many {len(batch)} (cache)', lambda: get_news_many(batch)),
+    ):
+        yield label, '{:.1f} µs'.format(per_call(func))
+
+    # Страницы новостей: популярные читают чаще, по закону Ципфа,
+    # и каждая edit_every-я новость правится редакцией.
+    news_cache().clear()
+    reset_news_cache_stats()
+    random.seed(1)
+    weights = [1 / rank for rank in range(1, count + 1)]
+    client = Client(SERVER_NAME='localhost')
+    queries = []
+
+    def count_queries(execute, sql, params, many, context):
+        if 'FROM "news_news"' in sql:
+            queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        for index, pk in enumerate(random.choices(pks, weights, k=requests)):
+            if index % edit_every == 0:
+                edited = News.objects.get(pk=random.choice(pks))
+                edited.save()
+            client.get(reverse('news:detail', args=(pk,)))
+    stats = news_cache_stats()
+    yield 'detail pages', requests
+    yield 'hit ratio', '{:.1%}'.format(stats['ratio'])
+    yield 'news queries', len(queries)
+    location = Path(settings.CACHES[settings.NEWS_CACHE]['LOCATION'])
+    if location.is_dir():
+        # Файловый кеш: сколько записей лежит на диске после прогона.
+        yield 'cache files', len(list(location.glob('*.djcache')))
+
+
+@benchmark
+def archive(count=50000, size=20):
+    """
+    Далёкая страница всех новостей: OFFSET против ключа (date, id),
+    и страница прошедшего месяца из базы и из кеша.
+    """
+    start = timezone.localdate() - timedelta(days=count // 10)
+    News.objects.bulk_create(
+        (
+            News(
+                title=f'Новость {index}', text='Текст',
+                date=start + timedelta(days=index // 10),
+            )
+            for index in range(count)
+        ),
+        batch_size=1000,
+    )
+    ordered = News.objects.newest_first()
+    for depth in (1, count // 2, count - size):
+        last = ordered.values('date', 'id')[depth - 1]
+        key = (last['date'], last['id'])
+
+        def offset():
+            return list(ordered.values(*PAGE_FIELDS)[depth:depth + size])
+
+        def keyset():
+            return list(ordered.before(*key).values(*PAGE_FIELDS)[:size])
+
+        def page():
+            return read_uncached(lambda: news_page(before=key, size=size))
+
+        assert offset() == keyset() == page()[0]
+        for label, func in (
+            ('offset', offset),
+            ('keyset', keyset),
+            ('news_page, both tables, uncached', page),
+        ):
+            yield f'page at {depth}, {label}', '{:.0f} µs'.format(
+                per_call(func, number=20)
+            )
+    month = period_bounds(start.year + 1, start.month)
+    for label, func in (
+        ('month page (database)', lambda: read_uncached(
+            lambda: news_page(*month, size=size)
+        )),
+        ('month page (cache)', lambda: news_page(*month, size=size)),
+    ):
+        yield label, '{:.0f} µs'.format(per_call(func, number=200))
+
+
+def read_uncached(func):
+    """Вызов func со сброшенным кешем: страница читается из базы."""
+    news_cache().clear()
+    return func()
+
+
+class SlowStream(io.StringIO):
+    """Поток, запись в который ждёт delay секунд, как сетевой диск."""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return super().write(text)
+
+
+@contextmanager
+def project_log(handler, sql=False):
+    """Журнал проекта временно пишется только в handler."""
+    logger = logging.getLogger('yacommon')
+    sql_logger = logging.getLogger('yacommon.sql')
+    handlers, level = logger.handlers, sql_logger.level
+    logger.handlers = [handler]
+    sql_logger.setLevel(logging.DEBUG if sql else logging.INFO)
+    try:
+        yield
+    finally:
+        logger.handlers = handlers
+        sql_logger.setLevel(level)
+
+
+@benchmark
+def logs(slow_write=0.0005):
+    """
+    Цена журнала на запрос к API: без него, с записью в потоке запроса
+    и через очередь — в файл и в медленный поток. С медленным потоком
+    запись в потоке запроса добавляет задержку каждой записи к ответу,
+    а очередь — нет: её дописывает поток записи, drain — остаток после
+    последнего запроса.
+    """
+    author = get_user_model().objects.create(username='benchmark')
+    news = News.objects.create(title='Новость', text='Текст')
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Комментарий')
+        for _ in range(50)
+    )
+    url = reverse('news:api_news_comments', args=(news.pk,))
+    directory = tempfile.TemporaryDirectory()
+    path = f'{directory.name}/log.json'
+
+    def sync_handler(slow):
+        if slow:
+            handler = logging.StreamHandler(SlowStream(slow_write))
+        else:
+            handler = logging.FileHandler(path, encoding='utf-8')
+        handler.setFormatter(JsonFormatter())
+        return handler
+
+    def queue_handler(slow, rate=1):
+        if slow:
+            handler = JsonQueueHandler(stream=SlowStream(slow_write))
+        else:
+            handler = JsonQueueHandler(path)
+        handler.addFilter(SampleFilter({'yacommon.sql': rate}))
+        return handler
+
+    without_log = [
+        name for name in settings.MIDDLEWARE
+        if name != 'yacommon.middleware.RequestLogMiddleware'
+    ]
+    with override_settings(MIDDLEWARE=without_log):
+        client = Client(SERVER_NAME='localhost')
+        yield 'no log', '{:.0f} µs'.format(
+            per_call(lambda: client.get(url), number=200)
+        )
+    client = Client(SERVER_NAME='localhost')
+    for sink, slow in (('file', False), ('slow sink', True)):
+        for label, make_handler, sql in (
+            ('requests, sync', sync_handler, False),
+            ('requests, queue', queue_handler, False),
+            ('requests + sql, sync', sync_handler, True),
+            ('requests + sql, queue', queue_handler, True),
+            ('requests + 10% sql, queue',
+             lambda slow: queue_handler(slow, 0.1), True),
+        ):
+            handler = make_handler(slow)
+            with project_log(handler, sql):
+                elapsed = per_call(lambda: client.get(url), number=200)
+            if isinstance(handler, JsonQueueHandler):
+                # Очередь дописывается уже после ответов: это время
+                # платит поток записи, а не запросы.
+                start = time.perf_counter()
+                handler.stop()
+                label += ' (drain {:.0f} ms, dropped {})'.format(
+                    (time.perf_counter() - start) * 1000, handler.dropped
+                )
+            handler.close()
+            yield f'{sink}: {label}', '{:.0f} µs'.format(elapsed)
+    directory.cleanup()
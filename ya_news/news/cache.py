@@ -0,0 +1,140 @@
+"""
+Кеш новостей по id.
+
+Опубликованная новость почти не меняется, а страница новости,
+комментирование и сводки читают её на каждый запрос. ``get_news`` и
+``get_news_many`` сначала ищут новости в кеше ``NEWS_CACHE`` и читают
+из базы только промахи.
+
+Ключ записи содержит версию новости. Сохранение и удаление новости
+меняют версию сразу и ещё раз после фиксации транзакции. Читатель
+берёт версию до запроса к базе, поэтому строка, прочитанная до
+изменения, ложится под старую версию и больше не находится. Промахи
+читаются из основной базы: отстающая реплика положила бы в кеш
+устаревшую новость уже под новой версией.
+
+Запись прежней версии удаляется сразу, а версия и запись живут
+``NEWS_CACHE_TIMEOUT`` секунд: в файловом кеше не копятся записи,
+которые больше не прочтут.
+
+``NEWS_CACHE_VERSION`` — версия формата записей, её меняют вместе с
+полями модели. ``QuerySet.update()`` сигналов не шлёт и кеш не
+сбрасывает.
+"""
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import News
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def news_cache():
+    return caches[settings.NEWS_CACHE]
+
+
+def version_key(pk):
+    return f'news-version:{pk}'
+
+
+def news_key(pk, version):
+    return f'news:{pk}:{version}'
+
+
+def new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def get_versions(pks):
+    """Текущие версии новостей; недостающие заводятся заново."""
+    cache = news_cache()
+    keys = {version_key(pk): pk for pk in pks}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, new_version(), settings.NEWS_CACHE_TIMEOUT)
+        versions.update(cache.get_many(missing))
+    return {
+        pk: versions.get(key) or new_version() for key, pk in keys.items()
+    }
+
+
+def get_news_many(pks):
+    """Новости по id: словарь {id: новость}, отсутствующих в нём нет."""
+    pks = set(pks)
+    if not pks:
+        return {}
+    cache = news_cache()
+    keys = {
+        news_key(pk, version): pk
+        for pk, version in get_versions(pks).items()
+    }
+    found = cache.get_many(keys, version=settings.NEWS_CACHE_VERSION)
+    news = {keys[key]: item for key, item in found.items()}
+    missing = pks - news.keys()
+    if missing:
+        loaded = News.objects.using('default').in_bulk(missing)
+        cache.set_many(
+            {
+                key: loaded[pk] for key, pk in keys.items() if pk in loaded
+            },
+            settings.NEWS_CACHE_TIMEOUT,
+            version=settings.NEWS_CACHE_VERSION,
+        )
+        news.update(loaded)
+    with _stats_lock:
+        _stats.update(hits=len(found), misses=len(missing))
+    return news
+
+
+def get_news(pk):
+    """Новость по id или None."""
+    return get_news_many([pk]).get(pk)
+
+
+def forget_news(pk):
+    """Меняет версию новости и удаляет запись прежней версии."""
+    cache = news_cache()
+    previous = cache.get(version_key(pk))
+    cache.set(version_key(pk), new_version(), settings.NEWS_CACHE_TIMEOUT)
+    if previous is not None:
+        cache.delete(
+            news_key(pk, previous), version=settings.NEWS_CACHE_VERSION
+        )
+
+
+def news_changed(sender, instance, using, **kwargs):
+    forget_news(instance.pk)
+    # Пока транзакция не зафиксирована, другой процесс может положить
+    # в кеш прежнюю строку под новой версией.
+    pk = instance.pk
+    transaction.on_commit(lambda: forget_news(pk), using=using)
+
+
+def connect_signals():
+    post_save.connect(news_changed, sender=News, dispatch_uid='news_cache')
+    post_delete.connect(news_changed, sender=News, dispatch_uid='news_cache')
+
+
+def news_cache_stats():
+    """Попадания и промахи кеша новостей в этом процессе."""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    return {
+        'hits': hits,
+        'misses': misses,
+        'ratio': hits / max(hits + misses, 1),
+    }
+
+
+def reset_news_cache_stats():
+    with _stats_lock:
+        _stats.clear()
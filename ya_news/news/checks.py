@@ -0,0 +1,48 @@
+"""Проверки настроек приложения для ``manage.py check``."""
+from django.conf import settings
+from django.core import checks
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def local_cache_errors(alias, error_id, hint):
+    """Ошибка, если кеш alias живёт в памяти одного из рабочих процессов."""
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    backend = settings.CACHES[alias]['BACKEND']
+    if workers > 1 and backend in LOCAL_CACHES:
+        return [
+            checks.Error(
+                f'Кеш {alias!r} ({backend}) живёт в памяти '
+                f'процесса, а рабочих процессов {workers}.',
+                hint=hint,
+                id=error_id,
+            )
+        ]
+    return []
+
+
+@checks.register(checks.Tags.caches)
+def check_news_cache(app_configs, **kwargs):
+    """
+    С несколькими рабочими процессами кеш новостей должен быть общим:
+    сброс версии в одном процессе другие иначе не увидят.
+    """
+    return local_cache_errors(
+        settings.NEWS_CACHE, 'news.E001',
+        'Укажите общий кеш: файловый, в базе или memcached.',
+    )
+
+
+@checks.register(checks.Tags.caches)
+def check_throttle_cache(app_configs, **kwargs):
+    """
+    Корзины ограничения частоты тоже должны быть общими: иначе у каждого
+    процесса своя корзина, и лимит умножается на число процессов.
+    """
+    return local_cache_errors(
+        settings.THROTTLE_CACHE, 'news.E002',
+        'Укажите кеш в базе, memcached или redis: в них cache.add атомарен.',
+    )
@@ -0,0 +1,59 @@
+"""
+Заголовки кеширования для общего кеша перед приложением.
+
+Страницы с ``EdgeCacheMixin`` можно хранить в кеше прокси
+``EDGE_CACHE_SECONDS`` секунд, если в них нет данных пользователя:
+запрос пришёл через прокси с ESI (данные пользователя вынесены во
+фрагменты) или пользователь анонимен. Браузер такие страницы не
+кеширует (``max-age=0``), чтобы выход и вход были видны сразу.
+"""
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+CACHEABLE_METHODS = ('GET', 'HEAD')
+
+
+def shared(response, seconds=None):
+    if seconds is None:
+        seconds = settings.EDGE_CACHE_SECONDS
+    patch_cache_control(
+        response, public=True, max_age=0, s_maxage=seconds,
+    )
+
+
+def private(response):
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+class EdgeCacheMixin:
+    """Разрешает общий кеш для страниц без данных пользователя."""
+
+    def get_edge_cache_seconds(self):
+        """Сколько секунд прокси может отдавать страницу из кеша."""
+        return settings.EDGE_CACHE_SECONDS
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if (
+            request.method not in CACHEABLE_METHODS
+            or response.status_code != 200
+        ):
+            return response
+        # В режиме ESI к пользователю не обращаемся: иначе сессия
+        # добавит Vary: Cookie, и кеш станет персональным.
+        esi = getattr(request, 'esi', False)
+        if esi or not request.user.is_authenticated:
+            shared(response, self.get_edge_cache_seconds())
+        else:
+            private(response)
+        patch_vary_headers(response, ('Surrogate-Capability',))
+        return response
+
+
+class PrivateFragmentMixin:
+    """Фрагмент с данными пользователя: только для его браузера."""
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        private(response)
+        return response
@@ -0,0 +1,267 @@
+"""
+Новые комментарии в реальном времени через Server-Sent Events.
+
+Поток ``news:comment_stream`` обслуживает ASGI-приложение из
+``yanews/asgi.py``: каждый подписчик — одна корутина с очередью, без
+отдельного потока, поэтому один процесс держит тысячи открытых
+соединений. Под WSGI поток недоступен, и представление отвечает 204:
+браузер по нему перестаёт переподключаться.
+
+Рассылка идёт через брокер из настройки COMMENT_STREAM_BROKER. Брокер
+умеет ``publish(channel, message)`` из любого потока и асинхронный
+контекстный менеджер ``subscribe(channel)``, который отдаёт очередь
+подписчика ``Inbox``. ``LocalBroker`` рассылает сообщения внутри процесса;
+для нескольких процессов его заменяют брокером поверх локального
+сервера сообщений с тем же интерфейсом.
+"""
+import asyncio
+import time
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+from .models import News
+
+HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    # Буферизация nginx задержала бы события до конца ответа.
+    (b'x-accel-buffering', b'no'),
+]
+PING = b': ping\n\n'
+
+
+class Inbox:
+    """
+    Очередь сообщений подписчика.
+
+    Легче ``asyncio.Queue`` в несколько раз: подписчиков тысячи, и почти
+    все простаивают. Методы вызываются только из цикла событий.
+    """
+    __slots__ = ('messages', 'waiter')
+
+    def __init__(self):
+        self.messages = []
+        self.waiter = None
+
+    def __len__(self):
+        return len(self.messages)
+
+    def put(self, message):
+        self.messages.append(message)
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def get(self):
+        while not self.messages:
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+        return self.messages.pop(0)
+
+
+class LocalBroker:
+    """Рассылка внутри процесса: по очереди на подписчика."""
+
+    def __init__(self):
+        self.channels = defaultdict(dict)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        inbox = Inbox()
+        subscribers = self.channels[channel]
+        subscribers[inbox] = asyncio.get_running_loop()
+        try:
+            yield inbox
+        finally:
+            del subscribers[inbox]
+            if not subscribers:
+                self.channels.pop(channel, None)
+
+    def publish(self, channel, message):
+        """Рассылает сообщение; безопасно вызывать из любого потока."""
+        loops = set(self.channels.get(channel, {}).values())
+        # Один вызов на цикл событий, а не на подписчика: их тысячи.
+        for loop in loops:
+            loop.call_soon_threadsafe(self.deliver, loop, channel, message)
+
+    def deliver(self, loop, channel, message):
+        limit = settings.COMMENT_STREAM_QUEUE_SIZE
+        for inbox, owner in list(self.channels.get(channel, {}).items()):
+            # Отстающий подписчик теряет события, а не память сервера.
+            if owner is loop and len(inbox) < limit:
+                inbox.put(message)
+
+    def subscriber_count(self, channel):
+        return len(self.channels.get(channel, ()))
+
+
+class Heartbeat:
+    """
+    Пустые события во все простаивающие потоки цикла событий.
+
+    Один таймер на цикл вместо таймера на каждого подписчика: прокси
+    и браузеры не закрывают соединения, в которых давно ничего нет.
+    """
+    loops = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        self.inboxes = set()
+        self.task = asyncio.ensure_future(self.run())
+
+    @classmethod
+    def add(cls, inbox):
+        loop = asyncio.get_running_loop()
+        if loop not in cls.loops:
+            cls.loops[loop] = cls()
+        cls.loops[loop].inboxes.add(inbox)
+
+    @classmethod
+    def discard(cls, inbox):
+        loop = asyncio.get_running_loop()
+        heartbeat = cls.loops[loop]
+        heartbeat.inboxes.discard(inbox)
+        if not heartbeat.inboxes:
+            heartbeat.task.cancel()
+            del cls.loops[loop]
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(settings.COMMENT_STREAM_HEARTBEAT)
+            for inbox in self.inboxes:
+                if not inbox:
+                    inbox.put(PING)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.COMMENT_STREAM_BROKER)()
+
+
+def channel_name(news_id):
+    return f'news-{news_id}'
+
+
+def sse_event(data, event=None, event_id=None):
+    """Событие в формате text/event-stream."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in data.splitlines() or [''])
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def publish_comment(comment):
+    """Отправляет комментарий подписчикам после фиксации транзакции."""
+    message = sse_event(
+        render_to_string('includes/comment.html', {'comment': comment}),
+        event='comment', event_id=comment.pk,
+    )
+    transaction.on_commit(partial(
+        get_broker().publish, channel_name(comment.news_id), message
+    ))
+
+
+class NewsCheck:
+    """
+    Проверка, что новость существует, общая для волны подписчиков.
+
+    На срочную новость подписываются тысячи читателей сразу: они ждут
+    один запрос к базе, а его результат используется CHECK_SECONDS.
+    Проверки лежат в словаре в порядке запуска, и устаревшие удаляются
+    с его начала при каждой новой, так что словарь не растёт с числом
+    запрошенных id.
+    """
+    CHECK_SECONDS = 60
+    loops = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def forget_expired(cls, checks, now):
+        while checks:
+            news_id, (started, _) = next(iter(checks.items()))
+            if now - started <= cls.CHECK_SECONDS:
+                break
+            del checks[news_id]
+
+    @classmethod
+    async def exists(cls, news_id):
+        checks = cls.loops.setdefault(asyncio.get_running_loop(), {})
+        started, check = checks.get(news_id, (None, None))
+        now = time.monotonic()
+        if check is None or now - started > cls.CHECK_SECONDS:
+            # Устаревшая проверка этой новости удаляется здесь же, и
+            # новая встаёт в конец словаря.
+            cls.forget_expired(checks, now)
+            check = asyncio.ensure_future(sync_to_async(
+                News.objects.filter(pk=news_id).exists
+            )())
+            checks[news_id] = (now, check)
+        return await asyncio.shield(check)
+
+
+async def wait_disconnect(receive, inbox):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    inbox.put(None)
+
+
+async def comment_stream(scope, receive, send, pk):
+    """ASGI-приложение потока комментариев к новости ``pk``."""
+    if not await NewsCheck.exists(pk):
+        await send({'type': 'http.response.start', 'status': 404,
+                    'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'Not Found'})
+        return
+    async with get_broker().subscribe(channel_name(pk)) as inbox:
+        # Подписчик простаивает в inbox.get(): без таймеров и без задач,
+        # кроме ожидания отключения клиента.
+        disconnect = asyncio.ensure_future(wait_disconnect(receive, inbox))
+        Heartbeat.add(inbox)
+        try:
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': HEADERS})
+            body = PING
+            while body is not None:
+                await send({'type': 'http.response.body', 'body': body,
+                            'more_body': True})
+                body = await inbox.get()
+        finally:
+            Heartbeat.discard(inbox)
+            disconnect.cancel()
+
+
+def stream_kwargs(path):
+    """Аргументы потока комментариев, если path — его адрес."""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    if match.view_name == 'news:comment_stream':
+        return match.kwargs
+    return None
+
+
+class CommentStreamRouter:
+    """Поток комментариев обслуживает сам, остальное передаёт Django."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            kwargs = stream_kwargs(scope['path'])
+            if kwargs is not None:
+                return await comment_stream(scope, receive, send, **kwargs)
+        return await self.application(scope, receive, send)
@@ -0,0 +1,208 @@
+"""
+Обслуживание больших таблиц новостей и комментариев.
+
+Задачи читают строки порциями по ключу ``id`` (без OFFSET и без
+сортировки из ``Meta.ordering``) и только нужные столбцы, а строки
+представлены лёгкими объектами со ``__slots__`` вместо экземпляров
+моделей. Запускаются командой ``python manage.py maintain <задача>``.
+Каждая задача — генератор пар (метрика, значение).
+"""
+import sys
+from collections import Counter
+from datetime import timedelta
+from functools import lru_cache
+
+from django.db import transaction
+from django.utils import timezone
+
+from .activity import ROLLUP_NAME, floor_hour, rollup_watermark
+from .forms import BAD_WORDS
+from .models import Comment, CommentActivity, RollupState, render_comment
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+JOBS = {}
+
+
+def job(func):
+    """Регистрирует функцию как задачу обслуживания под её именем."""
+    JOBS[func.__name__] = func
+    return func
+
+
+class Row:
+    """Строка результата: только значения, без словаря атрибутов."""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            f'{name}={getattr(self, name)!r}' for name in self.__slots__
+        ))
+
+
+@lru_cache(maxsize=None)
+def row_type(name, fields):
+    """Класс строки со слотами под перечисленные поля."""
+    return type(name, (Row,), {'__slots__': fields})
+
+
+def iterate_chunks(queryset, fields=(), chunk_size=1000):
+    """
+    Списки строк queryset по возрастанию id.
+
+    Каждая порция — отдельный запрос ``id > последний id`` с LIMIT,
+    поэтому память не растёт с размером таблицы.
+    """
+    fields = ('id', *fields)
+    make_row = row_type(queryset.model.__name__ + 'Row', fields)
+    queryset = queryset.order_by('id').values_list(*fields)
+    last = 0
+    while True:
+        chunk = [
+            make_row(*values)
+            for values in queryset.filter(id__gt=last)[:chunk_size]
+        ]
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1].id
+
+
+def iterate(queryset, fields=(), chunk_size=1000):
+    """Строки queryset по одной, читая их порциями."""
+    for chunk in iterate_chunks(queryset, fields, chunk_size):
+        yield from chunk
+
+
+def read_status(field):
+    """Поле /proc/self/status в КиБ или None, если его нет."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                name, _, value = line.partition(':')
+                if name == field:
+                    return int(value.split()[0])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """
+    Сбрасывает пик резидентной памяти до текущего объёма (Linux).
+
+    Возвращает False, если сбросить нельзя: тогда peak_rss — пик
+    за всё время жизни процесса.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        return False
+    return read_status('VmHWM') is not None
+
+
+def peak_rss():
+    """Пиковый объём резидентной памяти процесса в КиБ."""
+    peak = read_status('VmHWM')
+    if peak is not None or resource is None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # На macOS ru_maxrss в байтах, на Linux — в килобайтах.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+@job
+def revalidate(chunk_size=1000, delete=False, **options):
+    """Ищет комментарии с запрещёнными словами; при delete удаляет их."""
+    checked = violations = 0
+    for chunk in iterate_chunks(Comment.objects, ('text',), chunk_size):
+        checked += len(chunk)
+        bad = [
+            row.id for row in chunk
+            if any(word in row.text.lower() for word in BAD_WORDS)
+        ]
+        violations += len(bad)
+        if bad and delete:
+            Comment.objects.filter(id__in=bad).delete()
+    yield 'checked', checked
+    yield 'deleted' if delete else 'violations', violations
+
+
+@job
+def render_html(chunk_size=1000, **options):
+    """Заполняет готовый HTML у комментариев, где он устарел или пуст."""
+    updated = 0
+    for chunk in iterate_chunks(
+            Comment.objects, ('text', 'text_html'), chunk_size
+    ):
+        changed = []
+        for row in chunk:
+            html = render_comment(row.text)
+            if html != row.text_html:
+                changed.append(Comment(id=row.id, text_html=html))
+        Comment.objects.bulk_update(changed, ['text_html'])
+        updated += len(changed)
+    yield 'updated', updated
+
+
+@job
+def purge(chunk_size=1000, days=None, **options):
+    """Удаляет комментарии старше days дней порциями по chunk_size."""
+    if days is None:
+        raise ValueError('Для purge нужно указать возраст в днях.')
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    for chunk in iterate_chunks(
+            Comment.objects.filter(created__lt=cutoff), chunk_size=chunk_size
+    ):
+        deleted += Comment.objects.filter(
+            id__in=[row.id for row in chunk]
+        ).delete()[0]
+    yield 'deleted', deleted
+
+
+@job
+def recount(chunk_size=1000, **options):
+    """
+    Пересчитывает часовую сводку комментариев.
+
+    Часы считаются в Python по потоку (news_id, created): в памяти
+    остаются только счётчики, а не комментарии.
+    """
+    now = timezone.now()
+    # Отметка и учтённые id — как у refresh_activity: комментарий,
+    # зафиксированный после пересчёта, учтёт следующее обновление.
+    watermark = rollup_watermark(now)
+    counts = Counter()
+    counted = []
+    for row in iterate(
+            Comment.objects.filter(created__lte=now),
+            ('news_id', 'created'),
+            chunk_size,
+    ):
+        counts[row.news_id, floor_hour(row.created)] += 1
+        if row.created > watermark:
+            counted.append(row.id)
+    with transaction.atomic():
+        CommentActivity.objects.all().delete()
+        CommentActivity.objects.bulk_create(
+            (
+                CommentActivity(news_id=news_id, hour=hour, count=count)
+                for (news_id, hour), count in counts.items()
+            ),
+            batch_size=chunk_size,
+        )
+        RollupState.objects.update_or_create(
+            name=ROLLUP_NAME,
+            defaults={'watermark': watermark, 'counted': counted},
+        )
+    yield 'comments', sum(counts.values())
+    yield 'hourly rows', len(counts)
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.archive import archive_news
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые новости с комментариями в архив.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.NEWS_ARCHIVE_AFTER_DAYS,
+            help='Возраст новостей в днях, после которого они архивируются.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=100,
+            help='Сколько новостей переносить одной транзакцией.',
+        )
+
+    def handle(self, *args, days, chunk_size, **options):
+        news, comments = archive_news(days, chunk_size)
+        self.stdout.write(
+            f'В архив перенесено новостей: {news}, комментариев: {comments}.'
+        )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.maintenance import JOBS, peak_rss, reset_peak_rss
+
+
+class Command(BaseCommand):
+    help = 'Запускает задачи обслуживания комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='+',
+            help='Имена задач: ' + ', '.join(JOBS),
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько строк читать одним запросом.',
+        )
+        parser.add_argument(
+            '--days', type=int,
+            help='Возраст комментариев для purge.',
+        )
+        parser.add_argument(
+            '--delete', action='store_true',
+            help='Для revalidate: удалить найденные комментарии.',
+        )
+
+    def handle(self, *args, names, **options):
+        unknown = set(names) - set(JOBS)
+        if unknown:
+            raise CommandError(
+                'Неизвестные задачи: ' + ', '.join(sorted(unknown))
+            )
+        for name in names:
+            # Без сброса пик памяти — за всю жизнь процесса, а не задачи.
+            period = 'during job' if reset_peak_rss() else 'since start'
+            started = time.perf_counter()
+            try:
+                for metric, value in JOBS[name](**options):
+                    self.stdout.write(f'{name}: {metric}: {value}')
+            except ValueError as error:
+                raise CommandError(error)
+            self.stdout.write('{}: time: {:.2f} s'.format(
+                name, time.perf_counter() - started
+            ))
+            peak = peak_rss()
+            if peak is not None:
+                self.stdout.write('{}: peak RSS {}: {:.1f} MiB'.format(
+                    name, period, peak / 1024
+                ))
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from yacommon.routers import replicate
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite во все реплики.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=float, default=0,
+            help='Повторять копирование каждые N секунд.',
+        )
+
+    def handle(self, *args, every, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError(
+                'Реплики не настроены: задайте DATABASE_REPLICAS.'
+            )
+        while True:
+            replicate()
+            self.stdout.write(
+                'Реплики обновлены: ' + ', '.join(settings.REPLICA_DATABASES)
+            )
+            if not every:
+                return
+            time.sleep(every)
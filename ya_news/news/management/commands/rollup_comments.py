@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.activity import rebuild_activity, refresh_activity
+
+
+class Command(BaseCommand):
+    help = 'Обновляет часовую сводку комментариев по новостям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=float, default=0,
+            help='Повторять обновление каждые N секунд.',
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать сводку с нуля, учитывая удалённые комментарии.',
+        )
+
+    def handle(self, *args, every, rebuild, **options):
+        if rebuild:
+            self.stdout.write(
+                f'Сводка пересчитана: {rebuild_activity()} комментариев.'
+            )
+        while True:
+            self.stdout.write(
+                f'Учтено новых комментариев: {refresh_activity()}.'
+            )
+            if not every:
+                return
+            time.sleep(every)
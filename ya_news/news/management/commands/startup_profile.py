@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from yacommon.startup import cold_start, fork_start, import_profile, preload
+from yanews.wsgi import application
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает время импорта по приложениям и время запуска рабочего '
+        'процесса: с нуля и через fork после предварительной загрузки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=15,
+            help='Сколько самых долгих приложений и пакетов показать.',
+        )
+        parser.add_argument(
+            '--runs', type=int, default=3,
+            help='Сколько раз замерять запуск; берётся медиана.',
+        )
+
+    def handle(self, *args, top, runs, **options):
+        package = settings.SETTINGS_MODULE.rpartition('.')[0]
+        groups = import_profile(f'{package}.wsgi')
+        for name, self_time in groups.most_common(top):
+            self.stdout.write(f'import {name}: {self_time / 1000:.1f} ms')
+        self.stdout.write(
+            f'import total: {sum(groups.values()) / 1000:.1f} ms'
+        )
+        path = str(settings.LOGIN_URL)
+        self.stdout.write('cold start to first response: {:.0f} ms'.format(
+            cold_start(path, runs) * 1000
+        ))
+        preload()
+        self.stdout.write(
+            'prefork worker to first response: {:.0f} ms'.format(
+                fork_start(application, path, runs) * 1000
+            )
+        )
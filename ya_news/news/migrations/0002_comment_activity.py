@@ -0,0 +1,43 @@
+# Generated by Django 3.2.15 on 2026-10-19 08:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('watermark', models.DateTimeField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='CommentActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='news.news')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='commentactivity',
+            index=models.Index(fields=['hour', 'news'], name='news_commen_hour_f1649f_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='commentactivity',
+            constraint=models.UniqueConstraint(fields=('news', 'hour'), name='unique_news_hour'),
+        ),
+    ]
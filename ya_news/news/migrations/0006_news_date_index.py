@@ -0,0 +1,21 @@
+# Generated by Django 3.2.15 on 2026-10-19 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivednews',
+            index=models.Index(fields=['date', 'id'], name='news_archiv_date_45d3a9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['date', 'id'], name='news_news_date_ba5a42_idx'),
+        ),
+    ]
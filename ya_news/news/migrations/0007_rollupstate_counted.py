@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-19 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rollupstate',
+            name='counted',
+            field=models.JSONField(default=list),
+        ),
+    ]
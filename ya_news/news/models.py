@@ -1,7 +1,39 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat, LPad
+from django.template.defaultfilters import linebreaksbr
+
+
+class NewsQuerySet(models.QuerySet):
+    """Общие запросы рабочей таблицы новостей и архива."""
+
+    def newest_first(self):
+        """От новых к старым: индекс (date, id) отдаёт их без сортировки."""
+        return self.order_by('-date', '-id')
+
+    def period(self, start=None, end=None):
+        """Новости с датой в [start, end); без границы — без условия."""
+        queryset = self
+        if start is not None:
+            queryset = queryset.filter(date__gte=start)
+        if end is not None:
+            queryset = queryset.filter(date__lt=end)
+        return queryset
+
+    def before(self, date, pk):
+        """
+        Новости после ключа (date, pk) в порядке newest_first.
+
+        Условие на date отдельно от OR: по нему база начинает чтение
+        индекса сразу с нужного места.
+        """
+        return self.filter(
+            models.Q(date__lte=date)
+            & (models.Q(date__lt=date) | models.Q(id__lt=pk))
+        )
 
 
 class News(models.Model):
@@ -9,8 +41,11 @@ class News(models.Model):
     text = models.TextField()
     date = models.DateField(default=datetime.today)
 
+    objects = NewsQuerySet.as_manager()
+
     class Meta:
         ordering = ('-date',)
+        indexes = (models.Index(fields=('date', 'id')),)
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -18,6 +53,70 @@ class News(models.Model):
         return self.title
 
 
+# Путь комментария — id всех его предков и его собственный, по
+# PATH_SEGMENT цифр с ведущими нулями. Сортировка по пути выдаёт ветки
+# обсуждения целиком: ответы идут сразу после своего комментария.
+PATH_SEGMENT = 10
+PATH_LENGTH = 250
+# Символ больше любой цифры: все пути ветки лежат в [path, path + '~').
+PATH_END = '~'
+
+
+def path_segment(pk):
+    return str(pk).zfill(PATH_SEGMENT)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def in_order(self):
+        """Ветки целиком: индекс (news, path) отдаёт их без сортировки."""
+        return self.order_by('news_id', 'path')
+
+    def thread(self, path):
+        """Комментарий с путём path и все ответы на него."""
+        return self.filter(path__gte=path, path__lt=path + PATH_END)
+
+    def page(self, after=None, size=None):
+        """
+        Страница по порядку веток после пути after.
+
+        Курсор — путь последнего показанного комментария, поэтому
+        страницы глубоких веток читаются так же, как и плоских.
+        """
+        queryset = self.in_order()
+        if after:
+            queryset = queryset.filter(path__gt=after)
+        size = size or settings.COMMENTS_PAGE_SIZE
+        comments = list(queryset[:size + 1])
+        return comments[:size], len(comments) > size
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self.model._default_manager.filter(path='').fill_paths()
+        return objs
+
+    def fill_paths(self):
+        """
+        Проставляет пути комментариям без пути, например после
+        bulk_create: SQLite не возвращает из него id.
+        """
+        segment = LPad(
+            Cast('id', models.CharField()), PATH_SEGMENT, Value('0')
+        )
+        self.filter(parent=None).update(path=segment)
+        parent_path = Subquery(
+            self.model._default_manager.filter(
+                pk=OuterRef('parent_id')
+            ).values('path')[:1]
+        )
+        # За один проход — уровень вложенности, у которого уже есть
+        # пути родителей.
+        while self.filter(path='').exclude(parent__path='').update(
+            path=Concat(parent_path, segment)
+        ):
+            pass
+
+
 class Comment(models.Model):
     news = models.ForeignKey(
         News,
@@ -28,10 +127,134 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    text_html = models.TextField(blank=True, editable=False)
+    # Без ограничения в базе: ответы, в том числе других пользователей,
+    # переживают удаление родительского комментария и остаются в его
+    # ветке по своему пути.
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.DO_NOTHING,
+        null=True,
+        blank=True,
+        related_name='replies',
+        db_constraint=False,
+    )
+    path = models.CharField(
+        max_length=PATH_LENGTH, blank=True, editable=False
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('created',)
+        indexes = (models.Index(fields=('news', 'path')),)
+
+    def __str__(self):
+        return self.text[:50]
+
+    @property
+    def depth(self):
+        """Уровень вложенности: 0 у комментария к самой новости."""
+        return max(len(self.path) // PATH_SEGMENT - 1, 0)
+
+    def reply_to(self, parent):
+        """
+        Делает комментарий ответом на parent.
+
+        Ответ на самый глубокий уровень становится соседом parent:
+        путь ограничен PATH_LENGTH.
+        """
+        self.news_id = parent.news_id
+        if len(parent.path) + PATH_SEGMENT > PATH_LENGTH:
+            self.parent_id = int(parent.path[-2 * PATH_SEGMENT:-PATH_SEGMENT])
+            self._parent_path = parent.path[:-PATH_SEGMENT]
+        else:
+            self.parent = parent
+            self._parent_path = parent.path
+
+    def save(self, *args, **kwargs):
+        """Заранее готовим HTML текста, чтобы не делать это при показе."""
+        self.text_html = render_comment(self.text)
+        if self.pk is not None or self.path:
+            return super().save(*args, **kwargs)
+        # Путь содержит собственный id: он известен только после INSERT.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            parent_path = getattr(self, '_parent_path', None)
+            if parent_path is None and self.parent_id:
+                parent_path = self.parent.path
+            self.path = (parent_path or '') + path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+
+def render_comment(text):
+    """HTML комментария: экранированный текст с переносами строк."""
+    return str(linebreaksbr(text, autoescape=True))
+
+
+class CommentActivity(models.Model):
+    """Число комментариев к новости за один час."""
+    news = models.ForeignKey(
+        News,
+        on_delete=models.CASCADE,
+        related_name='activity',
+    )
+    hour = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('news', 'hour'), name='unique_news_hour'
+            ),
+        )
+        indexes = (models.Index(fields=('hour', 'news')),)
+
+
+class RollupState(models.Model):
+    """Отметка: до какого момента комментарии уже учтены в сводке."""
+    name = models.CharField(max_length=50, primary_key=True)
+    watermark = models.DateTimeField()
+    # id комментариев позже отметки, уже учтённых в сводке.
+    counted = models.JSONField(default=list)
+
+
+class ArchivedNews(models.Model):
+    """Новость из архива: снимок страницы, доступный только для чтения."""
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=50)
+    date = models.DateField()
+    html = models.TextField()
+    archived = models.DateTimeField(auto_now_add=True)
+
+    objects = NewsQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-date',)
+        indexes = (models.Index(fields=('date', 'id')),)
+        verbose_name_plural = 'Архив новостей'
+        verbose_name = 'Архивная новость'
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    """Комментарий к архивной новости."""
+    id = models.BigIntegerField(primary_key=True)
+    news = models.ForeignKey(
+        ArchivedNews,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    text = models.TextField()
+    created = models.DateTimeField()
 
     def __str__(self):
         return self.text[:50]
@@ -0,0 +1,149 @@
+"""
+Архив новостей по датам: год, месяц, день и все более старые новости.
+
+Страницы листаются по ключу (date, id) последней показанной новости:
+запрос читает индекс (date, id) с этого места и берёт size + 1 строк,
+без OFFSET, поэтому далёкая страница стоит столько же, сколько первая.
+Новости старше ``NEWS_ARCHIVE_AFTER_DAYS`` дней лежат в ``ArchivedNews``
+с прежними id, поэтому страница читается из обеих таблиц и сливается.
+
+Страница, все новости которой датированы раньше сегодняшнего дня,
+больше не меняется и хранится в кеше ``NEWS_CACHE``. Ключ записи
+содержит версию архива: её меняют правка и удаление новости и новость,
+добавленная задним числом. Новость за сегодня закрытых страниц
+не касается и версию не меняет. Версия, как и страницы, живёт
+``NEWS_ARCHIVE_CACHE_TIMEOUT`` секунд: вечных записей в кеше нет.
+"""
+from datetime import date, datetime, timedelta
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .cache import new_version, news_cache
+from .models import ArchivedNews, News
+
+PAGE_FIELDS = ('id', 'title', 'date')
+VERSION_KEY = 'news-archive-version'
+
+
+def period_bounds(year, month=None, day=None):
+    """
+    Начало и конец (не включая) периода; ValueError или OverflowError —
+    нет такой даты.
+    """
+    if day is not None:
+        start = date(year, month, day)
+        return start, start + timedelta(days=1)
+    if month is not None:
+        start = date(year, month, 1)
+        return start, (start + timedelta(days=31)).replace(day=1)
+    start = date(year, 1, 1)
+    return start, start.replace(year=year + 1)
+
+
+def parse_cursor(cursor):
+    """Ключ (date, id) из строки ``2024-05-01.17``; ValueError — не ключ."""
+    day, _, pk = cursor.partition('.')
+    pk = int(pk)
+    # Больше 2**63 - 1 база не примет.
+    if not 0 <= pk < 2 ** 63:
+        raise ValueError(cursor)
+    return date.fromisoformat(day), pk
+
+
+def format_cursor(key):
+    day, pk = key
+    return f'{day.isoformat()}.{pk}'
+
+
+def is_closed(end=None, before=None):
+    """Все новости страницы датированы раньше сегодняшнего дня."""
+    today = timezone.localdate()
+    return (
+        (end is not None and end <= today)
+        or (before is not None and before[0] < today)
+    )
+
+
+def archive_version():
+    cache = news_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(
+            VERSION_KEY, new_version(), settings.NEWS_ARCHIVE_CACHE_TIMEOUT
+        )
+        version = cache.get(VERSION_KEY) or new_version()
+    return version
+
+
+def page_key(start, end, before, size):
+    parts = (
+        start or '', end or '', format_cursor(before) if before else '', size
+    )
+    return f'news-archive:{archive_version()}:' + ':'.join(map(str, parts))
+
+
+def read_page(start, end, before, size, using=None):
+    """Первые size + 1 новостей периода после ключа из обеих таблиц."""
+    rows = []
+    for model in (News, ArchivedNews):
+        queryset = model.objects.using(using).period(start, end)
+        if before is not None:
+            queryset = queryset.before(*before)
+        rows += queryset.newest_first().values(*PAGE_FIELDS)[:size + 1]
+    rows.sort(key=itemgetter('date', 'id'), reverse=True)
+    return rows[:size + 1]
+
+
+def news_page(start=None, end=None, before=None, size=None):
+    """
+    Новости периода [start, end) после ключа before от новых к старым
+    и ключ следующей страницы или None.
+    """
+    size = size or settings.NEWS_ARCHIVE_PAGE_SIZE
+    closed = is_closed(end, before)
+    if closed:
+        key = page_key(start, end, before, size)
+        page = news_cache().get(key)
+        if page is not None:
+            return page
+    # Закрытая страница ляжет в кеш надолго: отстающая реплика
+    # положила бы туда устаревшие строки.
+    rows = read_page(
+        start, end, before, size, using='default' if closed else None
+    )
+    next_key = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_key = (rows[-1]['date'], rows[-1]['id'])
+    page = rows, next_key
+    if closed:
+        news_cache().set(key, page, settings.NEWS_ARCHIVE_CACHE_TIMEOUT)
+    return page
+
+
+def forget_archive():
+    """Меняет версию архива: закрытые страницы собираются заново."""
+    news_cache().set(
+        VERSION_KEY, new_version(), settings.NEWS_ARCHIVE_CACHE_TIMEOUT
+    )
+
+
+def archive_changed(sender, instance, using, created=False, **kwargs):
+    day = instance.date
+    if isinstance(day, datetime):
+        day = day.date()
+    if created and day >= timezone.localdate():
+        return
+    forget_archive()
+    # Пока транзакция не зафиксирована, другой процесс может положить
+    # в кеш прежнюю страницу под новой версией.
+    transaction.on_commit(forget_archive, using=using)
+
+
+def connect_signals():
+    post_save.connect(archive_changed, sender=News, dispatch_uid='archive')
+    post_delete.connect(archive_changed, sender=News, dispatch_uid='archive')
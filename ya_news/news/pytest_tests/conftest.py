@@ -4,6 +4,7 @@ from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import caches
 from django.test import Client
 from django.urls import reverse
 from django.utils import timezone
@@ -11,6 +12,21 @@ from django.utils import timezone
 from news.models import Comment, News
 
 
+@pytest.fixture(autouse=True)
+def clear_throttle_cache():
+    """Сбрасывает корзины ограничения частоты запросов между тестами."""
+    caches[settings.THROTTLE_CACHE].clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_news_cache():
+    """
+    Сбрасывает кеш новостей: после отката транзакции теста id
+    новостей используются заново.
+    """
+    caches[settings.NEWS_CACHE].clear()
+
+
 @pytest.fixture
 def home_url():
     """Фикстура, возвращающая URL главной страницы."""
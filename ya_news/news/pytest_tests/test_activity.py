@@ -0,0 +1,130 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from news.activity import most_discussed, rebuild_activity, refresh_activity
+from news.models import Comment, CommentActivity, News
+
+pytestmark = pytest.mark.django_db
+
+
+def add_comments(news, author, count, created):
+    """Создает комментарии к новости с заданным временем создания."""
+    last = Comment.objects.aggregate(last=Max('id'))['last'] or 0
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Текст')
+        for _ in range(count)
+    )
+    # auto_now_add ставит текущее время, поэтому дату задаём отдельно.
+    Comment.objects.filter(id__gt=last).update(created=created)
+
+
+@pytest.fixture
+def now():
+    return timezone.now()
+
+
+@pytest.fixture
+def other_news():
+    return News.objects.create(title='Другая новость', text='Текст')
+
+
+def test_refresh_groups_comments_by_hour(author, news, now):
+    """Проверяет, что комментарии раскладываются по часам."""
+    add_comments(news, author, 3, now - timedelta(hours=2))
+    add_comments(news, author, 2, now - timedelta(minutes=1))
+
+    assert refresh_activity(now) == 5
+    assert sorted(
+        CommentActivity.objects.values_list('count', flat=True)
+    ) == [2, 3]
+
+
+def test_refresh_is_incremental(author, news, now):
+    """
+    Проверяет, что повторное обновление учитывает только
+    комментарии после отметки и не считает старые дважды.
+    """
+    add_comments(news, author, 2, now - timedelta(minutes=2))
+    refresh_activity(now)
+    assert refresh_activity(now) == 0
+    add_comments(news, author, 1, now + timedelta(seconds=1))
+
+    assert refresh_activity(now + timedelta(seconds=2)) == 1
+    assert refresh_activity(now + timedelta(seconds=2)) == 0
+    assert CommentActivity.objects.aggregate(
+        total=Sum('count')
+    )['total'] == 3
+
+
+def test_late_commit_is_counted_once(author, news, now):
+    """
+    Проверяет, что комментарий, ставший виден позже более новых,
+    попадает в сводку, а уже учтённые не считаются дважды.
+    """
+    add_comments(news, author, 1, now - timedelta(seconds=5))
+    assert refresh_activity(now) == 1
+    add_comments(news, author, 1, now - timedelta(seconds=20))
+
+    assert refresh_activity(now + timedelta(seconds=10)) == 1
+    assert refresh_activity(now + timedelta(minutes=5)) == 0
+    assert CommentActivity.objects.aggregate(
+        total=Sum('count')
+    )['total'] == 2
+
+
+def test_future_comments_wait_for_their_time(author, news, now):
+    """Проверяет, что комментарии «из будущего» не сдвигают отметку."""
+    add_comments(news, author, 1, now + timedelta(hours=1))
+
+    assert refresh_activity(now) == 0
+    assert refresh_activity(now + timedelta(hours=2)) == 1
+
+
+def test_most_discussed_ranks_by_window(author, news, other_news, now):
+    """
+    Проверяет порядок новостей и то, что старые
+    комментарии не попадают в окно.
+    """
+    add_comments(news, author, 5, now - timedelta(days=3))
+    add_comments(news, author, 1, now - timedelta(minutes=5))
+    add_comments(other_news, author, 2, now - timedelta(minutes=5))
+    refresh_activity(now)
+
+    today = most_discussed(now - timedelta(hours=1))
+    week = most_discussed(now - timedelta(days=7))
+
+    assert [(item, item.comment_total) for item in today] == [
+        (other_news, 2), (news, 1)
+    ]
+    assert [(item, item.comment_total) for item in week] == [
+        (news, 6), (other_news, 2)
+    ]
+    assert most_discussed(now - timedelta(days=7), limit=1) == [news]
+
+
+def test_rebuild_drops_deleted_comments(author, news, now):
+    """Проверяет, что полный пересчёт учитывает удалённые комментарии."""
+    add_comments(news, author, 3, now - timedelta(minutes=1))
+    refresh_activity(now)
+    Comment.objects.filter(pk=Comment.objects.first().pk).delete()
+
+    rebuild_activity(now)
+
+    assert CommentActivity.objects.get().count == 2
+
+
+def test_home_shows_most_discussed(client, author, news, home_url):
+    """Проверяет блок самых обсуждаемых новостей на главной."""
+    add_comments(news, author, 2, timezone.now() - timedelta(minutes=1))
+    call_command('rollup_comments', stdout=StringIO())
+
+    most = client.get(home_url).context['most_discussed']
+
+    assert most['today'] == most['week'] == [news]
+    assert most['week'][0].comment_total == 2
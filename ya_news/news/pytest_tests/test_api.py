@@ -0,0 +1,188 @@
+import base64
+import json
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from news.forms import BAD_WORDS
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def news_api_url():
+    return reverse('news:api_news_list')
+
+
+@pytest.fixture
+def comments_api_url(news):
+    return reverse('news:api_news_comments', args=(news.id,))
+
+
+@pytest.fixture
+def comment_api_url(comment):
+    return reverse('news:api_comment', args=(comment.id,))
+
+
+def test_news_list_with_selected_fields(client, news, news_api_url):
+    """Проверяет, что в ответе только запрошенные поля."""
+    response = client.get(news_api_url, {'fields': 'id,title'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['results'] == [
+        {'id': news.id, 'title': news.title}
+    ]
+
+
+def test_unknown_field_is_rejected(client, news_api_url):
+    """Проверяет ответ 400 на запрос неизвестного поля."""
+    assert client.get(
+        news_api_url, {'fields': 'password'}
+    ).status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_news_cursor_pagination(client, news_list, news_api_url):
+    """
+    Проверяет, что курсор проходит все новости по порядку
+    без пропусков и повторов.
+    """
+    ids = []
+    params = {'limit': 4, 'fields': 'id'}
+    while True:
+        page = client.get(news_api_url, params).json()
+        ids += [row['id'] for row in page['results']]
+        if page['next'] is None:
+            break
+        params['cursor'] = page['next']
+
+    assert len(ids) == len(set(ids))
+    assert ids == [
+        row['id'] for row in client.get(
+            news_api_url, {'limit': 100, 'fields': 'id'}
+        ).json()['results']
+    ]
+
+
+def encode(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize('params', (
+    {'limit': 0},
+    {'limit': -1},
+    {'cursor': 'не курсор'},
+    {'cursor': encode(1)},
+    {'cursor': encode([1])},
+    {'cursor': encode(['x'])},
+    {'cursor': encode(['2020-01-01', 1])},
+    {'cursor': encode(['2020-13-01', '1'])},
+    {'cursor': encode(['2020-01-01', 'x'])},
+    {'cursor': encode(['2020-01-01', '99999999999999999999'])},
+))
+def test_bad_page_params_are_rejected(client, news, news_api_url, params):
+    """Проверяет ответ 400 на некорректные limit и курсор."""
+    response = client.get(news_api_url, params)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'detail' in response.json()
+
+
+def test_anonymous_user_cant_create_comment(client, comments_api_url):
+    """Проверяет, что аноним получает 401 и комментарий не создаётся."""
+    response = client.post(
+        comments_api_url, {'text': 'Текст'}, content_type='application/json'
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert Comment.objects.count() == 0
+
+
+def test_csrf_failure_is_json(author, comments_api_url, detail_url):
+    """
+    Проверяет, что запись без токена CSRF получает 403 в JSON,
+    а с токеном из куки ответа API проходит.
+    """
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(author)
+    data = {'text': 'Текст'}
+
+    response = client.post(
+        comments_api_url, data, content_type='application/json'
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert 'CSRF' in response.json()['detail']
+    assert client.post(detail_url, data)['Content-Type'].startswith(
+        'text/html'
+    )
+
+    token = client.get(comments_api_url).cookies['csrftoken'].value
+    response = client.post(
+        comments_api_url, data, content_type='application/json',
+        HTTP_X_CSRFTOKEN=token,
+    )
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def test_user_can_create_comment(author_client, author, comments_api_url):
+    """Проверяет создание комментария через API."""
+    response = author_client.post(
+        comments_api_url, {'text': 'Текст'}, content_type='application/json'
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['author_name'] == author.username
+    assert Comment.objects.get().text == 'Текст'
+
+
+def test_bad_words_are_rejected(author_client, comments_api_url):
+    """Проверяет, что API применяет ту же модерацию, что и форма."""
+    response = author_client.post(
+        comments_api_url,
+        {'text': f'Вы {BAD_WORDS[0]}'},
+        content_type='application/json'
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'text' in response.json()['detail']
+
+
+def test_comments_list_is_public(client, comment, comments_api_url):
+    """Проверяет, что комментарии к новости читаются без авторизации."""
+    assert [
+        row['id'] for row in client.get(comments_api_url).json()['results']
+    ] == [comment.id]
+
+
+def test_author_can_edit_and_delete_comment(
+        author_client,
+        comment,
+        comment_api_url
+):
+    """Проверяет изменение и удаление своего комментария."""
+    response = author_client.patch(
+        comment_api_url, {'text': 'Новый'}, content_type='application/json'
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['text'] == 'Новый'
+
+    assert author_client.delete(
+        comment_api_url
+    ).status_code == HTTPStatus.NO_CONTENT
+    assert not Comment.objects.exists()
+
+
+def test_user_cant_touch_comment_of_another_user(
+        admin_client,
+        comment,
+        comment_api_url
+):
+    """Проверяет, что чужой комментарий для API не существует."""
+    for method in (admin_client.get, admin_client.patch, admin_client.delete):
+        assert method(
+            comment_api_url, content_type='application/json'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+    assert Comment.objects.get().text == comment.text
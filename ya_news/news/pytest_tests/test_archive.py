@@ -0,0 +1,64 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from news.archive import archive_news
+from news.models import ArchivedComment, ArchivedNews, Comment, News
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def old_news(author):
+    news = News.objects.create(
+        title='Старая новость',
+        text='Давний текст',
+        date=timezone.localdate() - timedelta(days=400),
+    )
+    Comment.objects.create(news=news, author=author, text='Старый\nотзыв')
+    return news
+
+
+def test_old_news_moves_to_archive(old_news, comment):
+    """
+    Проверяет, что старая новость с комментариями уходит
+    в архив, а свежая остаётся в рабочих таблицах.
+    """
+    assert archive_news(days=365) == (1, 1)
+
+    assert list(News.objects.all()) == [comment.news]
+    assert list(Comment.objects.all()) == [comment]
+    archived = ArchivedNews.objects.get()
+    assert (archived.pk, archived.title) == (old_news.pk, old_news.title)
+    assert ArchivedComment.objects.get().text == 'Старый\nотзыв'
+
+
+def test_archived_news_served_from_snapshot(client, old_news, author_client):
+    """
+    Проверяет, что архивная новость открывается по тому же
+    адресу из снимка, а комментировать её нельзя.
+    """
+    url = reverse('news:detail', args=(old_news.pk,))
+    archive_news(days=365)
+
+    response = client.get(url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'Давний текст' in response.content.decode()
+    assert 'Старый<br>отзыв' in response.content.decode()
+    assert author_client.post(url, {'text': 'Поздно'}).status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+def test_command_uses_days(old_news):
+    """Проверяет, что команда не трогает новости моложе порога."""
+    call_command('archive_news', days=500, stdout=StringIO())
+
+    assert not ArchivedNews.objects.exists()
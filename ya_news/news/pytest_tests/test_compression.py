@@ -0,0 +1,112 @@
+import gzip
+
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from news.models import Comment
+from yacommon.middleware import (
+    UNRESOLVED, CompressionMiddleware, compression_stats, minify_html,
+    reset_compression_stats
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def many_comments(author, news):
+    """Создаёт достаточно комментариев для крупной страницы."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Строка {index}\nещё одна')
+        for index in range(50)
+    )
+
+
+def test_detail_page_is_gzipped(client, many_comments, news, detail_url):
+    """
+    Проверяет, что крупная страница сжимается,
+    если клиент принимает gzip.
+    """
+    reset_compression_stats()
+    response = client.get(detail_url, HTTP_ACCEPT_ENCODING='gzip')
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert news.title in gzip.decompress(response.content).decode()
+    assert compression_stats()['news:detail']['ratio'] > 1
+
+
+def test_page_is_not_compressed_without_accept_encoding(
+        client,
+        many_comments,
+        detail_url
+):
+    """Проверяет, что без Accept-Encoding ответ не сжимается."""
+    assert not client.get(detail_url).has_header('Content-Encoding')
+
+
+def test_small_response_is_not_compressed(settings, client, detail_url):
+    """Проверяет, что ответ короче порога отдаётся несжатым."""
+    settings.COMPRESSION_MIN_SIZE = 10 ** 6
+
+    response = client.get(detail_url, HTTP_ACCEPT_ENCODING='gzip')
+
+    assert not response.has_header('Content-Encoding')
+
+
+def test_minify_keeps_preformatted_text():
+    """
+    Проверяет, что минификация убирает отступы,
+    но не трогает содержимое textarea.
+    """
+    html = '<div>\n    <p>Текст</p>\n\n  </div>\n<textarea>\n  a\n</textarea>'
+
+    assert minify_html(html) == (
+        '<div>\n<p>Текст</p>\n</div>\n<textarea>\n  a\n</textarea>'
+    )
+
+
+def test_streaming_response_is_compressed():
+    """Проверяет сжатие потокового ответа по частям."""
+    chunks = [b'event: comment\n\n' * 100 for _ in range(3)]
+    middleware = CompressionMiddleware(
+        lambda request: StreamingHttpResponse(
+            iter(chunks), content_type='text/event-stream'
+        )
+    )
+
+    response = middleware(
+        RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+    )
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(
+        b''.join(response.streaming_content)
+    ) == b''.join(chunks)
+
+
+def test_unresolved_paths_share_one_stats_entry():
+    """Проверяет, что адреса без маршрута не раздувают статистику."""
+    middleware = CompressionMiddleware(
+        lambda request: HttpResponse('<p>Нет</p>' * 500)
+    )
+    reset_compression_stats()
+
+    for path in ('/wp-login.php', '/.env'):
+        middleware(RequestFactory().get(path, HTTP_ACCEPT_ENCODING='gzip'))
+
+    assert list(compression_stats()) == [UNRESOLVED]
+    assert compression_stats()[UNRESOLVED]['responses'] == 2
+
+
+def test_binary_response_is_not_compressed():
+    """Проверяет, что несжимаемые типы содержимого не трогаются."""
+    middleware = CompressionMiddleware(
+        lambda request: HttpResponse(b'0' * 4096, content_type='image/png')
+    )
+
+    response = middleware(
+        RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+    )
+
+    assert not response.has_header('Content-Encoding')
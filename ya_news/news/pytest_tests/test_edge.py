@@ -0,0 +1,160 @@
+import io
+import sys
+from unittest import mock
+
+import pytest
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.urls import reverse
+
+from news.views import CommentFormFragment
+from yanews.edge import EdgeCache, cache_lifetime
+
+pytestmark = pytest.mark.django_db
+
+ESI = {'HTTP_SURROGATE_CAPABILITY': 'edge="ESI/1.0"'}
+
+
+@pytest.fixture
+def edge():
+    """
+    Кеш перед WSGI-приложением проекта.
+
+    Как и тестовый клиент Django, не закрывает соединение с базой
+    после запроса: иначе откатится транзакция теста.
+    """
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    yield EdgeCache(WSGIHandler())
+    request_started.connect(close_old_connections)
+    request_finished.connect(close_old_connections)
+
+
+def get(application, path, client=None):
+    """GET-запрос к WSGI-приложению: статус, заголовки и текст ответа."""
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    if client is not None:
+        environ['HTTP_COOKIE'] = client.cookies.output(
+            attrs=[], header='', sep=';'
+        ).strip()
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = int(status.split()[0])
+        response['headers'] = dict(headers)
+
+    body = b''.join(application(environ, start_response)).decode()
+    return response['status'], response['headers'], body
+
+
+@pytest.mark.parametrize(
+    'url',
+    (pytest.lazy_fixture('home_url'), pytest.lazy_fixture('detail_url')),
+)
+def test_anonymous_pages_are_shared(client, url):
+    """Проверяет, что страницы для анонима можно хранить в общем кеше."""
+    response = client.get(url)
+
+    assert cache_lifetime({
+        'cache-control': response['Cache-Control']
+    }) > 0
+    assert 'Cookie' in response['Vary']
+
+
+def test_user_page_without_edge_is_private(author_client, detail_url):
+    """Проверяет, что страница с данными пользователя не кешируется."""
+    response = author_client.get(detail_url)
+
+    assert 'private' in response['Cache-Control']
+    assert 'testuser' in response.content.decode()
+    assert 'id="id_text"' in response.content.decode()
+
+
+def test_esi_page_has_no_user_data(author_client, detail_url):
+    """
+    Проверяет, что в режиме ESI страница общая для всех: данные
+    пользователя заменены тегами ``<esi:include>``.
+    """
+    response = author_client.get(detail_url, **ESI)
+    content = response.content.decode()
+
+    assert 'public' in response['Cache-Control']
+    assert 'Cookie' not in response['Vary']
+    assert response['Surrogate-Control'] == 'content="ESI/1.0"'
+    assert content.count('<esi:include') == 2
+    assert 'testuser' not in content
+
+
+def test_anonymous_page_skips_comment_form(client, detail_url):
+    """Проверяет, что для анонима фрагмент формы не выполняется."""
+    with mock.patch.object(CommentFormFragment, 'dispatch') as dispatch:
+        response = client.get(detail_url)
+
+    assert response.status_code == 200
+    dispatch.assert_not_called()
+
+
+@pytest.mark.parametrize('name', ('news:user_nav', 'news:comment_form'))
+def test_fragments_are_private(author_client, news, name):
+    """Проверяет, что фрагменты с данными пользователя не кешируются."""
+    args = (news.pk,) if name == 'news:comment_form' else ()
+    response = author_client.get(reverse(name, args=args))
+
+    assert 'private' in response['Cache-Control']
+
+
+def test_edge_serves_same_page_to_everyone(
+    edge, author_client, another_user, detail_url
+):
+    """
+    Проверяет, что страница собирается из общего кеша и для анонима,
+    и для пользователя, а фрагменты у каждого свои.
+    """
+    status, headers, body = get(edge, detail_url)
+    assert (status, headers['x-cache']) == (200, 'MISS')
+    assert 'Войти' in body
+
+    status, headers, body = get(edge, detail_url, author_client)
+    assert (status, headers['x-cache']) == (200, 'HIT')
+    assert 'testuser' in body
+    assert 'id="id_text"' in body
+    assert '<esi:include' not in body
+    assert 'Surrogate-Control' not in headers
+    assert int(headers['content-length']) == len(body.encode())
+
+
+def test_hit_ratio(edge, author_client, news, home_url, detail_url):
+    """Проверяет долю попаданий на смешанном потоке запросов."""
+    for _ in range(5):
+        get(edge, home_url)
+        get(edge, detail_url)
+        get(edge, detail_url, author_client)
+
+    assert edge.stats['miss'] == 2
+    assert edge.hit_ratio() == pytest.approx(13 / 15)
+
+
+@pytest.mark.parametrize(
+    'headers, lifetime',
+    (
+        ({'cache-control': 'public, max-age=0, s-maxage=60'}, 60),
+        ({'cache-control': 'public, max-age=30'}, 30),
+        ({'cache-control': 'private, no-cache'}, 0),
+        ({'cache-control': 'public, no-store, max-age=30'}, 0),
+        ({'cache-control': 'public, s-maxage=60', 'set-cookie': 'a=b'}, 0),
+        ({}, 0),
+    ),
+)
+def test_cache_lifetime(headers, lifetime):
+    """Проверяет, какие ответы может хранить общий кеш."""
+    assert cache_lifetime(headers) == lifetime
@@ -0,0 +1,118 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.urls import reverse
+
+from news.live import NewsCheck, channel_name, get_broker, sse_event
+from yanews.asgi import application
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def stream_url(news):
+    return reverse('news:comment_stream', args=(news.pk,))
+
+
+async def open_stream(path):
+    """Запускает запрос к ASGI-приложению: задача, вход и выход."""
+    incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path,
+        'query_string': b'', 'headers': [],
+    }
+    task = asyncio.ensure_future(
+        application(scope, incoming.get, outgoing.put)
+    )
+    return task, incoming, outgoing
+
+
+async def next_message(outgoing):
+    return await asyncio.wait_for(outgoing.get(), timeout=5)
+
+
+def test_new_comment_is_pushed(
+    author_client, news, detail_url, stream_url,
+    django_capture_on_commit_callbacks,
+):
+    """Проверяет, что подписчик получает новый комментарий к новости."""
+    def post_comment():
+        with django_capture_on_commit_callbacks(execute=True):
+            author_client.post(detail_url, data={'text': 'Раз\nдва'})
+
+    async def scenario():
+        task, incoming, outgoing = await open_stream(stream_url)
+        start = await next_message(outgoing)
+        ping = await next_message(outgoing)
+        await sync_to_async(post_comment)()
+        event = await next_message(outgoing)
+        await incoming.put({'type': 'http.disconnect'})
+        await task
+        return start, ping, event
+
+    start, ping, event = async_to_sync(scenario)()
+
+    assert start['status'] == HTTPStatus.OK
+    assert (b'content-type', b'text/event-stream; charset=utf-8') in (
+        start['headers']
+    )
+    assert ping['body'].startswith(b':')
+    body = event['body'].decode()
+    assert body.startswith('id: ')
+    assert 'event: comment\n' in body
+    assert 'data: ' in body and 'Раз<br>два' in body
+    assert 'Редактировать' not in body
+    assert get_broker().subscriber_count(channel_name(news.pk)) == 0
+
+
+def test_unknown_news_stream_is_not_found():
+    """Проверяет, что поток несуществующей новости отвечает 404."""
+    async def scenario():
+        task, _, outgoing = await open_stream(
+            reverse('news:comment_stream', args=(0,))
+        )
+        await task
+        return await next_message(outgoing)
+
+    assert async_to_sync(scenario)()['status'] == HTTPStatus.NOT_FOUND
+
+
+def test_news_check_forgets_expired_checks(monkeypatch, news):
+    """Проверяет, что устаревшие проверки новостей не копятся."""
+    monkeypatch.setattr(NewsCheck, 'CHECK_SECONDS', -1)
+
+    async def scenario():
+        for pk in (news.pk, 0, news.pk + 1):
+            await NewsCheck.exists(pk)
+        return NewsCheck.loops[asyncio.get_running_loop()]
+
+    assert list(async_to_sync(scenario)()) == [news.pk + 1]
+
+
+def test_stream_under_wsgi_stops_reconnects(client, stream_url):
+    """Проверяет, что без ASGI поток отвечает 204."""
+    assert client.get(stream_url).status_code == HTTPStatus.NO_CONTENT
+
+
+def test_publish_from_another_thread():
+    """Проверяет рассылку из потока представления в цикл событий."""
+    broker = get_broker()
+
+    async def scenario():
+        async with broker.subscribe('test') as first, \
+                broker.subscribe('test') as second:
+            await sync_to_async(broker.publish)('test', b'event')
+            return await asyncio.wait_for(
+                asyncio.gather(first.get(), second.get()), timeout=5
+            )
+
+    assert async_to_sync(scenario)() == [b'event', b'event']
+
+
+def test_sse_event_splits_lines():
+    """Проверяет, что каждая строка данных получает префикс data."""
+    assert sse_event('a\nb', event='comment', event_id=1) == (
+        b'id: 1\nevent: comment\ndata: a\ndata: b\n\n'
+    )
@@ -1,6 +1,10 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from pytest_django.asserts import (
     assertFormError,
@@ -196,3 +200,63 @@ def test_user_cant_delete_comment_of_another_user(
     ).status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.count() == initial_comment_count
     assert Comment.objects.filter(id=comment_id).exists()
+
+
+def test_comment_html_is_rendered_on_save(author_client, comment, edit_url):
+    """
+    Проверяет, что готовый HTML комментария экранирован и
+    обновляется вместе с текстом при редактировании.
+    """
+    assert comment.text_html == comment.text
+
+    author_client.post(edit_url, data={'text': '<b>Раз</b>\nдва'})
+    comment.refresh_from_db()
+
+    assert comment.text_html == '&lt;b&gt;Раз&lt;/b&gt;<br>два'
+
+
+def test_backfill_fills_comment_html(client, comment, detail_url):
+    """
+    Проверяет, что команда заполняет пустой HTML,
+    а страница новости выводит его без фильтров.
+    """
+    Comment.objects.update(text_html='', text='Раз\nдва')
+
+    call_command('maintain', 'render_html', stdout=StringIO())
+
+    assert Comment.objects.get().text_html == 'Раз<br>два'
+    assert 'Раз<br>два' in client.get(detail_url).content.decode()
+
+
+def comment_statements(queries):
+    """Первые слова запросов к таблице комментариев."""
+    return [
+        query['sql'].split()[0]
+        for query in queries
+        if '"news_comment"' in query['sql']
+    ]
+
+
+@pytest.mark.parametrize(
+    'url, data, statements',
+    (
+        (pytest.lazy_fixture('edit_url'), None, ['SELECT']),
+        (pytest.lazy_fixture('edit_url'), FORM_DATA, ['SELECT', 'UPDATE']),
+        (pytest.lazy_fixture('delete_url'), None, ['SELECT']),
+        (pytest.lazy_fixture('delete_url'), {}, ['SELECT', 'DELETE']),
+    ),
+)
+def test_comment_is_fetched_once(author_client, url, data, statements):
+    """
+    Проверяет, что комментарий читается одним запросом, а изменение
+    и удаление выполняются одной командой с условием на автора.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        if data is None:
+            author_client.get(url)
+        else:
+            author_client.post(url, data=data)
+
+    assert comment_statements(queries) == statements
+    if data is not None:
+        assert '"author_id"' in queries[-1]['sql']
@@ -0,0 +1,70 @@
+import json
+import logging
+
+import pytest
+
+from yacommon.logs import JsonQueueHandler, SampleFilter
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def read_log(tmp_path, monkeypatch):
+    """Журнал проекта в файле; функция-результат дописывает и читает его."""
+    path = tmp_path / 'log.json'
+    handler = JsonQueueHandler(filename=path)
+    monkeypatch.setattr(logging.getLogger('yacommon'), 'handlers', [handler])
+
+    def read():
+        handler.stop()
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    yield read
+    handler.stop()
+
+
+def test_request_line(author_client, author, detail_url, read_log):
+    """Проверяет поля строки журнала о запросе."""
+    author_client.get(detail_url, HTTP_X_REQUEST_ID='request-1')
+
+    [line] = read_log()
+    assert line['logger'] == 'yacommon.requests'
+    assert line['request_id'] == 'request-1'
+    assert line['url_name'] == 'news:detail'
+    assert line['user_id'] == author.pk
+    assert line['status'] == 200
+    assert line['queries'] > 0
+    assert line['duration_ms'] >= line['db_ms'] > 0
+
+
+@pytest.mark.parametrize('rate, logged', ((0, False), (1, True)))
+def test_sql_is_sampled_per_request(client, detail_url, read_log,
+                                    rate, logged):
+    """Проверяет, что запросы к базе пишутся все или ни одного."""
+    logger = logging.getLogger('yacommon')
+    logger.handlers[0].addFilter(SampleFilter({'yacommon.sql': rate}))
+    logging.getLogger('yacommon.sql').setLevel(logging.DEBUG)
+    try:
+        client.get(detail_url)
+    finally:
+        logging.getLogger('yacommon.sql').setLevel(logging.INFO)
+
+    lines = read_log()
+    sql = [line for line in lines if line['logger'] == 'yacommon.sql']
+    assert len(sql) == (lines[-1]['queries'] if logged else 0)
+    assert all(line['request_id'] == lines[-1]['request_id'] for line in sql)
+
+
+def test_full_queue_drops_records(tmp_path):
+    """Проверяет, что переполненная очередь не останавливает запрос."""
+    handler = JsonQueueHandler(filename=tmp_path / 'log.json', queue_size=1)
+    handler.stop()
+    logger = logging.getLogger('yanews.test')
+    logger.addHandler(handler)
+    try:
+        for index in range(3):
+            logger.warning('Запись %s', index)
+    finally:
+        logger.removeHandler(handler)
+
+    assert handler.dropped == 2
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from news.activity import rebuild_activity, refresh_activity
+from news.maintenance import (
+    JOBS, iterate, iterate_chunks, peak_rss, reset_peak_rss
+)
+from news.models import Comment, CommentActivity
+
+pytestmark = pytest.mark.django_db
+
+COMMENTS_COUNT = 7
+
+
+@pytest.fixture
+def many_comments(author, news):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(COMMENTS_COUNT)
+    )
+
+
+def run(name, **options):
+    return dict(JOBS[name](**{'chunk_size': 3, **options}))
+
+
+def test_iterate_reads_keyset_chunks(many_comments):
+    """
+    Проверяет, что строки читаются порциями по id без OFFSET
+    и без сортировки по дате из Meta.ordering.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        rows = list(iterate(Comment.objects, ('text',), chunk_size=3))
+
+    assert [row.id for row in rows] == list(
+        Comment.objects.order_by('id').values_list('id', flat=True)
+    )
+    assert len(queries) == 4
+    for query in queries:
+        assert 'OFFSET' not in query['sql']
+        assert 'created' not in query['sql']
+
+
+def test_rows_are_slotted(many_comments):
+    """Проверяет, что у строк нет словаря атрибутов."""
+    chunk = next(iterate_chunks(Comment.objects, ('text',)))
+
+    assert not hasattr(chunk[0], '__dict__')
+    assert chunk[0].text == 'Комментарий 0'
+
+
+def test_revalidate_finds_and_deletes_bad_words(many_comments, comment):
+    """Проверяет поиск и удаление комментариев с запрещёнными словами."""
+    Comment.objects.filter(pk=comment.pk).update(text='Вы РЕДИСКА')
+
+    assert run('revalidate') == {
+        'checked': COMMENTS_COUNT + 1, 'violations': 1
+    }
+    assert run('revalidate', delete=True)['deleted'] == 1
+    assert not Comment.objects.filter(pk=comment.pk).exists()
+
+
+def test_purge_deletes_old_comments(many_comments, comment):
+    """Проверяет, что удаляются только комментарии старше заданного."""
+    Comment.objects.exclude(pk=comment.pk).update(
+        created=timezone.now() - timedelta(days=40)
+    )
+
+    assert run('purge', days=30) == {'deleted': COMMENTS_COUNT}
+    assert list(Comment.objects.all()) == [comment]
+
+
+def test_recount_matches_rebuild(many_comments):
+    """Проверяет, что пересчёт в Python совпадает с пересчётом в SQL."""
+    rebuild_activity()
+    expected = set(CommentActivity.objects.values_list('news_id', 'count'))
+
+    assert run('recount')['comments'] == COMMENTS_COUNT
+    assert set(
+        CommentActivity.objects.values_list('news_id', 'count')
+    ) == expected
+
+
+def test_recount_keeps_room_for_late_commits(many_comments, author, news):
+    """
+    Проверяет, что комментарий, зафиксированный после пересчёта
+    с более ранним временем, учтёт следующее обновление, а учтённые
+    пересчётом не посчитаются дважды.
+    """
+    run('recount')
+    late = Comment.objects.create(news=news, author=author, text='Поздний')
+    Comment.objects.filter(pk=late.pk).update(
+        created=timezone.now() - timedelta(seconds=5)
+    )
+
+    assert refresh_activity() == 1
+    assert CommentActivity.objects.aggregate(
+        total=Sum('count')
+    )['total'] == COMMENTS_COUNT + 1
+
+
+def test_command_reports_peak_rss(many_comments):
+    """Проверяет, что команда сообщает пиковое потребление памяти."""
+    output = StringIO()
+    call_command('maintain', 'revalidate', stdout=output)
+
+    assert 'revalidate: peak RSS ' in output.getvalue()
+
+
+def test_peak_rss_is_measured_per_job():
+    """Проверяет, что сброс пика памяти забывает прежние выделения."""
+    if not reset_peak_rss():
+        pytest.skip('Пик памяти сбрасывается только в Linux.')
+    before = peak_rss()
+    data = b'x' * 64 * 1024 * 1024
+    grown = peak_rss()
+    del data
+
+    reset_peak_rss()
+
+    assert grown - before >= 60 * 1024
+    assert peak_rss() < grown
+
+
+def test_purge_requires_days():
+    """Проверяет, что purge без возраста не запускается."""
+    with pytest.raises(CommandError):
+        call_command('maintain', 'purge', stdout=StringIO())
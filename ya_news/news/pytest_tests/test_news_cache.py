@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from news.cache import (
+    forget_news, get_news, get_news_many, get_versions, news_cache,
+    news_cache_stats, news_key, reset_news_cache_stats
+)
+from news.checks import check_news_cache
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+
+def news_queries(queries):
+    return [
+        query['sql'] for query in queries
+        if 'FROM "news_news"' in query['sql']
+    ]
+
+
+def test_detail_reads_news_once(client, detail_url):
+    """Проверяет, что повторный показ новости не читает её из базы."""
+    client.get(detail_url)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(detail_url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert news_queries(queries) == []
+
+
+def test_comment_reads_news_from_cache(author_client, news, detail_url):
+    """Проверяет, что комментирование берёт новость из кеша."""
+    get_news(news.pk)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = author_client.post(detail_url, data={'text': 'Текст'})
+
+    assert response.url.endswith('#comments')
+    assert news_queries(queries) == []
+
+
+def test_save_and_delete_invalidate(client, news, detail_url):
+    """Проверяет сброс записи при изменении и удалении новости."""
+    get_news(news.pk)
+    news.title = 'Новый заголовок'
+    news.save()
+
+    assert get_news(news.pk).title == 'Новый заголовок'
+
+    news.delete()
+
+    assert get_news(news.pk) is None
+    assert client.get(detail_url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_save_deletes_previous_entry(settings, news):
+    """Проверяет, что запись прежней версии не остаётся в кеше."""
+    version = get_versions([news.pk])[news.pk]
+    get_news(news.pk)
+    key = news_key(news.pk, version)
+    cached = news_cache().get(key, version=settings.NEWS_CACHE_VERSION)
+    assert cached == news
+
+    news.save()
+
+    assert news_cache().get(key, version=settings.NEWS_CACHE_VERSION) is None
+
+
+def test_stale_read_is_not_served(news):
+    """
+    Проверяет, что строка, прочитанная до изменения новости,
+    не попадает к следующим читателям.
+    """
+    version = get_versions([news.pk])[news.pk]
+    stale = News.objects.get(pk=news.pk)
+    forget_news(news.pk)
+    news_cache().set(news_key(news.pk, version), stale)
+    News.objects.filter(pk=news.pk).update(title='Свежий заголовок')
+
+    assert get_news(news.pk).title == 'Свежий заголовок'
+
+
+def test_get_many_reads_only_misses(news):
+    """Проверяет пачку из попаданий и промахов и счётчики кеша."""
+    other = News.objects.create(title='Другая', text='Текст')
+    get_news(news.pk)
+    reset_news_cache_stats()
+
+    with CaptureQueriesContext(connection) as queries:
+        found = get_news_many([news.pk, other.pk, other.pk + 100])
+
+    assert found == {news.pk: news, other.pk: other}
+    assert len(news_queries(queries)) == 1
+    assert news_cache_stats() == {'hits': 1, 'misses': 2, 'ratio': 1 / 3}
+
+
+@pytest.mark.parametrize(
+    'workers, backend, errors',
+    (
+        (1, 'django.core.cache.backends.locmem.LocMemCache', []),
+        (4, 'django.core.cache.backends.locmem.LocMemCache', ['news.E001']),
+        (4, 'django.core.cache.backends.filebased.FileBasedCache', []),
+    ),
+)
+def test_check_rejects_local_cache_with_workers(
+    settings, workers, backend, errors
+):
+    """Проверяет, что несколько процессов не делят кеш в памяти процесса."""
+    settings.WEB_CONCURRENCY = workers
+    settings.CACHES = {
+        **settings.CACHES,
+        settings.NEWS_CACHE: {'BACKEND': backend, 'LOCATION': '/tmp/news'},
+    }
+
+    assert [error.id for error in check_news_cache(None)] == errors
@@ -0,0 +1,174 @@
+from datetime import date
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from news.archive import archive_news
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+PAGE_SIZE = 3
+
+
+@pytest.fixture(autouse=True)
+def page_size(settings):
+    settings.NEWS_ARCHIVE_PAGE_SIZE = PAGE_SIZE
+
+
+@pytest.fixture
+def dated_news():
+    """По две новости в день за май и июнь 2020 года."""
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст', date=day)
+        for day in (date(2020, 5, 30), date(2020, 5, 31), date(2020, 6, 1))
+        for index in range(2)
+    )
+    return list(News.objects.order_by('-date', '-id'))
+
+
+def ids(response):
+    return [news['id'] for news in response.context['news_list']]
+
+
+def walk(client, url):
+    """Новости всех страниц архива по ссылкам «более старые»."""
+    seen = []
+    while url:
+        response = client.get(url)
+        seen += ids(response)
+        cursor = response.context['news_next']
+        url = cursor and response.request['PATH_INFO'] + f'?before={cursor}'
+    return seen
+
+
+@pytest.mark.parametrize('args, days', (
+    ((2020,), 3),
+    ((2020, 5), 2),
+    ((2020, 5, 31), 1),
+    ((2021,), 0),
+))
+def test_period_pages(client, dated_news, args, days):
+    """Проверяет новости года, месяца и дня от новых к старым."""
+    name = ('archive_year', 'archive_month', 'archive_day')[len(args) - 1]
+    start = date(*args, *(1,) * (3 - len(args)))
+    expected = [
+        news.pk for news in dated_news
+        if news.date.timetuple()[:len(args)] == start.timetuple()[:len(args)]
+    ]
+
+    seen = walk(client, reverse(f'news:{name}', args=args))
+
+    assert seen == expected
+    assert len(seen) == days * 2
+
+
+def test_pages_use_keyset_without_offset(client, dated_news):
+    """
+    Проверяет, что страницы идут подряд без пропусков и повторов
+    и что запросы не используют OFFSET.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        seen = walk(client, reverse('news:archive'))
+
+    assert seen == [news.pk for news in dated_news]
+    assert not [
+        query for query in queries if 'OFFSET' in query['sql'].upper()
+    ]
+
+
+def test_archived_news_are_listed(client, dated_news):
+    """Проверяет, что перенесённые в архив новости остаются в списке."""
+    archive_news(days=365)
+
+    assert News.objects.count() == 0
+    assert walk(client, reverse('news:archive_year', args=(2020,))) == [
+        news.pk for news in dated_news
+    ]
+
+
+def test_home_links_to_older_news(client, settings):
+    """Проверяет, что ссылка с главной продолжает список с её конца."""
+    today = timezone.localdate()
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст', date=today)
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
+    )
+    response = client.get(reverse('news:home'))
+    shown = [news.pk for news in response.context['object_list']]
+    older = reverse('news:archive') + f'?before={response.context["older"]}'
+
+    assert older in response.content.decode()
+    assert shown + walk(client, older) == list(
+        News.objects.order_by('-date', '-id').values_list('pk', flat=True)
+    )
+
+
+def test_closed_period_is_cached(client, dated_news):
+    """
+    Проверяет, что страница прошедшего периода читается из кеша, новость
+    за сегодня её не сбрасывает, а правка старой новости — сбрасывает.
+    """
+    url = reverse('news:archive_month', args=(2020, 5))
+    client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    News.objects.create(title='Сегодня', text='Текст')
+    with CaptureQueriesContext(connection) as after_today:
+        client.get(url)
+    # Первая новость мая — на первой странице.
+    dated_news[2].title = 'Исправлено'
+    dated_news[2].save()
+    response = client.get(url)
+
+    assert 'FROM "news_news"' not in ' '.join(q['sql'] for q in queries)
+    assert 'FROM "news_news"' not in ' '.join(q['sql'] for q in after_today)
+    assert 'Исправлено' in response.content.decode()
+
+
+def test_edge_lifetime(client, dated_news, settings):
+    """Проверяет долгий срок в кеше прокси только у прошедших периодов."""
+    today = timezone.localdate()
+    closed = client.get(reverse('news:archive_year', args=(2020,)))
+    current = client.get(reverse('news:archive_year', args=(today.year,)))
+
+    assert (
+        f's-maxage={settings.NEWS_ARCHIVE_EDGE_SECONDS}'
+        in closed['Cache-Control']
+    )
+    assert (
+        f's-maxage={settings.EDGE_CACHE_SECONDS}'
+        in current['Cache-Control']
+    )
+
+
+@pytest.mark.parametrize('url', (
+    '/archive/2020/13/',
+    '/archive/2020/2/30/',
+    '/archive/?before=вчера',
+    '/archive/?before=2020-05-01',
+    '/archive/99999999999999999999/',
+    '/archive/2020/99999999999999999999/',
+    '/archive/9999/12/',
+    '/archive/?before=2020-01-01.99999999999999999999',
+))
+def test_bad_date_is_not_found(client, url):
+    """Проверяет 404 для несуществующей даты и чужого ключа."""
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_period_bounds_past_new_year(client):
+    """Проверяет, что декабрь заканчивается первым января."""
+    News.objects.create(title='Декабрь', text='Текст', date=date(2020, 12, 31))
+    News.objects.create(title='Январь', text='Текст', date=date(2021, 1, 1))
+
+    response = client.get(reverse('news:archive_month', args=(2020, 12)))
+
+    assert [news['title'] for news in response.context['news_list']] == [
+        'Декабрь'
+    ]
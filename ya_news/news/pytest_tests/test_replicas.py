@@ -0,0 +1,116 @@
+import re
+import sqlite3
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from news.models import News
+from yacommon.routers import (
+    PIN_COOKIE, PrimaryReplicaRouter, copy_database, read_from_replica
+)
+
+FORM_DATA = {'text': 'Новый текст'}
+
+
+def test_reads_go_to_replica_only_inside_context(settings):
+    """
+    Проверяет, что чтения уходят на реплику только внутри
+    read_from_replica, а запись всегда идёт в основную базу.
+    """
+    settings.REPLICA_DATABASES = ['replica1']
+    router = PrimaryReplicaRouter()
+
+    with read_from_replica():
+        assert router.db_for_read(News) == 'replica1'
+        assert router.db_for_write(News) == 'default'
+    assert router.db_for_read(News) is None
+
+
+def test_replicas_are_not_migrated(settings):
+    """Проверяет, что схема реплик не создаётся миграциями."""
+    settings.REPLICA_DATABASES = ['replica1']
+    router = PrimaryReplicaRouter()
+
+    assert router.allow_migrate('default', 'news')
+    assert not router.allow_migrate('replica1', 'news')
+
+
+@pytest.mark.django_db
+def test_comment_pins_author_to_primary(settings, author_client, detail_url):
+    """
+    Проверяет, что после комментария автор на время
+    закрепляется за основной базой.
+    """
+    response = author_client.post(detail_url, data=FORM_DATA)
+
+    assert response.cookies[PIN_COOKIE]['max-age'] == (
+        settings.REPLICA_PIN_SECONDS
+    )
+
+
+@pytest.fixture
+def replica(settings):
+    """Реплика: второе подключение к той же тестовой базе."""
+    connections.databases['replica'] = dict(connection.settings_dict)
+    settings.REPLICA_DATABASES = ['replica']
+    yield connections['replica']
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+def read_tables(queries):
+    return {
+        table for query in queries
+        for table in re.findall(r'FROM "(\w+)"', query['sql'])
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    'pinned, replica_used', ((False, True), (True, False))
+)
+def test_detail_reads_from_replica_unless_pinned(
+        replica,
+        author_client,
+        detail_url,
+        pinned,
+        replica_used
+):
+    """
+    Проверяет, что страница новости читается с реплики, если
+    пользователь не закреплён за основной базой, а сессия и
+    пользователь — всегда с основной.
+    """
+    if pinned:
+        author_client.cookies[PIN_COOKIE] = '1'
+    with CaptureQueriesContext(connection) as primary, \
+            CaptureQueriesContext(replica) as replicated:
+        response = author_client.get(detail_url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert replica.alias == 'replica'
+    assert ('news_comment' in read_tables(replicated)) is replica_used
+    assert {'django_session', 'auth_user'} <= read_tables(primary)
+    assert not read_tables(replicated) & {'django_session', 'auth_user'}
+
+
+def test_copy_database_syncs_sqlite_files(tmp_path):
+    """Проверяет, что имитация репликации копирует данные."""
+    primary = tmp_path / 'primary.sqlite3'
+    replica = tmp_path / 'replica.sqlite3'
+    connection = sqlite3.connect(primary)
+    connection.execute('CREATE TABLE news (title TEXT)')
+    connection.execute("INSERT INTO news VALUES ('Новость')")
+    connection.commit()
+    connection.close()
+
+    copy_database(primary, replica)
+
+    connection = sqlite3.connect(replica)
+    assert connection.execute('SELECT title FROM news').fetchall() == [
+        ('Новость',)
+    ]
+    connection.close()
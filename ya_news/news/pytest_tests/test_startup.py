@@ -0,0 +1,34 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from yacommon.startup import group_by_app, parse_importtime
+
+IMPORTTIME = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     decouple.x
+import time:       300 |        420 |   decouple
+import time:        50 |         50 |       django.contrib.admin.widgets
+import time:       900 |        950 |   django.contrib.admin
+import time:       200 |        200 | news.views
+'''
+
+
+def test_group_by_app():
+    """
+    Проверяет, что модули приложений складываются по приложению,
+    а остальные — по пакету верхнего уровня.
+    """
+    assert group_by_app(parse_importtime(IMPORTTIME)) == {
+        'decouple': 420, 'django.contrib.admin': 950, 'news': 200,
+    }
+
+
+def test_command_reports_cold_and_prefork_start():
+    """Проверяет, что команда замеряет оба способа запуска."""
+    output = StringIO()
+    call_command('startup_profile', runs=1, top=3, stdout=output)
+
+    assert 'import total' in output.getvalue()
+    assert 'cold start to first response' in output.getvalue()
+    assert 'prefork worker to first response' in output.getvalue()
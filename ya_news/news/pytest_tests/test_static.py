@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+
+from yacommon.staticfiles import IMMUTABLE, StaticFilesApplication
+
+STYLESHEET = 'admin/css/base.css'
+
+
+def passthrough(environ, start_response):
+    """WSGI-приложение, которое отвечает на всё, что не статика."""
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+def get(application, path, **environ):
+    """Выполняет GET-запрос к WSGI-приложению."""
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = int(status.split()[0])
+        response['headers'] = dict(headers)
+
+    body = b''.join(application(
+        {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **environ},
+        start_response
+    ))
+    return response['status'], response['headers'], body
+
+
+@pytest.fixture
+def static_root(settings, tmp_path):
+    """Собирает статику во временный каталог."""
+    settings.STATIC_ROOT = tmp_path
+    call_command('collectstatic', interactive=False, verbosity=0)
+    return tmp_path
+
+
+@pytest.fixture
+def application(static_root):
+    return StaticFilesApplication(passthrough, root=static_root)
+
+
+@pytest.fixture
+def hashed_url(static_root, settings):
+    """URL таблицы стилей под именем с хешем."""
+    return settings.STATIC_URL + staticfiles_storage.stored_name(STYLESHEET)
+
+
+def test_collectstatic_writes_hashed_and_compressed_files(
+        static_root,
+        hashed_url,
+        settings
+):
+    """
+    Проверяет, что сборка сохраняет файлы с хешем
+    в имени и сжатые копии рядом с ними.
+    """
+    hashed_name = hashed_url[len(settings.STATIC_URL):]
+
+    assert hashed_name != STYLESHEET
+    assert (static_root / hashed_name).is_file()
+    assert (static_root / (hashed_name + '.gz')).is_file()
+
+
+def test_hashed_file_is_immutable_and_compressed(application, hashed_url):
+    """
+    Проверяет, что файл с хешем отдаётся с вечным кешированием
+    и в сжатом виде, если клиент принимает gzip.
+    """
+    status, headers, body = get(
+        application, hashed_url, HTTP_ACCEPT_ENCODING='gzip, deflate'
+    )
+
+    assert status == HTTPStatus.OK
+    assert headers['Cache-Control'] == IMMUTABLE
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert int(headers['Content-Length']) == len(body)
+
+
+def test_plain_file_for_client_without_compression(application, hashed_url):
+    """Проверяет, что без Accept-Encoding файл отдаётся несжатым."""
+    status, headers, _ = get(application, hashed_url)
+
+    assert status == HTTPStatus.OK
+    assert 'Content-Encoding' not in headers
+
+
+def test_unchanged_file_is_not_sent_again(application, hashed_url):
+    """Проверяет ответ 304 на условный запрос с тем же ETag."""
+    _, headers, _ = get(application, hashed_url)
+    status, _, body = get(
+        application, hashed_url, HTTP_IF_NONE_MATCH=headers['ETag']
+    )
+
+    assert status == HTTPStatus.NOT_MODIFIED
+    assert body == b''
+
+
+def test_compressed_file_has_own_etag(application, hashed_url):
+    """
+    Проверяет, что сжатая копия и сам файл отдаются с разными ETag
+    и ETag одной не подходит для условного запроса за другим.
+    """
+    _, plain, _ = get(application, hashed_url)
+    _, gzipped, _ = get(application, hashed_url, HTTP_ACCEPT_ENCODING='gzip')
+
+    assert gzipped['ETag'] == plain['ETag'][:-1] + '-gzip"'
+    status, _, _ = get(
+        application, hashed_url, HTTP_IF_NONE_MATCH=gzipped['ETag']
+    )
+    assert status == HTTPStatus.OK
+    status, _, _ = get(
+        application, hashed_url, HTTP_ACCEPT_ENCODING='gzip',
+        HTTP_IF_NONE_MATCH=gzipped['ETag'],
+    )
+    assert status == HTTPStatus.NOT_MODIFIED
+
+
+def test_other_requests_are_passed_to_django(application):
+    """Проверяет, что запросы не к статике уходят в приложение."""
+    assert get(application, '/')[2] == b'django'
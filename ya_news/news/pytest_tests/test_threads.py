@@ -0,0 +1,161 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.models import PATH_LENGTH, PATH_SEGMENT, Comment
+
+pytestmark = pytest.mark.django_db
+
+
+def add_comment(news, author, text, parent=None):
+    comment = Comment(news=news, author=author, text=text)
+    if parent is not None:
+        comment.reply_to(parent)
+    comment.save()
+    return comment
+
+
+@pytest.fixture
+def thread(news, author):
+    """Два комментария к новости и ответы на первый из них."""
+    first = add_comment(news, author, 'Первый')
+    second = add_comment(news, author, 'Второй')
+    reply = add_comment(news, author, 'Ответ', first)
+    nested = add_comment(news, author, 'Ответ на ответ', reply)
+    return first, second, reply, nested
+
+
+def test_replies_follow_their_comment(client, detail_url, thread):
+    """Проверяет, что ответы идут сразу после своего комментария."""
+    first, second, reply, nested = thread
+
+    comments = client.get(detail_url).context['comments']
+
+    assert comments == [first, reply, nested, second]
+    assert [comment.depth for comment in comments] == [0, 1, 2, 0]
+
+
+def test_page_is_one_query(client, detail_url, thread):
+    """Проверяет, что комментарии страницы читаются одним запросом."""
+    with CaptureQueriesContext(connection) as queries:
+        client.get(detail_url)
+
+    comment_queries = [
+        query['sql'] for query in queries
+        if 'FROM "news_comment"' in query['sql']
+    ]
+    assert len(comment_queries) == 1
+    assert 'ORDER BY "news_comment"."news_id" ASC, "news_comment"."path"' in (
+        comment_queries[0]
+    )
+
+
+def test_deep_thread_pages(client, settings, news, author, detail_url):
+    """
+    Проверяет, что глубокая ветка листается страницами без пропусков,
+    а ответы глубже предела становятся соседями.
+    """
+    settings.COMMENTS_PAGE_SIZE = 7
+    parent = None
+    chain = []
+    for index in range(40):
+        parent = add_comment(news, author, f'Уровень {index}', parent)
+        chain.append(parent)
+
+    shown, after = [], None
+    while True:
+        response = client.get(detail_url, {'after': after} if after else {})
+        shown += response.context['comments']
+        after = response.context['comments_next']
+        if after is None:
+            break
+
+    assert shown == chain
+    assert max(len(comment.path) for comment in chain) == PATH_LENGTH
+    assert chain[-1].depth == PATH_LENGTH // PATH_SEGMENT - 1
+
+
+def test_reply_view(author_client, thread):
+    """Проверяет ответ через форму."""
+    first = thread[0]
+    response = author_client.post(
+        reverse('news:reply', args=(first.pk,)), data={'text': 'Согласен'}
+    )
+
+    reply = Comment.objects.get(text='Согласен')
+    assert response.url.endswith(f'#comment-{reply.pk}')
+    assert reply.parent == first
+    assert reply.path.startswith(first.path)
+
+
+def test_anonymous_cant_reply(client, login_url, comment):
+    """Проверяет, что аноним отправляется на страницу входа."""
+    url = reverse('news:reply', args=(comment.pk,))
+
+    response = client.post(url, data={'text': 'Текст'})
+
+    assert response.url == f'{login_url}?next={url}'
+    assert Comment.objects.count() == 1
+
+
+def test_thread_page_shows_only_its_replies(client, thread):
+    """Проверяет страницу ветки."""
+    first, _, reply, nested = thread
+
+    response = client.get(reverse('news:thread', args=(first.pk,)))
+
+    assert response.context['comments'] == [first, reply, nested]
+
+
+def test_delete_keeps_replies_of_other_users(
+        author_client, news, author, another_user, thread
+):
+    """
+    Проверяет, что удаление комментария одной командой не трогает
+    ответы на него, в том числе чужие.
+    """
+    first, second, reply, nested = thread
+    foreign = add_comment(news, another_user, 'Чужой ответ', first)
+
+    with CaptureQueriesContext(connection) as queries:
+        author_client.post(reverse('news:delete', args=(first.pk,)))
+
+    assert list(Comment.objects.in_order()) == [reply, nested, foreign, second]
+    assert sum(
+        query['sql'].startswith('DELETE') for query in queries
+    ) == 1
+
+
+def test_bulk_create_fills_paths(news, author, comment):
+    """Проверяет пути комментариев, созданных пачкой."""
+    replies = Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Ответ {index}',
+                parent=comment)
+        for index in range(3)
+    )
+
+    paths = list(
+        Comment.objects.filter(parent=comment).values_list('path', flat=True)
+    )
+    assert len(replies) == len(paths) == 3
+    assert all(
+        path.startswith(comment.path) and len(path) == 2 * PATH_SEGMENT
+        for path in paths
+    )
+
+
+def test_api_reply(author_client, news, comment):
+    """Проверяет ответ через API и проверку родителя."""
+    url = reverse('news:api_news_comments', args=(news.pk,))
+    for parent_id, status in ((comment.pk, HTTPStatus.CREATED),
+                              (comment.pk + 100, HTTPStatus.BAD_REQUEST)):
+        response = author_client.post(
+            url, json.dumps({'text': 'Ответ', 'parent_id': parent_id}),
+            content_type='application/json',
+        )
+        assert response.status_code == status
+    assert Comment.objects.get(text='Ответ').parent_id == comment.pk
@@ -0,0 +1,140 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import caches
+
+from news.checks import check_throttle_cache
+from news.models import Comment
+from yacommon.throttling import LOCK_TIMEOUT, take_token
+
+FORM_DATA = {'text': 'Новый текст'}
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def strict_rates(settings):
+    """Ограничивает пользователя и IP-адрес двумя запросами в минуту."""
+    settings.THROTTLE_RATES = {'comment': {'user': '2/m', 'ip': '3/m'}}
+
+
+def test_comment_creation_is_throttled(
+        strict_rates,
+        author_client,
+        detail_url
+):
+    """
+    Проверяет, что после исчерпания лимита
+    комментарий не создаётся и возвращается 429.
+    """
+    for _ in range(2):
+        assert author_client.post(
+            detail_url, data=FORM_DATA
+        ).status_code == HTTPStatus.FOUND
+
+    response = author_client.post(detail_url, data=FORM_DATA)
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response['Retry-After']) > 0
+    assert Comment.objects.count() == 2
+
+
+def test_ip_limit_is_shared_between_users(
+        strict_rates,
+        author_client,
+        admin_client,
+        detail_url
+):
+    """Проверяет, что лимит IP-адреса общий для всех пользователей."""
+    for client in (author_client, admin_client, author_client):
+        assert client.post(
+            detail_url, data=FORM_DATA
+        ).status_code == HTTPStatus.FOUND
+
+    assert admin_client.post(
+        detail_url, data=FORM_DATA
+    ).status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_user_limit_does_not_spend_ip_tokens(
+        strict_rates,
+        author_client,
+        admin_client,
+        detail_url
+):
+    """Проверяет, что отказ по лимиту пользователя не тратит лимит IP."""
+    for _ in range(3):
+        author_client.post(detail_url, data=FORM_DATA)
+
+    assert admin_client.post(
+        detail_url, data=FORM_DATA
+    ).status_code == HTTPStatus.FOUND
+
+
+def test_comment_edit_is_throttled(strict_rates, author_client, edit_url):
+    """Проверяет, что редактирование комментария тоже ограничено."""
+    for _ in range(2):
+        author_client.post(edit_url, data=FORM_DATA)
+
+    assert author_client.post(
+        edit_url, data=FORM_DATA
+    ).status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_reading_is_not_throttled(strict_rates, client, detail_url):
+    """Проверяет, что GET-запросы не расходуют токены."""
+    for _ in range(5):
+        assert client.get(detail_url).status_code == HTTPStatus.OK
+
+
+def test_concurrent_requests_share_bucket(settings):
+    """Проверяет, что одновременные запросы не забирают лишних токенов."""
+    caches[settings.THROTTLE_CACHE].clear()
+    barrier = threading.Barrier(8)
+    waits = []
+
+    def request():
+        barrier.wait()
+        waits.append(take_token('throttle:test', '5/m'))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert waits.count(0) == 5
+
+
+def test_locked_bucket_is_not_spent(settings):
+    """Проверяет, что корзину под чужой блокировкой запрос не трогает."""
+    cache = caches[settings.THROTTLE_CACHE]
+    cache.clear()
+    cache.add('throttle:test:lock', 1)
+
+    assert take_token('throttle:test', '1/m') == LOCK_TIMEOUT
+
+    cache.delete('throttle:test:lock')
+    assert take_token('throttle:test', '1/m') == 0
+
+
+@pytest.mark.parametrize(
+    'workers, backend, errors',
+    (
+        (1, 'django.core.cache.backends.locmem.LocMemCache', []),
+        (4, 'django.core.cache.backends.locmem.LocMemCache', ['news.E002']),
+        (4, 'django.core.cache.backends.db.DatabaseCache', []),
+    ),
+)
+def test_check_rejects_local_throttle_cache(
+    settings, workers, backend, errors
+):
+    """Проверяет, что процессы не держат корзины каждый в своей памяти."""
+    settings.WEB_CONCURRENCY = workers
+    settings.CACHES = {
+        **settings.CACHES,
+        settings.THROTTLE_CACHE: {'BACKEND': backend, 'LOCATION': 'throttle'},
+    }
+
+    assert [error.id for error in check_throttle_cache(None)] == errors
@@ -0,0 +1,31 @@
+from django import template
+from django.urls import resolve, reverse
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def esi(context, url_name, *args):
+    """
+    Фрагмент страницы, зависящий от пользователя.
+
+    Если запрос пришёл через кеширующий прокси с поддержкой ESI,
+    выводится ``<esi:include>``, и фрагмент запросит сам прокси. Иначе
+    представление фрагмента выполняется сразу, и его HTML вставляется
+    в страницу.
+    """
+    request = context.get('request')
+    if request is None:
+        return ''
+    url = reverse(url_name, args=args)
+    if getattr(request, 'esi', False):
+        request.esi_included = True
+        return mark_safe(f'<esi:include src="{url}"/>')
+    match = resolve(url)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        return ''
+    return mark_safe(response.content.decode(response.charset))
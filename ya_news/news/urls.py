@@ -1,16 +1,63 @@
 from django.urls import path
 
-from news import views
+from news import api, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('archive/', views.NewsArchive.as_view(), name='archive'),
+    path(
+        'archive/<int:year>/',
+        views.NewsArchive.as_view(),
+        name='archive_year'
+    ),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.NewsArchive.as_view(),
+        name='archive_month'
+    ),
+    path(
+        'archive/<int:year>/<int:month>/<int:day>/',
+        views.NewsArchive.as_view(),
+        name='archive_day'
+    ),
+    path(
+        'news/<int:pk>/comment-form/',
+        views.CommentFormFragment.as_view(),
+        name='comment_form'
+    ),
+    path(
+        'news/<int:pk>/comments/stream/',
+        views.CommentStreamFallback.as_view(),
+        name='comment_stream'
+    ),
+    path('fragments/user-nav/', views.UserNav.as_view(), name='user_nav'),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path(
+        'reply_comment/<int:pk>/', views.CommentReply.as_view(), name='reply'
+    ),
+    path('comment/<int:pk>/', views.CommentThread.as_view(), name='thread'),
+    path('api/news/', api.NewsListApi.as_view(), name='api_news_list'),
+    path(
+        'api/news/<int:pk>/',
+        api.NewsDetailApi.as_view(),
+        name='api_news_detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.NewsCommentsApi.as_view(),
+        name='api_news_comments'
+    ),
+    path(
+        'api/comments/<int:pk>/',
+        api.CommentApi.as_view(),
+        name='api_comment'
+    ),
 ]
@@ -1,14 +1,27 @@
+from http import HTTPStatus
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db.models import Count
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.urls import reverse
 from django.views import generic
 
+from yacommon.routers import ReplicaReadMixin
+from yacommon.throttling import ThrottleMixin
+
+from .activity import discussed_today_and_week
+from .cache import get_news
+from .edge import EdgeCacheMixin, PrivateFragmentMixin
 from .forms import CommentForm
-from .models import Comment, News
+from .live import publish_comment
+from .models import ArchivedNews, Comment, News, render_comment
+from .periods import (
+    format_cursor, is_closed, news_page, parse_cursor, period_bounds
+)
 
 
-class NewsList(generic.ListView):
+class NewsList(EdgeCacheMixin, ReplicaReadMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
@@ -18,36 +31,170 @@ class NewsList(generic.ListView):
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Для списка нужно только число комментариев,
+        поэтому оно считается в том же запросе.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
+        return self.model.objects.newest_first().annotate(
+            comment_count=Count('comment')
         )[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
+    def get_context_data(self, **kwargs):
+        """
+        Добавляет самые обсуждаемые новости из часовой сводки и ключ
+        последней новости для ссылки на более старые.
+        """
+        context = super().get_context_data(**kwargs)
+        context['most_discussed'] = discussed_today_and_week()
+        news = context['object_list']
+        if len(news) == settings.NEWS_COUNT_ON_HOME_PAGE:
+            last = news[len(news) - 1]
+            context['older'] = format_cursor((last.date, last.pk))
+        return context
 
-class NewsDetail(generic.DetailView):
-    model = News
-    template_name = 'news/detail.html'
+
+class NewsArchive(EdgeCacheMixin, ReplicaReadMixin, generic.TemplateView):
+    """
+    Архив по датам: новости года, месяца или дня из адреса, без них —
+    все новости. Следующая страница — ``?before=<ключ последней>``.
+    """
+    template_name = 'news/archive.html'
+
+    def get(self, request, *args, **kwargs):
+        before = request.GET.get('before')
+        try:
+            self.start, self.end = (
+                period_bounds(**kwargs) if kwargs else (None, None)
+            )
+            self.before = parse_cursor(before) if before else None
+        except (ValueError, OverflowError):
+            raise Http404('Нет такой даты.')
+        return super().get(request, *args, **kwargs)
+
+    def get_edge_cache_seconds(self):
+        """Страница прошедшего периода больше не меняется."""
+        if is_closed(self.end, self.before):
+            return settings.NEWS_ARCHIVE_EDGE_SECONDS
+        return super().get_edge_cache_seconds()
+
+    def get_context_data(self, **kwargs):
+        news, next_key = news_page(self.start, self.end, self.before)
+        return super().get_context_data(
+            news_list=news,
+            news_next=format_cursor(next_key) if next_key else None,
+            period_start=self.start,
+            **kwargs,
+        )
+
+
+class CachedNewsMixin:
+    """Новость по ``pk`` из адреса берётся из кеша новостей."""
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+        news = get_news(self.kwargs['pk'])
+        if news is None:
+            raise Http404('Новость не найдена.')
+        return news
+
+
+class CommentPageMixin:
+    """
+    Страница комментариев по порядку веток: ответы сразу после своего
+    комментария. Следующая страница — ``?after=<путь последнего>``.
+    """
+
+    def get_comments(self):
+        return Comment.objects.filter(news_id=self.object.pk)
+
+    def get_context_data(self, **kwargs):
+        comments, has_next = self.get_comments().select_related(
+            'author'
+        ).page(after=self.request.GET.get('after'))
+        return super().get_context_data(
+            comments=comments,
+            comments_next=comments[-1].path if has_next else None,
+            **kwargs,
         )
-        return obj
+
+
+class NewsDetail(
+        EdgeCacheMixin,
+        ReplicaReadMixin,
+        CachedNewsMixin,
+        CommentPageMixin,
+        generic.DetailView
+):
+    """
+    Новость с комментариями.
+
+    Страница одинакова для всех пользователей: форма комментария
+    и ссылки на свои комментарии приходят фрагментом CommentFormFragment.
+    """
+    model = News
+    template_name = 'news/detail.html'
+
+
+class CommentThread(
+        EdgeCacheMixin, ReplicaReadMixin, CommentPageMixin, generic.DetailView
+):
+    """Ветка обсуждения: комментарий и все ответы на него."""
+    model = Comment
+    queryset = Comment.objects.select_related('news', 'author')
+    template_name = 'news/thread.html'
+
+    def get_comments(self):
+        return Comment.objects.filter(
+            news_id=self.object.news_id
+        ).thread(self.object.path)
+
+
+class UserNav(PrivateFragmentMixin, generic.TemplateView):
+    """Фрагмент шапки с именем пользователя и ссылками входа и выхода."""
+    template_name = 'includes/user_nav.html'
+
+
+class CommentFormFragment(
+        PrivateFragmentMixin,
+        CachedNewsMixin,
+        generic.detail.SingleObjectMixin,
+        generic.TemplateView
+):
+    """Фрагмент новости: форма комментария и ссылки на свои комментарии."""
+    model = News
+    template_name = 'news/comment_form.html'
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super().get(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
+            # Без ESI ссылки на свои комментарии уже есть в самой странице.
+            if getattr(self.request, 'esi', False):
+                context['own_comments'] = self.object.comment_set.filter(
+                    author=self.request.user
+                ).only('id', 'text')
         return context
 
 
+class ArchivedNewsDetail(ReplicaReadMixin, generic.DetailView):
+    """Архивная новость: готовый снимок страницы, без комментирования."""
+    model = ArchivedNews
+    template_name = 'news/archived.html'
+    context_object_name = 'news'
+
+
 class NewsComment(
         LoginRequiredMixin,
+        ThrottleMixin,
+        CachedNewsMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
     model = News
+    throttle_scope = 'comment'
     form_class = CommentForm
     template_name = 'news/detail.html'
 
@@ -60,45 +207,136 @@ class NewsComment(
         comment.news = self.object
         comment.author = self.request.user
         comment.save()
+        publish_comment(comment)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
+
+
+class CommentReply(
+        LoginRequiredMixin,
+        ThrottleMixin,
+        generic.detail.SingleObjectMixin,
+        generic.FormView
+):
+    """Ответ на комментарий."""
+    model = Comment
+    queryset = Comment.objects.select_related('news', 'author')
+    throttle_scope = 'comment'
+    form_class = CommentForm
+    template_name = 'news/reply.html'
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super().post(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        reply = form.save(commit=False)
+        reply.reply_to(self.object)
+        reply.author = self.request.user
+        reply.save()
+        publish_comment(reply)
+        return HttpResponseRedirect(
+            reverse('news:detail', kwargs={'pk': reply.news_id})
+            + f'#comment-{reply.pk}'
+        )
+
+
+class CommentStreamFallback(generic.View):
+    """
+    Поток комментариев под WSGI.
+
+    Сам поток обслуживает ``news.live.comment_stream`` под ASGI. Ответ
+    204 говорит EventSource больше не переподключаться.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
 
 
 class NewsDetailView(generic.View):
 
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        """Новости нет в рабочей таблице — ищем её в архиве."""
+        try:
+            return NewsDetail.as_view()(request, *args, **kwargs)
+        except Http404:
+            return ArchivedNewsDetail.as_view()(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
         view = NewsComment.as_view()
         return view(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
-    """Базовый класс для работы с комментариями."""
+class CommentBase(LoginRequiredMixin, ThrottleMixin):
+    """
+    Базовый класс для работы с комментариями.
+
+    Страницы подтверждения читают комментарий вместе с новостью одним
+    запросом. Запись читает только ``news_id`` для адреса перехода и
+    выполняется одной командой UPDATE или DELETE с условием на автора.
+    """
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
         return self.model.objects.filter(author=self.request.user)
 
+    def get_object(self, queryset=None):
+        """Комментарий с новостью: шаблону нужен её заголовок."""
+        if queryset is None:
+            queryset = self.get_queryset().select_related('news')
+        return super().get_object(queryset)
+
+    def get_own_comment(self):
+        """Свой комментарий, из которого загружен только ``news_id``."""
+        return self.get_object(self.get_queryset().only('news_id'))
+
+    def get_own_queryset(self):
+        """Условие для записи: этот комментарий и этот автор."""
+        return self.get_queryset().filter(pk=self.object.pk)
+
 
 class CommentUpdate(CommentBase, generic.UpdateView):
     """Редактирование комментария."""
     template_name = 'news/edit.html'
     form_class = CommentForm
+    throttle_scope = 'comment'
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_own_comment()
+        # Без instance: форме не нужен прежний текст.
+        form = self.form_class(data=request.POST)
+        if form.is_valid():
+            return self.form_valid(form)
+        return self.form_invalid(form)
+
+    def form_valid(self, form):
+        text = form.cleaned_data['text']
+        if not self.get_own_queryset().update(
+            text=text, text_html=render_comment(text)
+        ):
+            raise Http404
+        return HttpResponseRedirect(self.get_success_url())
 
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_own_comment()
+        self.get_own_queryset().delete()
+        return HttpResponseRedirect(self.get_success_url())
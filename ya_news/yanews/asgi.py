@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Модели импортируются только после настройки Django.
+from news.live import CommentStreamRouter  # noqa: E402
+
+# Поток новых комментариев (SSE) обслуживается без Django, в цикле событий.
+application = CommentStreamRouter(django_application)
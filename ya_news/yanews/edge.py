@@ -0,0 +1,153 @@
+"""
+Кеширующий прокси с ESI для проверки страниц без nginx и varnish.
+
+``EdgeCache`` ведёт себя как общий кеш перед приложением: хранит ответы
+с ``Cache-Control: public`` столько, сколько разрешают ``s-maxage`` или
+``max-age``, учитывает ``Vary`` и собирает фрагменты ``<esi:include>``
+отдельными запросами к приложению с куками пользователя.
+"""
+import io
+import re
+import threading
+import time
+from collections import Counter, namedtuple
+
+from django.utils.cache import cc_delim_re
+
+ESI_INCLUDE = re.compile(rb'<esi:include\s+src="([^"]+)"\s*/>')
+CACHE_DIRECTIVE = re.compile(r'^\s*([\w-]+)(?:=(\d+))?\s*$')
+
+Entry = namedtuple('Entry', ('expires', 'status', 'headers', 'body'))
+
+
+def cache_lifetime(headers):
+    """Сколько секунд общий кеш может хранить ответ; 0 — нельзя."""
+    if 'set-cookie' in headers:
+        return 0
+    directives = {}
+    for part in headers.get('cache-control', '').split(','):
+        match = CACHE_DIRECTIVE.match(part)
+        if match:
+            directives[match.group(1).lower()] = match.group(2)
+    if (
+        'public' not in directives
+        or directives.keys() & {'private', 'no-store', 'no-cache'}
+    ):
+        return 0
+    lifetime = directives.get('s-maxage') or directives.get('max-age')
+    return int(lifetime or 0)
+
+
+class EdgeCache:
+    """WSGI-обёртка, которая кеширует ответы приложения, как прокси."""
+
+    def __init__(self, application, capability='ESI/1.0'):
+        self.application = application
+        self.capability = capability
+        self.entries = {}
+        self.vary = {}
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        environ = {
+            **environ,
+            'HTTP_SURROGATE_CAPABILITY': f'edge="{self.capability}"',
+        }
+        # ESI собирается по несжатому HTML; сжимать — уже задача прокси.
+        environ.pop('HTTP_ACCEPT_ENCODING', None)
+        status, headers, body, cache = self.lookup(environ)
+        if headers.pop('surrogate-control', None):
+            body = self.expand(body, environ)
+        headers['content-length'] = str(len(body))
+        headers['x-cache'] = cache
+        start_response(status, list(headers.items()))
+        return [b'' if environ['REQUEST_METHOD'] == 'HEAD' else body]
+
+    def lookup(self, environ):
+        """Ответ из кеша или от приложения и метка HIT, MISS или PASS."""
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            self.count('pass')
+            return (*self.fetch(environ), 'PASS')
+        url = environ.get('PATH_INFO', '') + '?' + environ.get(
+            'QUERY_STRING', ''
+        )
+        with self.lock:
+            entry = self.entries.get(self.key(url, environ))
+        if entry and entry.expires > time.monotonic():
+            self.count('hit')
+            return entry.status, dict(entry.headers), entry.body, 'HIT'
+        status, headers, body = self.fetch(environ)
+        lifetime = cache_lifetime(headers)
+        vary = [
+            name.strip().lower()
+            for name in cc_delim_re.split(headers.get('vary', ''))
+            if name.strip()
+        ]
+        if not lifetime or '*' in vary or not status.startswith('200'):
+            self.count('pass')
+            return status, headers, body, 'PASS'
+        self.count('miss')
+        with self.lock:
+            self.vary[url] = vary
+            self.entries[self.key(url, environ)] = Entry(
+                time.monotonic() + lifetime, status, dict(headers), body
+            )
+        return status, headers, body, 'MISS'
+
+    def key(self, url, environ):
+        """Ключ кеша: адрес и значения заголовков из Vary."""
+        return (url, *(
+            environ.get('HTTP_' + name.upper().replace('-', '_'))
+            for name in self.vary.get(url, ())
+        ))
+
+    def fetch(self, environ):
+        """Запрос к приложению: статус, заголовки и тело целиком."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = status
+            response['headers'] = {
+                name.lower(): value for name, value in headers
+            }
+
+        result = self.application(environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], body
+
+    def expand(self, body, environ):
+        """Подставляет фрагменты на место тегов ``<esi:include>``."""
+        def include(match):
+            path, _, query = match.group(1).decode().partition('?')
+            self.count('fragment')
+            status, headers, fragment, _ = self.lookup({
+                **environ,
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': query,
+                'CONTENT_LENGTH': '',
+                'wsgi.input': io.BytesIO(),
+            })
+            if headers.pop('surrogate-control', None):
+                fragment = self.expand(fragment, environ)
+            return fragment if status.startswith('200') else b''
+
+        return ESI_INCLUDE.sub(include, body)
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def hit_ratio(self):
+        """Доля страниц, отданных из кеша, без учёта фрагментов."""
+        with self.lock:
+            pages = (
+                self.stats['hit'] + self.stats['miss'] + self.stats['pass']
+                - self.stats['fragment']
+            )
+            return self.stats['hit'] / pages if pages else 0.0
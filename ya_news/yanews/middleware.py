@@ -0,0 +1,24 @@
+"""Middleware проекта."""
+
+
+class EdgeMiddleware:
+    """
+    Связь с кеширующим прокси, который умеет ESI.
+
+    Прокси сообщает о поддержке ESI заголовком Surrogate-Capability;
+    тогда шаблоны выводят фрагменты пользователя как ``<esi:include>``,
+    а ответ помечается заголовком Surrogate-Control, чтобы прокси их
+    собрал.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.esi = 'ESI/1.0' in request.META.get(
+            'HTTP_SURROGATE_CAPABILITY', ''
+        )
+        response = self.get_response(request)
+        if getattr(request, 'esi_included', False):
+            response['Surrogate-Control'] = 'content="ESI/1.0"'
+        return response
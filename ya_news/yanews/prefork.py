@@ -0,0 +1,21 @@
+"""
+Запуск YaNews на сервере с fork рабочих процессов (yacommon.prefork).
+
+Запуск: ``python -m yanews.prefork --workers 4 --bind 127.0.0.1:8000``.
+"""
+from yacommon.prefork import argument_parser, prepare, serve, set_workers
+
+
+def main(argv=None):
+    args = argument_parser(__doc__.split('\n')[1]).parse_args(argv)
+    # Проверка news.E001 сверяет кеши с числом рабочих процессов.
+    set_workers(args.workers)
+    # Проект загружается только после разбора аргументов: --help не ждёт.
+    from yanews.wsgi import application
+
+    prepare()
+    serve(application, args.bind, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = config('SECRET_KEY')
 
-DEBUG = True
+DEBUG = config('DEBUG', default=True, cast=bool)
+
+# Боевой профиль шаблонов: скомпилированные шаблоны кешируются в памяти.
+CACHED_TEMPLATES = config('CACHED_TEMPLATES', default=not DEBUG, cast=bool)
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
@@ -23,23 +26,37 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yacommon.middleware.RequestLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yacommon.middleware.CompressionMiddleware',
+    'yanews.middleware.EdgeMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'yacommon.routers.ReplicaPinMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
 
+# API отвечает на ошибку CSRF в JSON.
+CSRF_FAILURE_VIEW = 'yacommon.api.csrf_failure'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ] if CACHED_TEMPLATES else TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -53,6 +70,42 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+# Адрес memcached для кеша новостей, например 127.0.0.1:11211.
+NEWS_MEMCACHED = config('NEWS_MEMCACHED', default='')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Корзины ограничения частоты общие для рабочих процессов и узлов;
+    # таблицу создаёт manage.py createcachetable.
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'throttle_cache',
+    },
+    # Кеш новостей и страниц архива общий для всех рабочих процессов:
+    # сброс после правки новости должны увидеть все. Основной вариант —
+    # memcached из NEWS_MEMCACHED (нужен пакет pymemcache). Файловый кеш
+    # без него общий только для процессов одного узла и перед каждой
+    # записью перечисляет каталог, поэтому записи в нём живут недолго.
+    'news': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': NEWS_MEMCACHED,
+    } if NEWS_MEMCACHED else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config(
+            'NEWS_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'news')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+# Сколько рабочих процессов обслуживают проект; prefork ставит сам.
+# С несколькими процессами проверка news.E001 не пускает кеш новостей
+# в памяти процесса.
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -60,6 +113,24 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения — копии основной базы, которые обновляет
+# команда replicate. В тестах реплики указывают на тестовую основную базу.
+DATABASE_REPLICAS = config('DATABASE_REPLICAS', default=0, cast=int)
+REPLICA_DATABASES = [
+    f'replica{index}' for index in range(1, DATABASE_REPLICAS + 1)
+]
+for alias in REPLICA_DATABASES:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['yacommon.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи пользователь читает из основной базы.
+REPLICA_PIN_SECONDS = 10
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -76,9 +147,93 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+STATIC_ROOT = BASE_DIR / 'collected_static'
+
+# collectstatic сохраняет файлы с хешем в имени и сжатые копии.
+STATICFILES_STORAGE = 'yacommon.staticfiles.CompressedManifestStaticFilesStorage'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+# Сколько новостей показывать в блоке «Самые обсуждаемые».
+# Блок строится по часовой сводке: её обновляет команда rollup_comments.
+MOST_DISCUSSED_COUNT = 5
+# Сколько секунд сводка ждёт комментарии, зафиксированные с опозданием.
+ACTIVITY_ROLLUP_GRACE = 60
+
+# Сколько секунд общий кеш (прокси) может отдавать страницы из кеша.
+EDGE_CACHE_SECONDS = 60
+
+# Поток новых комментариев (SSE, только под ASGI): брокер рассылки,
+# интервал пустых сообщений, держащих соединение, и длина очереди
+# подписчика — отстающий подписчик пропускает события сверх неё.
+COMMENT_STREAM_BROKER = 'news.live.LocalBroker'
+COMMENT_STREAM_HEARTBEAT = 15
+COMMENT_STREAM_QUEUE_SIZE = 100
+
+# Сколько комментариев показывать на странице новости и ветки.
+COMMENTS_PAGE_SIZE = 50
+
+# Кеш новостей по id (news.cache): имя кеша в CACHES, время жизни
+# записи и её версии и версия формата записей — её меняют вместе
+# с полями News.
+NEWS_CACHE = 'news'
+NEWS_CACHE_TIMEOUT = 10 * 60
+NEWS_CACHE_VERSION = 1
+
+# Новости старше стольких дней команда archive_news переносит в архив.
+NEWS_ARCHIVE_AFTER_DAYS = 365
+
+# Архив по датам (news.periods): новостей на странице, сколько секунд
+# хранятся в NEWS_CACHE и в кеше прокси страницы прошедших периодов.
+NEWS_ARCHIVE_PAGE_SIZE = 20
+NEWS_ARCHIVE_CACHE_TIMEOUT = 60 * 60 * 24
+NEWS_ARCHIVE_EDGE_SECONDS = 60 * 60
+
+# Ограничение частоты запросов на запись: корзины токенов на пользователя
+# и на IP-адрес. Хранилище корзин — кеш THROTTLE_CACHE, общий для
+# процессов: кеш в БД, memcached или redis.
+THROTTLE_ENABLED = True
+THROTTLE_CACHE = 'throttle'
+THROTTLE_RATES = {
+    'comment': {'user': '10/m', 'ip': '60/m'},
+}
+
+# Сжатие ответов: более короткие ответы отдаются как есть.
+COMPRESSION_MIN_SIZE = 1024
+HTML_MINIFY = True
+
+# Журнал (yacommon.logs): JSON-строки в LOG_FILE или в stderr, их пишет
+# отдельный поток. LOG_SQL пишет в журнал каждый запрос к базе;
+# LOG_SAMPLING — доля записей частых логгеров, попадающая в журнал.
+LOG_FILE = config('LOG_FILE', default='')
+LOG_SQL = config('LOG_SQL', default=False, cast=bool)
+LOG_SAMPLING = {'yacommon.sql': 0.1}
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sample': {'()': 'yacommon.logs.SampleFilter', 'rates': LOG_SAMPLING},
+    },
+    'handlers': {
+        'json': {
+            'class': 'yacommon.logs.JsonQueueHandler',
+            'filename': LOG_FILE,
+            'filters': ['sample'],
+        },
+    },
+    'root': {'handlers': ['json'], 'level': 'WARNING'},
+    'loggers': {
+        'django': {'handlers': ['json'], 'level': 'INFO', 'propagate': False},
+        'yacommon': {'handlers': ['json'], 'level': 'INFO', 'propagate': False},
+        'yanews': {'handlers': ['json'], 'level': 'INFO', 'propagate': False},
+        'yacommon.sql': {'level': 'DEBUG' if LOG_SQL else 'INFO'},
+        'news': {'handlers': ['json'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -0,0 +1,112 @@
+"""
+JSON API заметок.
+
+Общее поведение — поля, курсоры, ошибки и CSRF в JSON — в yacommon.api.
+"""
+from http import HTTPStatus
+
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+
+from yacommon.api import ApiError, ApiMixin
+from yacommon.routers import ReplicaReadMixin
+
+from .autosave import Conflict, checksum, draft_key, get_buffer
+from .forms import NoteForm
+from .models import NoteConflict
+from .views import NoteBase
+
+
+class NoteFieldsMixin:
+    fields = {'id': 'id', 'title': 'title', 'text': 'text', 'slug': 'slug'}
+
+
+class NoteListApi(NoteFieldsMixin, ApiMixin, NoteBase, ReplicaReadMixin, View):
+    """Свои заметки: список и создание."""
+    throttle_scope = 'note'
+
+    def get(self, request):
+        return self.page(self.get_queryset().order_by('id'))
+
+    def post(self, request):
+        form = NoteForm(self.json_body())
+        self.validate(form)
+        note = form.save(commit=False)
+        note.author = request.user
+        note.save()
+        return self.detail(
+            self.get_queryset().filter(pk=note.pk), status=HTTPStatus.CREATED
+        )
+
+
+class NoteApi(NoteFieldsMixin, ApiMixin, NoteBase, View):
+    """Своя заметка: чтение, изменение и удаление."""
+    throttle_scope = 'note'
+    throttle_methods = ('PATCH',)
+
+    def get(self, request, slug):
+        get_buffer().flush(draft_key(request.user, slug))
+        return self.detail(self.get_queryset().filter(slug=slug))
+
+    def patch(self, request, slug):
+        # Изменения из запроса новее черновика.
+        get_buffer().discard(draft_key(request.user, slug))
+        note = self.get_queryset().filter(slug=slug).first()
+        if note is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        data = {'title': note.title, 'text': note.text, 'slug': note.slug}
+        form = NoteForm({**data, **self.json_body()}, instance=note)
+        self.validate(form)
+        try:
+            note = form.save()
+        except NoteConflict as conflict:
+            return JsonResponse({
+                'detail': str(conflict), 'text': conflict.text,
+            }, status=HTTPStatus.CONFLICT)
+        return self.detail(self.get_queryset().filter(pk=note.pk))
+
+    def delete(self, request, slug):
+        get_buffer().discard(draft_key(request.user, slug))
+        deleted, _ = self.get_queryset().filter(slug=slug).delete()
+        if not deleted:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+
+class NoteAutosaveApi(ApiMixin, NoteBase, View):
+    """
+    Автосохранение текста заметки.
+
+    Принимает ``{"base": crc32, "patches": [[начало, конец, вставка]],
+    "save": false}`` и отвечает crc32 нового текста. Правки копятся в
+    черновике и пишутся в заметку пачкой, ``"save": true`` пишет сразу.
+    """
+    throttle_scope = 'autosave'
+
+    def post(self, request, slug):
+        data = self.json_body()
+        patches = data.get('patches', [])
+        if not isinstance(patches, list):
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Ожидается список правок.')
+        key = draft_key(request.user, slug)
+        buffer = get_buffer()
+        try:
+            base = buffer.edit(
+                key, lambda: self.load(slug), data.get('base'), patches
+            )
+        except Conflict as conflict:
+            return JsonResponse({
+                'detail': str(conflict),
+                'text': conflict.text,
+                'base': checksum(conflict.text),
+            }, status=HTTPStatus.CONFLICT)
+        except ValueError as error:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(error))
+        saved = bool(data.get('save')) and buffer.flush(key) is not None
+        return JsonResponse({'base': base, 'saved': saved})
+
+    def load(self, slug):
+        note = self.get_queryset().filter(slug=slug).first()
+        if note is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        return note
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import pre_delete
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .shards import delete_author_notes
+        pre_delete.connect(
+            delete_author_notes,
+            sender=settings.AUTH_USER_MODEL,
+            dispatch_uid='delete_author_notes',
+        )
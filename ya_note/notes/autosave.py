@@ -0,0 +1,237 @@
+"""
+Автосохранение черновиков заметок.
+
+Редактор присылает правки текста каждые несколько секунд, но заметка
+сохраняется не после каждой: правки копятся в черновике ``NoteDraft``,
+а заметка записывается, когда автор NOTE_AUTOSAVE_DEBOUNCE секунд
+ничего не менял, но не реже раза в NOTE_AUTOSAVE_MAX_DELAY секунд
+непрерывного набора. Так на минуту набора приходится несколько версий
+заметки, а не версия на каждую правку. Явное сохранение и остановка
+рабочего процесса записывают всё сразу; черновик, который не успели
+записать, переживает перезапуск и дописывается фоновым потоком.
+
+Правка — список замен ``[начало, конец, вставка]`` в символах текста.
+Клиент передаёт ``base`` — crc32 текста, к которому относятся правки;
+если текст на сервере другой, правки отклоняются с текущим текстом.
+
+Черновик лежит в базе, в шарде заметки, поэтому соседние запросы
+одного редактора могут попасть в разные рабочие процессы: все они
+продолжают один черновик. Правка пишется условным UPDATE по версии
+черновика, а запись в заметку — по тексту, от которого он начат.
+Если заметку за это время изменили, черновик помечается устаревшим,
+и следующая правка клиента получает конфликт с текстом из базы.
+Форма, PATCH в API и пакетные операции удаляют черновики заметок,
+которые они меняют.
+"""
+import logging
+import threading
+import zlib
+from datetime import timedelta
+from functools import lru_cache, reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import (
+    IntegrityError, OperationalError, connections, router, transaction
+)
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Note, NoteDraft, record_revisions
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз правка перечитывает черновик, который параллельно
+# изменил другой запрос.
+EDIT_ATTEMPTS = 3
+
+
+def draft_key(user, slug):
+    return user.pk, slug
+
+
+def key_filter(*keys):
+    return reduce(or_, (
+        Q(note__author_id=author_id, note__slug=slug)
+        for author_id, slug in keys
+    ))
+
+
+def checksum(text):
+    return zlib.crc32(text.encode())
+
+
+class Conflict(Exception):
+    """Правки относятся не к тому тексту, что есть на сервере."""
+
+    def __init__(self, text):
+        super().__init__('Текст заметки изменился.')
+        self.text = text
+
+
+def apply_patches(text, patches):
+    """Применяет замены по очереди; каждая — к результату предыдущей."""
+    for patch in patches:
+        if (
+            not isinstance(patch, list) or len(patch) != 3
+            or not isinstance(patch[2], str)
+            or not all(isinstance(index, int) for index in patch[:2])
+            or not 0 <= patch[0] <= patch[1] <= len(text)
+        ):
+            raise ValueError(f'Некорректная правка: {patch!r}')
+        start, end, insert = patch
+        text = text[:start] + insert + text[end:]
+    return text
+
+
+class DraftBuffer:
+    """
+    Правки черновиков и их запись в заметки.
+
+    Черновики хранятся в базе, а не в объекте: у процесса свой буфер
+    только ради фонового потока, который записывает их по таймеру.
+    """
+
+    def __init__(self):
+        self.stopped = threading.Event()
+
+    def get_draft(self, key):
+        return NoteDraft.objects.filter(
+            key_filter(key)
+        ).select_related('note').first()
+
+    def edit(self, key, load, base, patches, now=None):
+        """
+        Применяет правки к черновику и возвращает crc32 нового текста.
+
+        load() читает заметку из базы, если черновика ещё нет.
+        """
+        now = now or timezone.now()
+        for _ in range(EDIT_ATTEMPTS):
+            draft = self.get_draft(key)
+            if draft is not None and draft.stale:
+                # Клиент узнает о конфликте по тексту из базы.
+                NoteDraft.objects.filter(
+                    pk=draft.pk, version=draft.version
+                ).delete()
+                draft = None
+            if draft is None:
+                note = load()
+                text = note.text
+            else:
+                text = draft.text
+            if checksum(text) != base:
+                raise Conflict(text)
+            text = apply_patches(text, patches)
+            if draft is not None:
+                if NoteDraft.objects.filter(
+                    pk=draft.pk, version=draft.version
+                ).update(text=text, version=F('version') + 1, changed=now):
+                    return checksum(text)
+                continue
+            try:
+                with transaction.atomic(
+                    using=router.db_for_write(Note, instance=note)
+                ):
+                    NoteDraft.objects.create(
+                        note=note, base=note.text, text=text,
+                        changed=now, dirty_since=now,
+                    )
+            except IntegrityError:
+                # Черновик начал параллельный запрос: правим его.
+                continue
+            return checksum(text)
+        raise Conflict(self.get_draft(key).text)
+
+    def save(self, draft):
+        """Записывает черновик в заметку; возвращает заметку или None."""
+        note = draft.note
+        using = router.db_for_write(Note, instance=note)
+        notes = Note.objects.using(using)
+        drafts = NoteDraft.objects.using(using).filter(pk=draft.pk)
+        try:
+            with transaction.atomic(using=using):
+                saved = notes.filter(pk=note.pk, text=draft.base).update(
+                    text=draft.text
+                )
+                if not saved:
+                    # Заметку изменили мимо черновика или его уже
+                    # записал другой процесс: тогда версия другая.
+                    if drafts.filter(version=draft.version).update(
+                        stale=True
+                    ):
+                        logger.warning('Черновик заметки %s устарел', note.pk)
+                    return None
+                note.text = draft.text
+                record_revisions([note], {note.pk: draft.base})
+                if not drafts.filter(version=draft.version).delete()[0]:
+                    # Пока писали, пришла новая правка: она продолжает
+                    # уже записанный текст.
+                    drafts.update(base=draft.text, dirty_since=timezone.now())
+        except OperationalError:
+            # База занята или недоступна: попробуем в следующий раз.
+            logger.warning('Черновик заметки %s не записан', note.pk)
+            return None
+        note._loaded_version = (note.title, note.text)
+        return note
+
+    def flush(self, key):
+        """Сохраняет черновик сразу; возвращает заметку или None."""
+        draft = self.get_draft(key)
+        if draft is None or draft.stale:
+            return None
+        return self.save(draft)
+
+    def discard(self, *keys):
+        """Удаляет черновики: их заменил текст из формы или запроса."""
+        if keys:
+            NoteDraft.objects.filter(key_filter(*keys)).delete()
+
+    def save_all(self, condition=Q()):
+        saved = 0
+        for alias in settings.NOTE_SHARD_DATABASES:
+            for draft in NoteDraft.objects.using(alias).filter(
+                condition, stale=False
+            ).select_related('note'):
+                saved += self.save(draft) is not None
+        return saved
+
+    def flush_due(self, now=None):
+        """Сохраняет черновики, которые пора записать; возвращает их число."""
+        now = now or timezone.now()
+        return self.save_all(
+            Q(changed__lte=now - timedelta(
+                seconds=settings.NOTE_AUTOSAVE_DEBOUNCE
+            ))
+            | Q(dirty_since__lte=now - timedelta(
+                seconds=settings.NOTE_AUTOSAVE_MAX_DELAY
+            ))
+        )
+
+    def flush_all(self):
+        return self.save_all()
+
+    def run(self):
+        """Цикл фонового потока записи."""
+        while not self.stopped.wait(settings.NOTE_AUTOSAVE_DEBOUNCE / 2):
+            try:
+                self.flush_due()
+            except Exception:
+                logger.exception('Ошибка записи черновиков')
+            finally:
+                connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.flush_all()
+
+
+@lru_cache(maxsize=None)
+def get_buffer():
+    """Буфер процесса; фоновый поток записи стартует вместе с ним."""
+    buffer = DraftBuffer()
+    if settings.NOTE_AUTOSAVE_BACKGROUND:
+        threading.Thread(
+            target=buffer.run, name='note-autosave', daemon=True
+        ).start()
+    return buffer
@@ -0,0 +1,512 @@
+"""
+Микробенчмарки приложения.
+
+Запускаются командой ``python manage.py benchmark [имя ...]``.
+Каждый бенчмарк — генератор пар (метрика, значение).
+"""
+import io
+import logging
+import random
+import re
+import tempfile
+import threading
+import time
+import timeit
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Sum
+from django.db.models.functions import Length
+from django.template.backends.django import DjangoTemplates
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from yacommon.compression import ENCODINGS
+from yacommon.logs import JsonFormatter, JsonQueueHandler, SampleFilter
+from yacommon.middleware import (
+    CompressionMiddleware, compression_stats, reset_compression_stats
+)
+from yacommon.staticfiles import StaticFilesApplication
+from yacommon.throttling import get_throttle_wait
+
+from .autosave import checksum, get_buffer
+from .models import Note, NoteRevision
+from .rendering import html_cache
+from .shards import temporary_shards
+from .views import NotesList
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """Регистрирует функцию как бенчмарк под её именем."""
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def per_call(func, number=1000, repeat=5):
+    """Лучшее время одного вызова func в микросекундах."""
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return best / number * 1e6
+
+
+def template_engines():
+    """Движки шаблонов проекта без кеширования и с кешированием."""
+    params = settings.TEMPLATES[0]
+    cached = [('django.template.loaders.cached.Loader',
+               settings.TEMPLATE_LOADERS)]
+    for label, loaders in (
+        ('uncached', settings.TEMPLATE_LOADERS),
+        ('cached', cached),
+    ):
+        yield label, DjangoTemplates({
+            'NAME': f'benchmark-{label}',
+            'DIRS': params['DIRS'],
+            'APP_DIRS': False,
+            'OPTIONS': {**params['OPTIONS'], 'loaders': loaders},
+        })
+
+
+def fetch(application, url, accept_encoding='', etag=None):
+    """Запрашивает файл у WSGI-приложения: (статус, байты тела, ETag)."""
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url,
+        'HTTP_ACCEPT_ENCODING': accept_encoding,
+    }
+    if etag:
+        environ['HTTP_IF_NONE_MATCH'] = etag
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = int(status.split()[0])
+        response['headers'] = dict(headers)
+
+    result = application(environ, start_response)
+    body = b''.join(result)
+    if hasattr(result, 'close'):
+        result.close()
+    return response['status'], len(body), response['headers']
+
+
+def measure_compression(view, url, user, **kwargs):
+    """Размер ответа до и после минификации и сжатия каждой кодировкой."""
+    middleware = CompressionMiddleware(
+        lambda request: view(request, **kwargs).render()
+    )
+
+    def get(accept_encoding=''):
+        request = RequestFactory().get(
+            url, HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        request.user = user
+        request.resolver_match = resolve(url)
+        return middleware(request)
+
+    with override_settings(HTML_MINIFY=False):
+        yield 'original', f'{len(get().content)} B'
+    yield 'minified', f'{len(get().content)} B'
+    for encoding in ENCODINGS:
+        reset_compression_stats()
+        for _ in range(20):
+            response = get(encoding)
+        for url_name, stat in compression_stats().items():
+            yield f'{url_name} {encoding}', (
+                '{} B, ratio {:.1f}x, {:.0f} µs CPU'.format(
+                    len(response.content), stat['ratio'], stat['cpu_us']
+                )
+            )
+
+
+@benchmark
+def throttle():
+    """Накладные расходы проверки частоты запросов на один запрос."""
+    request = RequestFactory().post('/')
+    request.user = get_user_model()(pk=1)
+    rates = {'bench': {'user': '1000000000/s', 'ip': '1000000000/s'}}
+    with override_settings(THROTTLE_RATES=rates):
+        yield 'throttle check', '{:.1f} µs'.format(
+            per_call(lambda: get_throttle_wait(request, 'bench'))
+        )
+
+
+@benchmark
+def templates():
+    """Время отрисовки списка из ста заметок."""
+    author = get_user_model().objects.create(username='benchmark')
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст. ' * 50,
+             slug=f'benchmark-{index}', author=author)
+        for index in range(100)
+    )
+    request = RequestFactory().get('/')
+    request.user = author
+    view = NotesList(request=request)
+    context = {'object_list': list(view.get_queryset())}
+    for label, engine in template_engines():
+        yield f'notes/list.html ({label})', '{:.0f} µs'.format(per_call(
+            lambda: engine.get_template('notes/list.html').render(
+                context, request
+            ),
+            number=50,
+        ))
+
+
+@benchmark
+def static():
+    """Запросы и байты на загрузку страницы: до и после сборки статики."""
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    with tempfile.TemporaryDirectory() as root, override_settings(
+            STATIC_ROOT=root, DEBUG=False
+    ):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        application = StaticFilesApplication(None, root=root)
+        html = render_to_string('notes/home.html', request=request).encode()
+        urls = re.findall(
+            r'(?:href|src)="({}[^"]+)"'.format(re.escape(settings.STATIC_URL)),
+            html.decode(),
+        )
+        first = [fetch(application, url, 'gzip, br') for url in urls]
+        plain = sum(fetch(application, url)[1] for url in urls)
+        revalidated = [
+            fetch(application, url, 'gzip, br', headers['ETag'])
+            for url, (_, _, headers) in zip(urls, first)
+            if 'immutable' not in headers['Cache-Control']
+        ]
+    yield 'local assets per page', len(urls)
+    yield 'without caching: requests per view', 1 + len(urls)
+    yield 'without caching: bytes per view', len(html) + plain
+    yield 'first visit: requests', 1 + len(first)
+    yield 'first visit: bytes', len(html) + sum(size for _, size, _ in first)
+    yield 'repeat visit: requests', 1 + len(revalidated)
+    yield 'repeat visit: bytes', len(html) + sum(
+        size for _, size, _ in revalidated
+    )
+
+
+@benchmark
+def compression():
+    """Сжатие списка из двухсот заметок."""
+    author = get_user_model().objects.create(username='benchmark')
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст',
+             slug=f'benchmark-{index}', author=author)
+        for index in range(200)
+    )
+    yield from measure_compression(
+        NotesList.as_view(), reverse('notes:list'), author
+    )
+
+
+@benchmark
+def api():
+    """Пропускная способность JSON API в сравнении со списком заметок."""
+    author = get_user_model().objects.create(username='benchmark')
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст. ' * 50,
+             slug=f'benchmark-{index}', author=author)
+        for index in range(100)
+    )
+    client = Client(SERVER_NAME='localhost')
+    client.force_login(author)
+    pages = (
+        ('notes:list', reverse('notes:list')),
+        ('api notes', reverse('notes:api_list') + '?limit=100'),
+    )
+    for label, url in pages:
+        yield label, '{:.0f} req/s'.format(
+            1e6 / per_call(lambda: client.get(url), number=20, repeat=3)
+        )
+
+
+@benchmark
+def revisions():
+    """Тысяча правок длинной заметки: место и время восстановления."""
+    author = get_user_model().objects.create(username='benchmark')
+    lines = [f'Строка {index} длинной заметки.\n' for index in range(200)]
+    note = Note.objects.create(
+        title='Заметка', text=''.join(lines), slug='benchmark', author=author
+    )
+    count = 1000
+    started = time.perf_counter()
+    for index in range(1, count):
+        lines[random.randrange(len(lines))] = f'Правка {index}.\n'
+        note.text = ''.join(lines)
+        note.save()
+    saved = time.perf_counter() - started
+    full = sum(
+        len(note.get_revision(number)[1]) for number in range(1, count + 1)
+    )
+    stored = NoteRevision.objects.filter(note=note).aggregate(
+        size=Sum(Length('data'))
+    )['size']
+    yield 'revisions', count
+    yield 'save with revision', '{:.0f} µs'.format(saved / count * 1e6)
+    yield 'full copies', f'{full} chars'
+    yield 'stored', f'{stored} chars'
+    yield 'storage ratio', '{:.1f}x'.format(full / stored)
+    yield 'reconstruct latest', '{:.0f} µs'.format(
+        per_call(lambda: note.get_revision(count), number=100)
+    )
+    worst = settings.NOTE_SNAPSHOT_EVERY * (
+        (count - 1) // settings.NOTE_SNAPSHOT_EVERY
+    )
+    yield f'reconstruct worst case ({worst})', '{:.0f} µs'.format(
+        per_call(lambda: note.get_revision(worst), number=100)
+    )
+
+
+@benchmark
+def shards(writers=8, notes_per_writer=100):
+    """Запись заметок параллельными авторами в 1, 4 и 8 шардов."""
+    def write(author_id):
+        try:
+            for number in range(notes_per_writer):
+                Note.objects.create(
+                    title=f'Заметка {number}',
+                    text='Текст заметки. ' * 20,
+                    slug=f'note-{author_id}-{number}',
+                    author_id=author_id,
+                )
+        finally:
+            connections.close_all()
+
+    for count in (1, 4, 8):
+        with tempfile.TemporaryDirectory() as directory, temporary_shards(
+            Path(directory), count
+        ):
+            threads = [
+                threading.Thread(target=write, args=(author_id,))
+                for author_id in range(1, writers + 1)
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        yield f'{count} shards', '{:.0f} notes/s'.format(
+            writers * notes_per_writer / elapsed
+        )
+
+
+def markdown_text(size):
+    """Текст в Markdown не короче size символов."""
+    section = (
+        '## Раздел {0}\n\n'
+        'Абзац с **важным** словом, `кодом` и [ссылкой](https://example.com).'
+        '\n\n- пункт первый\n- пункт *второй*\n\n'
+        '```\nprint({0})\n```\n\n'
+    )
+    parts, length, number = [], 0, 0
+    while length < size:
+        number += 1
+        parts.append(section.format(number))
+        length += len(parts[-1])
+    return ''.join(parts)
+
+
+@benchmark
+def markdown(size=100 * 1024, count=10):
+    """Страница заметки в 100 КБ Markdown: с кешем HTML и без него."""
+    author = get_user_model().objects.create(username='benchmark')
+    text = markdown_text(size)
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text=f'# {index}\n\n{text}',
+             slug=f'benchmark-{index}', author=author)
+        for index in range(count)
+    )
+    client = Client(SERVER_NAME='localhost')
+    client.force_login(author)
+    urls = [
+        reverse('notes:detail', args=(f'benchmark-{index}',))
+        for index in range(count)
+    ]
+
+    def view_all(clear):
+        for url in urls:
+            if clear:
+                html_cache().clear()
+            client.get(url)
+
+    yield 'note size', f'{len(text) // 1024} KiB'
+    view_all(clear=False)
+    for label, clear in (('uncached', True), ('cached', False)):
+        yield label, '{:.1f} ms'.format(
+            per_call(lambda: view_all(clear), number=3, repeat=3)
+            / count / 1000
+        )
+    yield 'cache size', '{:.1f} MiB'.format(html_cache().size / 2 ** 20)
+
+
+@benchmark
+def autosave(seconds=60, every=0.5):
+    """Минута набора с сохранением каждые полсекунды: записи в базу."""
+    author = get_user_model().objects.create(username='benchmark')
+    note = Note.objects.create(
+        title='Заметка', text='Текст заметки.\n' * 200, slug='benchmark',
+        author=author,
+    )
+    client = Client(SERVER_NAME='localhost')
+    client.force_login(author)
+    form_url = reverse('notes:edit', args=(note.slug,))
+    autosave_url = reverse('notes:api_autosave', args=(note.slug,))
+    start = timezone.now()
+    clock = [start]
+    ticks = int(seconds / every)
+
+    def writes(queries):
+        # Черновик меняется на каждую правку; считаем записи в заметки.
+        return sum(
+            query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+            and 'notes_notedraft' not in query['sql']
+            for query in queries
+        )
+
+    def form_save(text):
+        client.post(form_url, {
+            'title': note.title, 'text': text, 'slug': note.slug
+        })
+
+    def autosave_patch(text, previous):
+        client.post(autosave_url, {
+            'base': checksum(previous),
+            'patches': [[len(previous), len(previous), text[-1]]],
+        }, content_type='application/json')
+        get_buffer().flush_due()
+
+    for label, save in (('form post', form_save), ('autosave', None)):
+        text = note.text
+        with override_settings(
+            THROTTLE_ENABLED=False, NOTE_AUTOSAVE_BACKGROUND=False
+        ), mock.patch(
+            'notes.autosave.timezone.now', lambda: clock[0]
+        ), CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for tick in range(ticks):
+                clock[0] = start + timedelta(seconds=tick * every)
+                previous, text = text, text + 'абв'[tick % 3]
+                if save:
+                    save(text)
+                else:
+                    autosave_patch(text, previous)
+            elapsed = time.perf_counter() - started
+            # Пауза после набора: черновик дописывается по таймеру.
+            clock[0] = start + timedelta(seconds=seconds + 60)
+            get_buffer().flush_due()
+        note.refresh_from_db()
+        assert note.text == text
+        yield label, '{} requests, {} writes/min, {:.2f} ms/request'.format(
+            ticks, writes(queries.captured_queries) * 60 // seconds,
+            elapsed / ticks * 1000,
+        )
+
+
+class SlowStream(io.StringIO):
+    """Поток, запись в который ждёт delay секунд, как сетевой диск."""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return super().write(text)
+
+
+@contextmanager
+def project_log(handler, sql=False):
+    """Журнал проекта временно пишется только в handler."""
+    logger = logging.getLogger('yacommon')
+    sql_logger = logging.getLogger('yacommon.sql')
+    handlers, level = logger.handlers, sql_logger.level
+    logger.handlers = [handler]
+    sql_logger.setLevel(logging.DEBUG if sql else logging.INFO)
+    try:
+        yield
+    finally:
+        logger.handlers = handlers
+        sql_logger.setLevel(level)
+
+
+@benchmark
+def logs(slow_write=0.0005):
+    """
+    Цена журнала на запрос к API: без него, с записью в потоке запроса
+    и через очередь — в файл и в медленный поток. С медленным потоком
+    запись в потоке запроса добавляет задержку каждой записи к ответу,
+    а очередь — нет: её дописывает поток записи, drain — остаток после
+    последнего запроса.
+    """
+    author = get_user_model().objects.create(username='benchmark')
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст',
+             slug=f'benchmark-{index}', author=author)
+        for index in range(20)
+    )
+    url = reverse('notes:api_list')
+    directory = tempfile.TemporaryDirectory()
+    path = f'{directory.name}/log.json'
+
+    def sync_handler(slow):
+        if slow:
+            handler = logging.StreamHandler(SlowStream(slow_write))
+        else:
+            handler = logging.FileHandler(path, encoding='utf-8')
+        handler.setFormatter(JsonFormatter())
+        return handler
+
+    def queue_handler(slow, rate=1):
+        if slow:
+            handler = JsonQueueHandler(stream=SlowStream(slow_write))
+        else:
+            handler = JsonQueueHandler(path)
+        handler.addFilter(SampleFilter({'yacommon.sql': rate}))
+        return handler
+
+    without_log = [
+        name for name in settings.MIDDLEWARE
+        if name != 'yacommon.middleware.RequestLogMiddleware'
+    ]
+    with override_settings(MIDDLEWARE=without_log):
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(author)
+        yield 'no log', '{:.0f} µs'.format(
+            per_call(lambda: client.get(url), number=200)
+        )
+    client = Client(SERVER_NAME='localhost')
+    client.force_login(author)
+    for sink, slow in (('file', False), ('slow sink', True)):
+        for label, make_handler, sql in (
+            ('requests, sync', sync_handler, False),
+            ('requests, queue', queue_handler, False),
+            ('requests + sql, sync', sync_handler, True),
+            ('requests + sql, queue', queue_handler, True),
+            ('requests + 10% sql, queue',
+             lambda slow: queue_handler(slow, 0.1), True),
+        ):
+            handler = make_handler(slow)
+            with project_log(handler, sql):
+                elapsed = per_call(lambda: client.get(url), number=200)
+            if isinstance(handler, JsonQueueHandler):
+                # Очередь дописывается уже после ответов: это время
+                # платит поток записи, а не запросы.
+                start = time.perf_counter()
+                handler.stop()
+                label += ' (drain {:.0f} ms, dropped {})'.format(
+                    (time.perf_counter() - start) * 1000, handler.dropped
+                )
+            handler.close()
+            yield f'{sink}: {label}', '{:.0f} µs'.format(elapsed)
+    directory.cleanup()
@@ -0,0 +1,30 @@
+"""Проверки настроек приложения для ``manage.py check``."""
+from django.conf import settings
+from django.core import checks
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_throttle_cache(app_configs, **kwargs):
+    """
+    С несколькими рабочими процессами корзины ограничения частоты должны
+    быть общими: иначе у каждого процесса своя корзина, и лимит
+    умножается на число процессов.
+    """
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    backend = settings.CACHES[settings.THROTTLE_CACHE]['BACKEND']
+    if workers > 1 and backend in LOCAL_CACHES:
+        return [
+            checks.Error(
+                f'Кеш {settings.THROTTLE_CACHE!r} ({backend}) живёт в памяти '
+                f'процесса, а рабочих процессов {workers}.',
+                hint='Укажите кеш в базе, memcached или redis: '
+                     'в них cache.add атомарен.',
+                id='notes.E001',
+            )
+        ]
+    return []
@@ -0,0 +1,37 @@
+"""
+Построчные дельты между версиями текста.
+
+Дельта — JSON-список замен ``[начало, конец, новые строки]`` в строках
+старой версии; совпадающие участки в ней не хранятся.
+"""
+import difflib
+import json
+
+
+def make_delta(old, new):
+    """Дельта, превращающая текст old в new."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, False)
+    return json.dumps(
+        [
+            [start, end, new_lines[new_start:new_end]]
+            for tag, start, end, new_start, new_end in matcher.get_opcodes()
+            if tag != 'equal'
+        ],
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+
+
+def apply_delta(text, delta):
+    """Применяет дельту к тексту."""
+    lines = text.splitlines(keepends=True)
+    result = []
+    position = 0
+    for start, end, replacement in json.loads(delta):
+        result.extend(lines[position:start])
+        result.extend(replacement)
+        position = end
+    result.extend(lines[position:])
+    return ''.join(result)
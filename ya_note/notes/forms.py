@@ -1,11 +1,12 @@
-from pytils.translit import slugify
-
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
 
-from .models import Note
+from .models import Note, NoteIndex, slugify
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+BATCH_LIMIT_WARNING = 'За один раз можно обработать не больше {} заметок.'
 
 
 class NoteForm(forms.ModelForm):
@@ -22,8 +23,78 @@ class NoteForm(forms.ModelForm):
         if not slug:
             title = cleaned_data.get('title')
             slug = slugify(title)[:100]
-        if Note.objects.filter(
+        # Индекс хранит slug заметок всех шардов.
+        if NoteIndex.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+
+class SlugListField(forms.Field):
+    """Список slug выбранных заметок."""
+    widget = forms.CheckboxSelectMultiple
+
+    def to_python(self, value):
+        return list(dict.fromkeys(value or ()))
+
+    def validate(self, value):
+        super().validate(value)
+        for slug in value:
+            validate_slug(slug)
+        if len(value) > settings.NOTES_BATCH_LIMIT:
+            raise ValidationError(
+                BATCH_LIMIT_WARNING.format(settings.NOTES_BATCH_LIMIT)
+            )
+
+
+class NoteBatchDeleteForm(forms.Form):
+    """Выбор нескольких заметок."""
+    slugs = SlugListField(label='Заметки')
+
+
+class NoteBatchUpdateForm(NoteBatchDeleteForm):
+    """Изменение нескольких заметок за раз."""
+    title = forms.CharField(
+        label='Новый заголовок', max_length=100, required=False
+    )
+    find = forms.CharField(
+        label='Найти в тексте', required=False, strip=False
+    )
+    replace = forms.CharField(
+        label='Заменить на', required=False, strip=False
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('title') and not cleaned_data.get('find'):
+            raise ValidationError(
+                'Укажите новый заголовок или текст для замены.'
+            )
+        return cleaned_data
+
+
+class NoteBulkCreateForm(forms.Form):
+    """Создание нескольких заметок с общим текстом."""
+    titles = forms.CharField(
+        label='Заголовки',
+        widget=forms.Textarea,
+        help_text='По одному заголовку в строке',
+    )
+    text = forms.CharField(label='Текст', widget=forms.Textarea)
+
+    def clean_titles(self):
+        titles = [
+            line.strip()
+            for line in self.cleaned_data['titles'].splitlines()
+            if line.strip()
+        ]
+        if len(titles) > settings.NOTES_BATCH_LIMIT:
+            raise ValidationError(
+                BATCH_LIMIT_WARNING.format(settings.NOTES_BATCH_LIMIT)
+            )
+        if any(len(title) > 100 for title in titles):
+            raise ValidationError(
+                'Заголовок не может быть длиннее 100 символов.'
+            )
+        return titles
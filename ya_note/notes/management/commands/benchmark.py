@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from notes.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = 'Запускает бенчмарки; созданные ими данные откатываются.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help='Имена бенчмарков: ' + ', '.join(BENCHMARKS),
+        )
+
+    def handle(self, *args, names, **options):
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(
+                'Неизвестные бенчмарки: ' + ', '.join(sorted(unknown))
+            )
+        for name in names or BENCHMARKS:
+            with transaction.atomic():
+                for metric, value in BENCHMARKS[name]():
+                    self.stdout.write(f'{name}: {metric}: {value}')
+                transaction.set_rollback(True)
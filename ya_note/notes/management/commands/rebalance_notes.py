@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from notes.shards import misplaced_authors, move_author
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит заметки авторов в их шарды после изменения NOTE_SHARDS. '
+        'Запускайте, пока запись заметок остановлена.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, кого нужно перенести.',
+        )
+
+    def handle(self, *args, dry_run, **options):
+        authors = notes = 0
+        for author_id, source, target in list(misplaced_authors()):
+            authors += 1
+            if dry_run:
+                self.stdout.write(f'Автор {author_id}: {source} -> {target}')
+                continue
+            notes += move_author(author_id, source, target)
+        if dry_run:
+            self.stdout.write(f'Нужно перенести авторов: {authors}')
+        else:
+            self.stdout.write(
+                f'Перенесено авторов: {authors}, заметок: {notes}'
+            )
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notes.models import Note
+from notes.rendering import warm_note_html
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее рендерит Markdown заметок в кеш NOTE_HTML_CACHE. '
+        'Кеш в памяти процесса так заполняет только сервер '
+        'yanote.prefork --warm-note-html; отдельная команда полезна '
+        'с общим кешем: файловым, memcached или redis.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько заметок читать и класть в кеш за раз.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        total = rendered = 0
+        for alias in settings.NOTE_SHARD_DATABASES:
+            notes = Note.objects.using(alias).only('id', 'text').iterator(
+                chunk_size=batch_size
+            )
+            batch = []
+            for note in notes:
+                batch.append(note)
+                if len(batch) == batch_size:
+                    rendered += warm_note_html(batch)
+                    total += len(batch)
+                    batch = []
+            rendered += warm_note_html(batch)
+            total += len(batch)
+        self.stdout.write(
+            f'Заметок: {total}, отрендерено: {rendered}, '
+            'остальные уже в кеше.'
+        )
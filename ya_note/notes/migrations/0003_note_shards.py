@@ -0,0 +1,48 @@
+# Generated by Django 3.2.15 on 2026-10-19 09:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def index_notes(apps, schema_editor):
+    """Заносит в индекс заметки, созданные до шардирования."""
+    connection = schema_editor.connection
+    if 'notes_note' not in connection.introspection.table_names():
+        return
+    Note = apps.get_model('notes', 'Note')
+    NoteIndex = apps.get_model('notes', 'NoteIndex')
+    NoteIndex.objects.using(connection.alias).bulk_create(
+        NoteIndex(id=note_id, slug=slug, author_id=author_id)
+        for note_id, slug, author_id in Note.objects.using(
+            connection.alias
+        ).values_list('id', 'slug', 'author_id').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0002_note_revisions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('author_id', models.BigIntegerField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(
+            index_notes, migrations.RunPython.noop,
+            hints={'model_name': 'noteindex'},
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.15 on 2026-10-19 10:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteDraft',
+            fields=[
+                ('note', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='draft', serialize=False, to='notes.note')),
+                ('base', models.TextField()),
+                ('text', models.TextField()),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('changed', models.DateTimeField()),
+                ('dirty_since', models.DateTimeField()),
+                ('stale', models.BooleanField(default=False)),
+            ],
+        ),
+    ]
@@ -1,7 +1,111 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
 from django.conf import settings
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Q
+
+from .diffs import apply_delta, make_delta
+from .rendering import note_html
+
+
+def slugify(text):
+    """Slug из текста; pytils загружается при первом вызове, а не на старте."""
+    from pytils.translit import slugify
+    return slugify(text)
+
+
+class NoteConflict(Exception):
+    """Текст заметки в базе изменился после того, как её прочитали."""
+
+    def __init__(self, text):
+        super().__init__('Заметку изменили после загрузки.')
+        self.text = text
+
+
+class NoteIndex(models.Model):
+    """
+    Индекс заметок всех шардов.
+
+    Выдаёт заметкам id, общие для всех шардов, и держит уникальность
+    slug: ограничение unique у Note.slug действует только в своей базе.
+    """
+    slug = models.SlugField(max_length=100, unique=True)
+    author_id = models.BigIntegerField()
+
+
+def register_notes(notes):
+    """Заносит новые заметки в индекс и выдаёт им id."""
+    NoteIndex.objects.bulk_create(
+        NoteIndex(slug=note.slug, author_id=note.author_id) for note in notes
+    )
+    # SQLite не возвращает id из bulk_create, поэтому перечитываем.
+    ids = dict(NoteIndex.objects.filter(
+        slug__in=[note.slug for note in notes]
+    ).values_list('slug', 'id'))
+    for note in notes:
+        note.id = ids[note.slug]
+
+
+def unregister_notes(notes):
+    """Убирает из индекса заметки, которые так и не записались в шард."""
+    NoteIndex.objects.filter(
+        id__in=[note.id for note in notes if note.id is not None]
+    ).delete()
+    for note in notes:
+        note.id = None
+
+
+class NoteQuerySet(models.QuerySet):
+    """
+    Запросы к заметкам, согласованные с индексом NoteIndex.
+
+    Без явного using() новые заметки записываются в шард своего автора.
+    """
 
-from pytils.translit import slugify
+    def create(self, **kwargs):
+        note = self.model(**kwargs)
+        self._for_write = True
+        note.save(force_insert=True, using=self._db)
+        return note
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        new = [note for note in objs if note.id is None]
+        for note, slug in zip(
+            [note for note in new if not note.slug],
+            allocate_slugs([note.title for note in new if not note.slug]),
+        ):
+            note.slug = slug
+        if new:
+            register_notes(new)
+        try:
+            if self._db is not None:
+                return super().bulk_create(objs, *args, **kwargs)
+            shards = defaultdict(list)
+            for note in objs:
+                shards[router.db_for_write(Note, instance=note)].append(note)
+            for alias, notes in shards.items():
+                super(NoteQuerySet, self.using(alias)).bulk_create(
+                    notes, *args, **kwargs
+                )
+        except Exception:
+            # Индекс в другой базе: его записи не откатятся вместе с шардом.
+            unregister_notes(new)
+            raise
+        return objs
+
+    def delete(self, unindex=True):
+        """Удаляет заметки; unindex=False — только из этой базы."""
+        ids = list(self.values_list('id', flat=True)) if unindex else ()
+        result = super().delete()
+        if ids:
+            NoteIndex.objects.filter(id__in=ids).delete()
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
 
 
 class Note(models.Model):
@@ -26,13 +130,230 @@ class Note(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        # Пользователи в основной базе, заметки — в шардах.
+        db_constraint=False,
     )
 
+    objects = NoteQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    @property
+    def text_html(self):
+        """Текст в Markdown, отрендеренный в HTML."""
+        return note_html(self)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженную версию, чтобы при сохранении взять дельту."""
+        note = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        note._loaded_version = (loaded.get('title'), loaded.get('text'))
+        note._loaded_slug = loaded.get('slug')
+        return note
+
     def save(self, *args, **kwargs):
+        """
+        Сохраняет заметку и её новую версию.
+
+        Существующая заметка блокируется до конца транзакции, и дельта
+        версии считается от текста в базе, а не от загруженного. Если
+        этот текст уже не тот, что был загружен, сохранение отклоняется
+        с NoteConflict: иначе чужая правка пропала бы молча.
+        """
         if not self.slug:
             max_slug_length = self._meta.get_field('slug').max_length
             self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        if self.id is None:
+            # Занятый slug не даст создать запись в индексе.
+            self.id = NoteIndex.objects.create(
+                slug=self.slug, author_id=self.author_id
+            ).id
+            kwargs['force_insert'] = True
+            try:
+                super().save(*args, **kwargs)
+            except Exception:
+                NoteIndex.objects.filter(id=self.id).delete()
+                self.id = None
+                raise
+            record_revisions([self])
+        else:
+            using = kwargs.get('using') or router.db_for_write(
+                Note, instance=self
+            )
+            with transaction.atomic(using=using):
+                stored = Note.objects.using(using).select_for_update().filter(
+                    pk=self.pk
+                ).values_list('title', 'text').first()
+                loaded_text = getattr(self, '_loaded_version', (None,))[-1]
+                if (
+                    stored is not None and loaded_text is not None
+                    and stored[1] != loaded_text
+                ):
+                    raise NoteConflict(stored[1])
+                if self.slug != getattr(self, '_loaded_slug', None):
+                    NoteIndex.objects.filter(id=self.id).update(
+                        slug=self.slug
+                    )
+                super().save(*args, **kwargs)
+                if stored != (self.title, self.text):
+                    record_revisions(
+                        [self], {self.id: stored[1]} if stored else None
+                    )
+        self._loaded_slug = self.slug
+        self._loaded_version = (self.title, self.text)
+
+    def delete(self, *args, **kwargs):
+        note_id = self.id
+        result = super().delete(*args, **kwargs)
+        NoteIndex.objects.filter(id=note_id).delete()
+        return result
+
+    def get_revision(self, number):
+        """
+        Заголовок и текст версии number.
+
+        Читается ближайший снимок не новее нужной версии и дельты после
+        него — одним запросом, не больше NOTE_SNAPSHOT_EVERY строк.
+        """
+        snapshot = self.revisions.filter(
+            number__lte=number, is_snapshot=True
+        ).order_by('-number').values('number')[:1]
+        revisions = list(self.revisions.filter(
+            number__gte=models.Subquery(snapshot), number__lte=number
+        ))
+        if not revisions or revisions[-1].number != number:
+            raise NoteRevision.DoesNotExist
+        text = ''
+        for revision in revisions:
+            text = (
+                revision.data if revision.is_snapshot
+                else apply_delta(text, revision.data)
+            )
+        return revisions[-1].title, text
+
+
+class NoteRevision(models.Model):
+    """
+    Версия заметки.
+
+    Обычно хранится только дельта к предыдущей версии; каждая
+    NOTE_SNAPSHOT_EVERY-я версия — полный текст, чтобы восстановление
+    не проходило по всей истории.
+    """
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField()
+    title = models.CharField(max_length=100)
+    is_snapshot = models.BooleanField(default=False)
+    data = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('number',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'), name='unique_note_revision'
+            ),
+        )
+
+
+class NoteDraft(models.Model):
+    """
+    Несохранённые правки заметки из автосохранения.
+
+    Лежит в шарде заметки и общий для всех процессов: version растёт
+    с каждой правкой, и правка записывается, только если черновик
+    не изменился с момента чтения. base — текст заметки, от которого
+    начат черновик; stale — в заметке уже другой текст.
+    """
+    note = models.OneToOneField(
+        Note,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='draft',
+    )
+    base = models.TextField()
+    text = models.TextField()
+    version = models.PositiveIntegerField(default=1)
+    changed = models.DateTimeField()
+    dirty_since = models.DateTimeField()
+    stale = models.BooleanField(default=False)
+
+
+def record_revisions(notes, previous_texts=None):
+    """
+    Сохраняет текущие версии заметок одним запросом на вставку.
+
+    previous_texts сопоставляет id заметки с текстом её предыдущей
+    версии; если текст неизвестен, версия сохраняется снимком.
+    """
+    if not notes:
+        return []
+    # Все заметки одного вызова — одного автора, значит, одного шарда.
+    revisions = NoteRevision.objects.using(
+        router.db_for_write(Note, instance=notes[0])
+    )
+    previous_texts = previous_texts or {}
+    last_numbers = dict(
+        revisions.filter(note__in=notes)
+        .values('note_id').annotate(last=models.Max('number'))
+        .values_list('note_id', 'last')
+    )
+    new_revisions = []
+    for note in notes:
+        last = last_numbers.get(note.id, 0)
+        previous_text = previous_texts.get(note.id)
+        data = note.text
+        is_snapshot = (
+            previous_text is None
+            or last % settings.NOTE_SNAPSHOT_EVERY == 0
+        )
+        if not is_snapshot:
+            delta = make_delta(previous_text, note.text)
+            # Дельта длиннее текста не экономит место.
+            if len(delta) < len(note.text):
+                data = delta
+            else:
+                is_snapshot = True
+        new_revisions.append(NoteRevision(
+            note=note,
+            number=last + 1,
+            title=note.title,
+            is_snapshot=is_snapshot,
+            data=data,
+        ))
+    return revisions.bulk_create(new_revisions)
+
+
+def allocate_slugs(titles, chunk_size=200):
+    """
+    Уникальные slug для пачки заголовков.
+
+    Занятые slug с нужными префиксами читаются из индекса заметок всех
+    шардов одним запросом на каждые chunk_size заголовков, дальше номера
+    подбираются в памяти.
+    """
+    max_length = Note._meta.get_field('slug').max_length
+    bases = [slugify(title)[:max_length] or 'note' for title in titles]
+    prefixes = sorted({base[:max_length - 10] for base in bases})
+    taken = set()
+    for start in range(0, len(prefixes), chunk_size):
+        taken.update(NoteIndex.objects.filter(reduce(or_, (
+            Q(slug__startswith=prefix)
+            for prefix in prefixes[start:start + chunk_size]
+        ))).values_list('slug', flat=True))
+    slugs = []
+    for base in bases:
+        slug, index = base, 1
+        while slug in taken:
+            index += 1
+            suffix = f'-{index}'
+            slug = base[:max_length - len(suffix)] + suffix
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
@@ -0,0 +1,105 @@
+"""
+Markdown в заметках и кеш готового HTML.
+
+Рендеринг длинной заметки стоит десятки миллисекунд, поэтому HTML
+хранится в кеше NOTE_HTML_CACHE под ключом из id заметки и хеша текста:
+изменённый текст просто не найдёт старую запись. NoteUpdate удаляет
+прежнюю запись сразу, чтобы она не занимала место до вытеснения.
+
+HTML-теги в тексте экранируются, а ссылки допускаются только на
+адреса из SAFE_URL_SCHEMES.
+"""
+import hashlib
+import html
+import threading
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.safestring import mark_safe
+
+SAFE_URL_SCHEMES = ('', 'http', 'https', 'mailto')
+
+_local = threading.local()
+
+
+def build_markdown():
+    """Markdown без HTML-тегов; модуль грузится при первом рендеринге."""
+    import markdown
+    from markdown.extensions import Extension
+    from markdown.treeprocessors import Treeprocessor
+
+    class SafeLinks(Treeprocessor):
+        def run(self, root):
+            for element in root.iter():
+                for attribute in ('href', 'src'):
+                    url = element.get(attribute)
+                    if url is not None and not is_safe_url(url):
+                        element.set(attribute, '')
+
+    class NoRawHtml(Extension):
+        def extendMarkdown(self, md):  # noqa: N802
+            md.preprocessors.deregister('html_block')
+            md.inlinePatterns.deregister('html')
+            md.treeprocessors.register(SafeLinks(md), 'safe_links', 0)
+
+    return markdown.Markdown(extensions=[
+        *settings.NOTE_MARKDOWN_EXTENSIONS, NoRawHtml()
+    ])
+
+
+def is_safe_url(url):
+    """
+    Схема адреса, как её прочитает браузер, — из SAFE_URL_SCHEMES.
+
+    Markdown оставляет ссылки на символы в адресе как есть, а браузер
+    их раскрывает: ``javascript&#58;`` — это ``javascript:``. Числовым
+    ссылкам в адресе делать нечего, такие адреса отбрасываются.
+    """
+    if '&#' in url:
+        return False
+    scheme = urlsplit(''.join(html.unescape(url).split()).lower()).scheme
+    return scheme in SAFE_URL_SCHEMES
+
+
+def render_markdown(text):
+    """HTML заметки. Экземпляр Markdown свой у каждого потока."""
+    if not hasattr(_local, 'markdown'):
+        _local.markdown = build_markdown()
+    return _local.markdown.reset().convert(text)
+
+
+def html_cache():
+    return caches[settings.NOTE_HTML_CACHE]
+
+
+def html_cache_key(note_id, text):
+    digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    return f'note-html:{note_id}:{digest}'
+
+
+def note_html(note):
+    """HTML заметки из кеша; при промахе рендерит и кладёт в кеш."""
+    key = html_cache_key(note.id, note.text)
+    html = html_cache().get(key)
+    if html is None:
+        html = render_markdown(note.text)
+        html_cache().set(key, html, None)
+    return mark_safe(html)
+
+
+def forget_note_html(note_id, text):
+    """Удаляет из кеша HTML прежней версии текста."""
+    html_cache().delete(html_cache_key(note_id, text))
+
+
+def warm_note_html(notes):
+    """Рендерит заметки, которых нет в кеше; возвращает их число."""
+    keys = {html_cache_key(note.id, note.text): note for note in notes}
+    cached = html_cache().get_many(keys)
+    rendered = {
+        key: render_markdown(note.text)
+        for key, note in keys.items() if key not in cached
+    }
+    html_cache().set_many(rendered, None)
+    return len(rendered)
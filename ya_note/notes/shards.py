@@ -0,0 +1,212 @@
+"""
+Шардирование заметок по автору.
+
+Все заметки автора и их версии лежат в одной базе из
+``NOTE_SHARD_DATABASES``: её номер — стабильный хеш ``author_id`` по
+модулю числа шардов. Представления с ``AuthorShardMixin`` работают
+в шарде текущего пользователя, поэтому запросы вида
+``Note.objects.filter(author=user)`` сами уходят в нужную базу.
+Запросы без экземпляра вне ``use_shard`` идут в основную базу.
+
+Индекс ``NoteIndex`` в ``NOTE_INDEX_DATABASE`` выдаёт заметкам id и
+держит уникальность slug по всем шардам: ограничение unique у
+``Note.slug`` действует только внутри одной базы.
+"""
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections, transaction
+
+from .models import Note, NoteDraft, NoteIndex, NoteRevision
+
+SHARDED_MODELS = ('notes.note', 'notes.noterevision', 'notes.notedraft')
+INDEX_MODEL = 'notes.noteindex'
+
+_shard = ContextVar('note_shard', default=None)
+
+
+def shard_for(author_id, shards=None):
+    """База шарда автора: crc32, в отличие от hash(), стабилен."""
+    shards = shards or settings.NOTE_SHARD_DATABASES
+    return shards[zlib.crc32(str(author_id).encode()) % len(shards)]
+
+
+@contextmanager
+def use_shard(alias):
+    """Внутри блока заметки без явной базы читаются и пишутся в alias."""
+    token = _shard.set(alias)
+    try:
+        yield
+    finally:
+        _shard.reset(token)
+
+
+def instance_shard(instance):
+    """Шард, которому принадлежит экземпляр или его заметки."""
+    label = instance._meta.label_lower
+    if label == 'notes.note':
+        return shard_for(instance.author_id)
+    if label == settings.AUTH_USER_MODEL.lower():
+        return shard_for(instance.pk)
+    # Версия и черновик заметки лежат там же, где заметка.
+    return instance._state.db
+
+
+class AuthorShardRouter:
+    """Заметки — в шард автора, индекс — в базу индекса."""
+
+    @staticmethod
+    def label(model):
+        # У таблицы кеша в базе (DatabaseCache) урезанные _meta без
+        # label_lower.
+        return f'{model._meta.app_label}.{model._meta.model_name}'
+
+    def shard(self, model, hints):
+        label = self.label(model)
+        if label == INDEX_MODEL:
+            return settings.NOTE_INDEX_DATABASE
+        if label not in SHARDED_MODELS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None:
+            return instance_shard(instance)
+        return _shard.get()
+
+    def db_for_read(self, model, **hints):
+        shard = self.shard(model, hints)
+        if shard == 'default' and self.label(model) != INDEX_MODEL:
+            # Основную базу могут обслужить реплики: решает следующий
+            # маршрутизатор.
+            return None
+        return shard
+
+    def db_for_write(self, model, **hints):
+        return self.shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Автор в основной базе, его заметки — в шарде.
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'notes' and model_name == 'noteindex':
+            return db == settings.NOTE_INDEX_DATABASE
+        if db == 'default':
+            return None
+        if db in settings.NOTE_SHARD_DATABASES:
+            return app_label == 'notes'
+        if db == settings.NOTE_INDEX_DATABASE:
+            return False
+        return None
+
+
+class AuthorShardMixin:
+    """Выполняет представление в шарде текущего пользователя."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+        with use_shard(shard_for(request.user.pk)):
+            response = super().dispatch(request, *args, **kwargs)
+            # Шаблон выполняет ленивые запросы, поэтому рендерим здесь.
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+def delete_author_notes(sender, instance, **kwargs):
+    """
+    Перед удалением пользователя удаляет его заметки из всех шардов и
+    из индекса.
+
+    Каскад Django видит только заметки в базе пользователя и удаляет их
+    мимо индекса, так что slug остались бы заняты навсегда. Шарды
+    обходятся все: после смены NOTE_SHARDS заметки могут лежать
+    в прежнем.
+    """
+    for alias in settings.NOTE_SHARD_DATABASES:
+        Note.objects.using(alias).filter(
+            author_id=instance.pk
+        ).delete(unindex=False)
+    NoteIndex.objects.filter(author_id=instance.pk).delete()
+
+
+def misplaced_authors(shards=None):
+    """Пары (автор, текущий шард, нужный шард) для переноса."""
+    shards = shards or settings.NOTE_SHARD_DATABASES
+    for alias in shards:
+        authors = (
+            Note.objects.using(alias)
+            .values_list('author_id', flat=True).distinct()
+        )
+        for author_id in authors:
+            target = shard_for(author_id, shards)
+            if target != alias:
+                yield author_id, alias, target
+
+
+def move_author(author_id, source, target):
+    """
+    Переносит заметки автора с версиями и черновиками из source в target.
+
+    id заметок общие для всех шардов, поэтому переносятся как есть, а
+    индекс не меняется. Повторный запуск после сбоя безопасен: копия
+    в target сначала удаляется.
+    """
+    notes = list(Note.objects.using(source).filter(author_id=author_id))
+    revisions = list(
+        NoteRevision.objects.using(source).filter(note__author_id=author_id)
+    )
+    for revision in revisions:
+        revision.pk = None
+    drafts = list(
+        NoteDraft.objects.using(source).filter(note__author_id=author_id)
+    )
+    with transaction.atomic(using=target):
+        Note.objects.using(target).filter(
+            id__in=[note.id for note in notes]
+        ).delete(unindex=False)
+        Note.objects.using(target).bulk_create(notes)
+        NoteRevision.objects.using(target).bulk_create(revisions)
+        NoteDraft.objects.using(target).bulk_create(drafts)
+    with transaction.atomic(using=source):
+        Note.objects.using(source).filter(
+            author_id=author_id
+        ).delete(unindex=False)
+    return len(notes)
+
+
+@contextmanager
+def temporary_shards(directory, count):
+    """
+    Индекс и count шардов в файлах SQLite в directory.
+
+    Базы подключаются на лету и получают схему миграциями; нужны
+    бенчмаркам и тестам, которым мало баз из настроек.
+    """
+    from django.test import override_settings
+
+    index = f'{directory.name}-index'
+    shards = [f'{directory.name}-shard{number}' for number in range(count)]
+    for alias in (index, *shards):
+        connections.databases[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(directory / f'{alias}.sqlite3'),
+        }
+    try:
+        with override_settings(
+            NOTE_INDEX_DATABASE=index, NOTE_SHARD_DATABASES=shards
+        ):
+            for alias in (index, *shards):
+                # run_syncdb — для тестовых настроек без миграций.
+                call_command(
+                    'migrate', database=alias, run_syncdb=True, verbosity=0
+                )
+            yield shards
+    finally:
+        for alias in (index, *shards):
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
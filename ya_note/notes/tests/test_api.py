@@ -0,0 +1,140 @@
+import base64
+import json
+from http import HTTPStatus
+
+from django.test import Client
+from django.urls import reverse
+
+from notes.models import Note
+from notes.tests.conftest import BaseTest
+
+
+class TestNotesApi(BaseTest):
+    """Тесты JSON API заметок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Добавляет URL-адреса API."""
+        super().setUpTestData()
+        cls.api_list_url = reverse('notes:api_list')
+        cls.api_note_url = reverse('notes:api_note', args=(cls.note.slug,))
+
+    def test_list_contains_only_own_notes(self):
+        """Проверяем, что список содержит только свои заметки."""
+        for client, expected in (
+            (self.author_client, [self.note.slug]),
+            (self.reader_client, []),
+        ):
+            with self.subTest(client=client):
+                response = client.get(self.api_list_url, {'fields': 'slug'})
+                self.assertEqual(
+                    [row['slug'] for row in response.json()['results']],
+                    expected
+                )
+
+    def test_cursor_pagination(self):
+        """Проверяем обход всех заметок по курсору."""
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'note-{index}', author=self.author)
+            for index in range(5)
+        )
+        slugs = []
+        params = {'limit': 2, 'fields': 'slug'}
+        while True:
+            page = self.author_client.get(self.api_list_url, params).json()
+            slugs += [row['slug'] for row in page['results']]
+            if page['next'] is None:
+                break
+            params['cursor'] = page['next']
+        self.assertEqual(
+            slugs, list(Note.objects.order_by('id').values_list(
+                'slug', flat=True
+            ))
+        )
+
+    def test_bad_page_params_are_rejected(self):
+        """Проверяем ответ 400 на некорректные limit и курсор."""
+        def encode(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode())
+
+        for params in (
+            {'limit': 0},
+            {'limit': -1},
+            {'cursor': encode(1)},
+            {'cursor': encode([1])},
+            {'cursor': encode(['x'])},
+            {'cursor': encode(['1', '2'])},
+            {'cursor': encode(['99999999999999999999'])},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(
+                    self.author_client.get(
+                        self.api_list_url, params
+                    ).status_code,
+                    HTTPStatus.BAD_REQUEST
+                )
+
+    def test_anonymous_user_gets_401(self):
+        """Проверяем ответ 401 для анонимного пользователя."""
+        self.assertEqual(
+            self.client.get(self.api_list_url).status_code,
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_csrf_failure_is_json(self):
+        """Проверяем 403 в JSON без токена CSRF и запись с токеном."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.author)
+        patch = json.dumps({'title': 'Новый заголовок'})
+        response = client.patch(
+            self.api_note_url, patch, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertIn('CSRF', response.json()['detail'])
+        token = client.get(self.api_note_url).cookies['csrftoken'].value
+        response = client.patch(
+            self.api_note_url, patch, content_type='application/json',
+            HTTP_X_CSRFTOKEN=token,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_create_note_with_duplicate_slug(self):
+        """Проверяем, что API проверяет уникальность slug, как и форма."""
+        response = self.author_client.post(
+            self.api_list_url,
+            {'title': 'Заметка', 'text': 'Текст', 'slug': self.note.slug},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('slug', response.json()['detail'])
+
+    def test_author_can_patch_and_delete_note(self):
+        """Проверяем изменение и удаление своей заметки."""
+        response = self.author_client.patch(
+            self.api_note_url, {'text': 'Новый текст'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(Note.objects.get().text, 'Новый текст')
+        self.assertEqual(
+            self.author_client.delete(self.api_note_url).status_code,
+            HTTPStatus.NO_CONTENT
+        )
+        self.assertFalse(Note.objects.exists())
+
+    def test_reader_cant_touch_note_of_author(self):
+        """Проверяем, что чужая заметка для API не существует."""
+        for method in (
+            self.reader_client.get,
+            self.reader_client.patch,
+            self.reader_client.delete,
+        ):
+            with self.subTest(method=method):
+                self.assertEqual(
+                    method(
+                        self.api_note_url, content_type='application/json'
+                    ).status_code,
+                    HTTPStatus.NOT_FOUND
+                )
+        self.assertTrue(Note.objects.filter(pk=self.note.pk).exists())
@@ -0,0 +1,193 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.autosave import (
+    Conflict, DraftBuffer, checksum, draft_key, get_buffer
+)
+from notes.models import Note, NoteDraft
+from notes.tests.conftest import BaseTest
+
+
+class TestAutosave(BaseTest):
+    """Тесты автосохранения черновиков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.autosave_url = reverse('notes:api_autosave', args=('test-slug',))
+
+    def autosave(self, base, patches, client=None, **data):
+        return (client or self.author_client).post(
+            self.autosave_url,
+            json.dumps({'base': base, 'patches': patches, **data}),
+            content_type='application/json',
+        )
+
+    def stored_text(self):
+        self.note.refresh_from_db()
+        return self.note.text
+
+    def test_patches_are_coalesced_in_draft(self):
+        """Проверяем, что правки копятся в черновике и пишутся разом."""
+        base = checksum('Текст')
+        for patch in ([5, 5, ' один'], [10, 10, ' два'], [0, 5, 'Мой']):
+            response = self.autosave(base, [patch])
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            base = response.json()['base']
+        self.assertEqual(self.stored_text(), 'Текст')
+        self.assertEqual(base, checksum('Мой один два'))
+        get_buffer().flush_all()
+        self.assertEqual(self.stored_text(), 'Мой один два')
+
+    def test_save_writes_immediately(self):
+        """Проверяем явное сохранение."""
+        response = self.autosave(checksum('Текст'), [[0, 5, 'Новый']],
+                                 save=True)
+        self.assertIs(response.json()['saved'], True)
+        self.assertEqual(self.stored_text(), 'Новый')
+        self.assertFalse(NoteDraft.objects.exists())
+
+    def test_conflict_returns_current_text(self):
+        """Проверяем, что правки к чужой версии текста отклоняются."""
+        response = self.autosave(checksum('Другой'), [[0, 0, 'А']])
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(response.json()['text'], 'Текст')
+        response = self.autosave(
+            response.json()['base'], [[0, 5, 'Целиком']]
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_invalid_patch_is_rejected(self):
+        """Проверяем правку за пределами текста."""
+        response = self.autosave(checksum('Текст'), [[3, 100, 'x']])
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertFalse(NoteDraft.objects.exists())
+
+    def test_reader_cant_autosave_others_note(self):
+        """Проверяем, что чужую заметку не сохранить."""
+        response = self.autosave(
+            checksum('Текст'), [[0, 0, 'А']], client=self.reader_client
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_edit_form_shows_draft_and_form_wins(self):
+        """Проверяем, что форма видит черновик, а её текст главнее."""
+        self.autosave(checksum('Текст'), [[5, 5, ' черновика']])
+        response = self.author_client.get(self.edit_url)
+        self.assertEqual(
+            response.context['form'].initial['text'], 'Текст черновика'
+        )
+        self.autosave(checksum('Текст черновика'), [[0, 0, 'Ещё ']])
+        self.author_client.post(self.edit_url, data={
+            'title': self.note.title, 'text': 'Из формы', 'slug': 'test-slug'
+        })
+        get_buffer().flush_all()
+        self.assertEqual(self.stored_text(), 'Из формы')
+
+    def test_debounce_and_max_delay(self):
+        """Проверяем, когда черновик попадает в базу при наборе."""
+        buffer = DraftBuffer()
+        key = draft_key(self.author, 'test-slug')
+        text = 'Текст'
+        start = timezone.now()
+        writes = []
+        with self.settings(
+            NOTE_AUTOSAVE_DEBOUNCE=5, NOTE_AUTOSAVE_MAX_DELAY=30
+        ):
+            # Минуту печатает без пауз, потом молчит.
+            for second in range(90):
+                now = start + timedelta(seconds=second)
+                if second < 60:
+                    buffer.edit(
+                        key, self.load, checksum(text),
+                        [[len(text), len(text), '.']], now=now,
+                    )
+                    text += '.'
+                if buffer.flush_due(now=now):
+                    writes.append(second)
+        self.assertEqual(writes, [30, 61])
+        self.assertEqual(self.stored_text(), text)
+
+    def test_stop_saves_pending_drafts(self):
+        """Проверяем запись черновиков при остановке процесса."""
+        buffer = DraftBuffer()
+        buffer.edit(
+            draft_key(self.author, 'test-slug'), lambda: self.note,
+            checksum('Текст'), [[0, 5, 'Сохранится']],
+        )
+        buffer.stop()
+        self.assertEqual(self.stored_text(), 'Сохранится')
+
+    def load(self):
+        return Note.objects.get(pk=self.note.pk)
+
+    def test_buffers_of_two_processes_share_draft(self):
+        """
+        Проверяем, что правки через буферы разных процессов продолжают
+        один черновик, а записывает его любой из них.
+        """
+        key = draft_key(self.author, 'test-slug')
+        buffers = DraftBuffer(), DraftBuffer()
+        text = 'Текст'
+        for number in range(6):
+            base = buffers[number % 2].edit(
+                key, self.load, checksum(text),
+                [[len(text), len(text), str(number)]],
+            )
+            text += str(number)
+            self.assertEqual(base, checksum(text))
+            if number == 2:
+                buffers[0].flush(key)
+                self.assertEqual(self.stored_text(), text)
+        self.assertEqual(NoteDraft.objects.get().version, 3)
+        buffers[1].flush_all()
+        self.assertEqual(self.stored_text(), 'Текст012345')
+        self.assertFalse(NoteDraft.objects.exists())
+        self.assertEqual(self.note.revisions.count(), 3)
+
+    def test_stale_draft_is_kept_unsaved(self):
+        """
+        Проверяем, что черновик не затирает текст, записанный мимо него,
+        а следующая правка получает конфликт.
+        """
+        key = draft_key(self.author, 'test-slug')
+        first, second = DraftBuffer(), DraftBuffer()
+        lines = ''.join(f'Строка {line}\n' for line in range(10))
+        self.note.text = lines
+        self.note.save()
+        end = len(lines)
+        base = first.edit(
+            key, self.load, checksum(lines), [[end, end, 'Ещё\n']]
+        )
+        Note.objects.filter(pk=self.note.pk).update(text='Первая\n' + lines)
+        second.flush_all()
+        self.assertEqual(self.stored_text(), 'Первая\n' + lines)
+        self.assertIs(NoteDraft.objects.get().stale, True)
+        with self.assertRaises(Conflict) as conflict:
+            first.edit(key, self.load, base, [[0, 0, 'x']])
+        self.assertEqual(conflict.exception.text, self.stored_text())
+        self.assertFalse(NoteDraft.objects.exists())
+
+    def test_batch_update_discards_draft(self):
+        """Проверяем, что черновик не отменяет пакетную замену."""
+        self.autosave(checksum('Текст'), [[5, 5, '!']])
+        self.author_client.post(reverse('notes:batch_edit'), {
+            'slugs': ['test-slug'], 'find': 'Текст', 'replace': 'Замена',
+        })
+        get_buffer().flush_all()
+        self.assertEqual(self.stored_text(), 'Замена')
+
+    def test_patch_discards_draft(self):
+        """Проверяем, что PATCH в API не перезаписывается черновиком."""
+        self.autosave(checksum('Текст'), [[5, 5, '!']])
+        self.author_client.patch(
+            reverse('notes:api_note', args=('test-slug',)),
+            json.dumps({'text': 'Из API'}),
+            content_type='application/json',
+        )
+        get_buffer().flush_all()
+        self.assertEqual(self.stored_text(), 'Из API')
@@ -0,0 +1,109 @@
+import re
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note, allocate_slugs
+from notes.tests.conftest import BaseTest
+
+
+def count_statements(queries, verb, table='notes_note'):
+    """Число SQL-запросов verb к таблице table."""
+    pattern = re.compile(rf'{verb} (FROM |INTO )?"{table}"')
+    return sum(bool(pattern.match(query['sql'])) for query in queries)
+
+
+class TestBatchOperations(BaseTest):
+    """Тесты пакетных операций над заметками."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создает заметки автора и читателя."""
+        super().setUpTestData()
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='старый текст',
+                 slug=f'note-{index}', author=cls.author)
+            for index in range(5)
+        )
+        cls.reader_note = Note.objects.create(
+            title='Чужая', text='старый текст', slug='foreign',
+            author=cls.reader
+        )
+        cls.slugs = ['note-0', 'note-1', 'note-2', 'foreign']
+        cls.batch_add_url = reverse('notes:batch_add')
+        cls.batch_edit_url = reverse('notes:batch_edit')
+        cls.batch_delete_url = reverse('notes:batch_delete')
+
+    def test_batch_pages_list_own_notes(self):
+        """Проверяем, что на странице выбора только свои заметки."""
+        response = self.author_client.get(self.batch_delete_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'note-0')
+        self.assertNotContains(response, 'foreign')
+
+    def test_batch_delete_is_single_statement(self):
+        """
+        Проверяем, что выбранные заметки удаляются одним
+        запросом, а чужая заметка остаётся.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.post(
+                self.batch_delete_url, {'slugs': self.slugs}
+            )
+        self.assertEqual(count_statements(queries, 'DELETE'), 1)
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertFalse(
+            Note.objects.filter(slug__in=self.slugs[:3]).exists()
+        )
+        self.assertTrue(Note.objects.filter(slug='foreign').exists())
+
+    def test_batch_update_is_single_statement(self):
+        """Проверяем изменение заголовка и замену текста одним запросом."""
+        with CaptureQueriesContext(connection) as queries:
+            self.author_client.post(self.batch_edit_url, {
+                'slugs': self.slugs,
+                'title': 'Общий заголовок',
+                'find': 'старый',
+                'replace': 'новый',
+            })
+        self.assertEqual(count_statements(queries, 'UPDATE'), 1)
+        for note in Note.objects.filter(slug__in=self.slugs[:3]):
+            with self.subTest(slug=note.slug):
+                self.assertEqual(note.title, 'Общий заголовок')
+                self.assertEqual(note.text, 'новый текст')
+        self.reader_note.refresh_from_db()
+        self.assertEqual(self.reader_note.text, 'старый текст')
+
+    def test_batch_update_needs_changes(self):
+        """Проверяем, что пустое изменение не проходит валидацию."""
+        response = self.author_client.post(
+            self.batch_edit_url, {'slugs': self.slugs}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['form'].non_field_errors())
+
+    def test_bulk_create_allocates_unique_slugs(self):
+        """Проверяем, что совпадающие заголовки получают разные slug."""
+        with CaptureQueriesContext(connection) as queries:
+            self.author_client.post(self.batch_add_url, {
+                'titles': 'Заметка 0\nЗаметка 0\nДругая',
+                'text': 'Общий текст',
+            })
+        self.assertEqual(count_statements(queries, 'INSERT'), 1)
+        self.assertEqual(
+            set(Note.objects.filter(text='Общий текст').values_list(
+                'slug', flat=True
+            )),
+            {'zametka-0', 'zametka-0-2', 'drugaya'}
+        )
+
+    def test_allocate_slugs_skips_taken(self):
+        """Проверяем, что занятые slug пропускаются."""
+        Note.objects.create(
+            title='Тест', text='Текст', slug='test', author=self.author
+        )
+        self.assertEqual(
+            allocate_slugs(['Тест', 'Тест']), ['test-2', 'test-3']
+        )
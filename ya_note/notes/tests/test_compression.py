@@ -0,0 +1,41 @@
+import gzip
+
+from notes.models import Note
+from notes.tests.conftest import BaseTest
+from yacommon.middleware import minify_html
+
+
+class TestCompression(BaseTest):
+    """Тесты сжатия и минификации ответов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создает достаточно заметок для крупной страницы списка."""
+        super().setUpTestData()
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'note-{index}', author=cls.author)
+            for index in range(50)
+        )
+
+    def test_notes_list_is_gzipped(self):
+        """Проверяем, что крупная страница сжимается для gzip-клиента."""
+        response = self.author_client.get(
+            self.list_url, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(
+            self.note.title, gzip.decompress(response.content).decode()
+        )
+
+    def test_html_is_minified(self):
+        """Проверяем, что в HTML не остаётся отступов."""
+        response = self.author_client.get(self.list_url)
+        self.assertNotIn('\n  ', response.content.decode())
+
+    def test_minify_keeps_textarea(self):
+        """Проверяем, что содержимое textarea не меняется."""
+        html = '<p>\n  a</p>\n<textarea>\n  b\n</textarea>'
+        self.assertEqual(
+            minify_html(html), '<p>\na</p>\n<textarea>\n  b\n</textarea>'
+        )
@@ -0,0 +1,79 @@
+import json
+import logging
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.urls import reverse
+
+from notes.tests.conftest import BaseTest
+from yacommon.logs import JsonQueueHandler, SampleFilter
+
+
+class TestRequestLog(BaseTest):
+    """Тесты журнала запросов."""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'log.json'
+        self.handler = JsonQueueHandler(filename=self.path)
+        self.addCleanup(self.handler.stop)
+        patcher = mock.patch.object(
+            logging.getLogger('yacommon'), 'handlers', [self.handler]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_log(self):
+        self.handler.stop()
+        return [
+            json.loads(line) for line in self.path.read_text().splitlines()
+        ]
+
+    def test_request_line(self):
+        """Проверяем поля строки журнала о запросе."""
+        self.author_client.get(
+            reverse('notes:detail', args=(self.note.slug,)),
+            HTTP_X_REQUEST_ID='request-1',
+        )
+        [line] = self.read_log()
+        self.assertEqual(line['logger'], 'yacommon.requests')
+        self.assertEqual(line['request_id'], 'request-1')
+        self.assertEqual(line['url_name'], 'notes:detail')
+        self.assertEqual(line['user_id'], self.author.pk)
+        self.assertEqual(line['status'], 200)
+        self.assertGreater(line['queries'], 0)
+        self.assertGreaterEqual(line['duration_ms'], line['db_ms'])
+
+    def test_sql_is_sampled_per_request(self):
+        """Проверяем, что запросы к базе пишутся все или ни одного."""
+        sql_logger = logging.getLogger('yacommon.sql')
+        self.addCleanup(sql_logger.setLevel, sql_logger.level)
+        sql_logger.setLevel(logging.DEBUG)
+        sample = SampleFilter({'yacommon.sql': 0})
+        self.handler.addFilter(sample)
+        self.author_client.get(self.list_url)
+        sample.rates['yacommon.sql'] = 1
+        self.author_client.get(self.list_url)
+        lines = self.read_log()
+        requests = [
+            line for line in lines if line['logger'] == 'yacommon.requests'
+        ]
+        sql = [line for line in lines if line['logger'] == 'yacommon.sql']
+        self.assertEqual(len(sql), requests[1]['queries'])
+        self.assertEqual(
+            {line['request_id'] for line in sql}, {requests[1]['request_id']}
+        )
+
+    def test_full_queue_drops_records(self):
+        """Проверяем, что переполненная очередь не останавливает запрос."""
+        handler = JsonQueueHandler(stream=mock.Mock(), queue_size=1)
+        handler.stop()
+        logger = logging.getLogger('yanote.test')
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        for index in range(3):
+            logger.warning('Запись %s', index)
+        self.assertEqual(handler.dropped, 2)
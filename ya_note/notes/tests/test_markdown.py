@@ -0,0 +1,125 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from notes.rendering import html_cache, html_cache_key, render_markdown
+from notes.tests.conftest import BaseTest
+from yanote.cache import SizeBoundedLocMemCache
+
+
+class TestMarkdown(BaseTest):
+    """Тесты Markdown в заметках и кеша HTML."""
+
+    def setUp(self):
+        super().setUp()
+        html_cache().clear()
+        self.detail_url = reverse('notes:detail', args=(self.note.slug,))
+
+    def test_detail_renders_markdown_without_raw_html(self):
+        """Проверяем разметку и экранирование тегов из текста."""
+        self.note.text = '**Важно**\n\n<script>alert(1)</script>'
+        self.note.save()
+        content = self.author_client.get(self.detail_url).content.decode()
+        self.assertIn('<strong>Важно</strong>', content)
+        self.assertIn('&lt;script&gt;', content)
+        self.assertNotIn('<script>alert', content)
+
+    def test_unsafe_links_are_dropped(self):
+        """Проверяем, что ссылки javascript: не попадают в HTML."""
+        html = render_markdown('[a](javascript:alert(1)) [b](https://x.ru)')
+        self.assertNotIn('javascript', html)
+        self.assertIn('href="https://x.ru"', html)
+
+    def test_links_with_entities_are_dropped(self):
+        """Проверяем схемы, записанные ссылками на символы."""
+        for payload in (
+            'javascript&#58;alert(1)',
+            '&#106;avascript:alert(1)',
+            'javascript&colon;alert(1)',
+        ):
+            with self.subTest(payload=payload):
+                html = render_markdown(f'[a]({payload})')
+                self.assertIn('href=""', html)
+                self.assertNotIn('alert', html)
+        self.assertIn(
+            'href="https://x.ru/?a=1&amp;b=2"',
+            render_markdown('[a](https://x.ru/?a=1&b=2)'),
+        )
+
+    def test_html_is_rendered_once(self):
+        """Проверяем, что повторный просмотр берёт HTML из кеша."""
+        with mock.patch(
+            'notes.rendering.render_markdown', wraps=render_markdown
+        ) as render:
+            self.author_client.get(self.detail_url)
+            self.author_client.get(self.detail_url)
+        self.assertEqual(render.call_count, 1)
+
+    def test_update_replaces_cached_html(self):
+        """Проверяем, что правка удаляет HTML прежнего текста."""
+        self.author_client.get(self.detail_url)
+        old_key = html_cache_key(self.note.id, self.note.text)
+        self.assertIsNotNone(html_cache().get(old_key))
+        self.author_client.post(self.edit_url, data={
+            'title': self.note.title, 'text': '*Новый*', 'slug': 'test-slug'
+        })
+        self.assertIsNone(html_cache().get(old_key))
+        content = self.author_client.get(self.detail_url).content.decode()
+        self.assertIn('<em>Новый</em>', content)
+
+    def test_warm_command_fills_cache(self):
+        """Проверяем, что команда рендерит только отсутствующие заметки."""
+        out = StringIO()
+        call_command('warm_note_html', stdout=out)
+        call_command('warm_note_html', stdout=out)
+        self.assertIn('отрендерено: 1', out.getvalue())
+        self.assertIn('отрендерено: 0', out.getvalue())
+        self.assertIsNotNone(
+            html_cache().get(html_cache_key(self.note.id, self.note.text))
+        )
+
+
+class TestSizeBoundedCache(SimpleTestCase):
+    """Тесты кеша с ограничением по объёму."""
+
+    def setUp(self):
+        self.cache = SizeBoundedLocMemCache('test-size-bounded', {
+            'TIMEOUT': None, 'OPTIONS': {'MAX_SIZE': 3000},
+        })
+        self.addCleanup(self.cache.clear)
+
+    def test_least_recently_read_is_evicted(self):
+        """Проверяем, что вытесняется давно не читанная запись."""
+        for key in 'abc':
+            self.cache.set(key, 'x' * 900)
+        self.cache.get('a')
+        self.cache.set('d', 'x' * 900)
+        self.assertEqual(
+            [key for key in 'abcd' if self.cache.get(key)], ['a', 'c', 'd']
+        )
+        self.assertLessEqual(self.cache.size, 3000)
+
+    def test_size_is_tracked_on_overwrite_and_delete(self):
+        """Проверяем учёт объёма при замене и удалении."""
+        self.cache.set('a', 'x' * 900)
+        size = self.cache.size
+        self.cache.set('a', 'x' * 900)
+        self.assertEqual(self.cache.size, size)
+        self.cache.delete('a')
+        self.assertEqual(self.cache.size, 0)
+
+    def test_value_larger_than_cache_is_not_stored(self):
+        """Проверяем, что огромное значение не вытесняет весь кеш."""
+        self.cache.set('a', 'x' * 900)
+        self.cache.set('b', 'x' * 5000)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('a'))
+
+    def test_project_cache_is_size_bounded(self):
+        """Проверяем, что HTML заметок хранится в ограниченном кеше."""
+        self.assertIsInstance(html_cache(), SizeBoundedLocMemCache)
+        self.assertIs(html_cache(), caches['notes_html'])
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+
+from notes.models import Note
+from notes.tests.conftest import BaseTest
+from yacommon.routers import (
+    PIN_COOKIE, PrimaryReplicaRouter, read_from_replica
+)
+
+
+class TestReplicas(BaseTest):
+    """Тесты чтения заметок с реплик."""
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_reads_go_to_replica_only_inside_context(self):
+        """Проверяем выбор базы для чтения и записи."""
+        router = PrimaryReplicaRouter()
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(Note), 'replica1')
+            self.assertEqual(router.db_for_write(Note), 'default')
+        self.assertIsNone(router.db_for_read(Note))
+
+    def test_note_creation_pins_author_to_primary(self):
+        """Проверяем, что после записи автор закреплён за основной базой."""
+        response = self.author_client.post(
+            self.add_url, data={'title': 'Новая', 'text': 'Текст'}
+        )
+        self.assertEqual(
+            response.cookies[PIN_COOKIE]['max-age'],
+            settings.REPLICA_PIN_SECONDS
+        )
+
+    def test_list_reads_from_replica_unless_pinned(self):
+        """Проверяем, что закреплённый пользователь читает из основной базы."""
+        for pinned, replica_used in ((False, True), (True, False)):
+            with self.subTest(pinned=pinned):
+                if pinned:
+                    self.author_client.cookies[PIN_COOKIE] = '1'
+                with mock.patch(
+                    'yacommon.routers.read_from_replica',
+                    wraps=read_from_replica
+                ) as replica:
+                    self.author_client.get(self.list_url)
+                self.assertIs(replica.called, replica_used)
@@ -0,0 +1,133 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from notes.diffs import apply_delta, make_delta
+from notes.models import Note, NoteConflict, NoteRevision
+from notes.tests.conftest import BaseTest
+
+
+class TestDiffs(BaseTest):
+    """Тесты построчных дельт."""
+
+    def test_delta_roundtrip(self):
+        """Проверяем, что дельта восстанавливает новый текст."""
+        cases = (
+            ('', 'Первая\nвторая'),
+            ('раз\nдва\nтри\n', 'раз\nДВА\nтри\nчетыре'),
+            ('раз\nдва\nтри', 'три'),
+        )
+        for old, new in cases:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+
+@override_settings(NOTE_SNAPSHOT_EVERY=3)
+class TestRevisions(BaseTest):
+    """Тесты истории версий заметки."""
+
+    def edit(self, text):
+        note = Note.objects.get(pk=self.note.pk)
+        note.text = text
+        note.save()
+
+    def test_every_version_is_restored(self):
+        """Проверяем восстановление каждой версии из снимков и дельт."""
+        lines = [f'Длинная неизменная строка {line}\n' for line in range(5)]
+        texts = [self.note.text]
+        for version in range(1, 8):
+            lines[version % 5] = f'Правка {version}\n'
+            texts.append(''.join(lines))
+        for text in texts[1:]:
+            self.edit(text)
+        for number, text in enumerate(texts, start=1):
+            with self.subTest(number=number):
+                self.assertEqual(self.note.get_revision(number)[1], text)
+        self.assertEqual(
+            list(self.note.revisions.filter(
+                is_snapshot=True
+            ).values_list('number', flat=True)),
+            [1, 2, 4, 7]
+        )
+
+    def test_deltas_are_compact(self):
+        """Проверяем, что правка одной строки хранит только её."""
+        lines = [f'Длинная строка номер {index}\n' for index in range(50)]
+        self.edit(''.join(lines))
+        lines[10] = 'Изменено\n'
+        self.edit(''.join(lines))
+        revision = self.note.revisions.get(number=3)
+        self.assertFalse(revision.is_snapshot)
+        self.assertLess(len(revision.data), 100)
+
+    def test_unchanged_save_adds_no_revision(self):
+        """Проверяем, что сохранение без изменений не создаёт версию."""
+        count = NoteRevision.objects.count()
+        Note.objects.get(pk=self.note.pk).save()
+        self.assertEqual(NoteRevision.objects.count(), count)
+
+    def test_concurrent_saves_keep_history(self):
+        """
+        Проверяем, что сохранение поверх чужой правки отклоняется,
+        а последняя версия совпадает с текстом в базе.
+        """
+        lines = ''.join(f'Строка {line}\n' for line in range(10))
+        self.edit(lines)
+        first = Note.objects.get(pk=self.note.pk)
+        second = Note.objects.get(pk=self.note.pk)
+        first.text = 'Новая первая\n' + lines
+        first.save()
+        second.text = lines + 'Последняя\n'
+        with self.assertRaises(NoteConflict) as conflict:
+            second.save()
+        self.assertEqual(conflict.exception.text, first.text)
+        stored = Note.objects.get(pk=self.note.pk)
+        last = stored.revisions.order_by('-number').first().number
+        self.assertEqual(stored.text, first.text)
+        self.assertEqual(stored.get_revision(last)[1], stored.text)
+
+    def test_conflicting_form_is_shown_again(self):
+        """Проверяем, что при конфликте форма возвращается с ошибкой."""
+        with mock.patch.object(
+            Note, 'save', side_effect=NoteConflict(self.note.text)
+        ):
+            response = self.author_client.post(self.edit_url, {
+                'title': 'Заголовок', 'text': 'Мой текст',
+                'slug': self.note.slug,
+            })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['form'].non_field_errors())
+
+    def test_batch_update_is_recorded(self):
+        """Проверяем, что пакетное изменение тоже попадает в историю."""
+        self.author_client.post(reverse('notes:batch_edit'), {
+            'slugs': [self.note.slug], 'find': 'Текст', 'replace': 'Новый',
+        })
+        self.edit('Последний')
+        self.assertEqual(self.note.get_revision(2)[1], 'Новый')
+        self.assertEqual(self.note.get_revision(3)[1], 'Последний')
+
+    def test_history_pages(self):
+        """Проверяем страницы истории для автора и чужого пользователя."""
+        self.author_client.post(self.edit_url, {
+            'title': 'Новый заголовок', 'text': 'Новый текст',
+            'slug': self.note.slug,
+        })
+        history_url = reverse('notes:history', args=(self.note.slug,))
+        revision_url = reverse('notes:revision', args=(self.note.slug, 1))
+        response = self.author_client.get(history_url)
+        self.assertEqual(len(response.context['revisions']), 2)
+        response = self.author_client.get(revision_url)
+        self.assertEqual(response.context['revision']['text'], 'Текст')
+        self.assertEqual(
+            self.author_client.get(
+                reverse('notes:revision', args=(self.note.slug, 9))
+            ).status_code,
+            HTTPStatus.NOT_FOUND
+        )
+        self.assertEqual(
+            self.reader_client.get(history_url).status_code,
+            HTTPStatus.NOT_FOUND
+        )
@@ -0,0 +1,155 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from notes.models import Note, NoteIndex, NoteRevision
+from notes.shards import move_author, shard_for, temporary_shards
+
+User = get_user_model()
+
+
+class TestShards(TestCase):
+    """Тесты хранения заметок в шардах по автору."""
+
+    def setUp(self):
+        """Подключает индекс и два шарда, авторов из разных шардов."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shards = temporary_shards(Path(directory.name), 2)
+        self.shards = shards.__enter__()
+        self.addCleanup(shards.__exit__, None, None, None)
+        self.authors = {}
+        number = 0
+        while len(self.authors) < len(self.shards):
+            number += 1
+            user = User.objects.create(username=f'Автор {number}')
+            self.authors.setdefault(shard_for(user.pk), user)
+        self.first, self.second = (
+            self.authors[shard] for shard in self.shards
+        )
+        self.client = Client()
+        self.client.force_login(self.first)
+
+    def create(self, author, slug):
+        return Note.objects.create(
+            title='Заголовок', text='Текст', slug=slug, author=author
+        )
+
+    def test_shard_for_is_stable(self):
+        """Проверяем, что шард автора не зависит от запуска процесса."""
+        self.assertEqual(shard_for(1, ['a', 'b', 'c']), 'c')
+        self.assertEqual(shard_for(2, ['a', 'b', 'c']), 'b')
+
+    def test_notes_are_stored_in_author_shard(self):
+        """Проверяем, что заметки лежат в шарде автора, а id общие."""
+        first = self.create(self.first, 'first')
+        second = self.create(self.second, 'second')
+        for note, alias in zip((first, second), self.shards):
+            with self.subTest(alias=alias):
+                self.assertEqual(note._state.db, alias)
+                self.assertTrue(
+                    Note.objects.using(alias).filter(pk=note.pk).exists()
+                )
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(
+            NoteIndex.objects.get(slug='second').pk, second.pk
+        )
+
+    def test_slug_is_unique_across_shards(self):
+        """Проверяем, что slug из другого шарда занят для формы."""
+        self.create(self.second, 'taken')
+        response = self.client.post(
+            reverse('notes:add'),
+            data={'title': 'Заметка', 'text': 'Текст', 'slug': 'taken'},
+        )
+        self.assertIn('slug', response.context['form'].errors)
+        self.assertEqual(Note.objects.using(self.shards[0]).count(), 0)
+
+    def test_views_work_in_author_shard(self):
+        """Проверяем создание, список, правку и удаление через шард."""
+        self.client.post(
+            reverse('notes:add'),
+            data={'title': 'Заметка', 'text': 'Текст', 'slug': 'mine'},
+        )
+        note = Note.objects.using(self.shards[0]).get(slug='mine')
+        response = self.client.get(reverse('notes:list'))
+        self.assertIn(note, response.context['object_list'])
+        self.client.post(
+            reverse('notes:edit', args=('mine',)),
+            data={'title': 'Новая', 'text': 'Текст', 'slug': 'mine'},
+        )
+        note.refresh_from_db()
+        self.assertEqual(note.title, 'Новая')
+        self.client.post(reverse('notes:delete', args=('mine',)))
+        self.assertFalse(
+            Note.objects.using(self.shards[0]).filter(slug='mine').exists()
+        )
+        self.assertFalse(NoteIndex.objects.filter(slug='mine').exists())
+
+    def test_rebalance_moves_notes_with_revisions(self):
+        """Проверяем перенос заметок автора в его шард."""
+        note = self.create(self.first, 'moved')
+        note.text = 'Правка'
+        note.save()
+        revisions = NoteRevision.objects.using(self.shards[0]).filter(
+            note=note
+        ).count()
+        shards = list(reversed(self.shards))
+        with self.settings(NOTE_SHARD_DATABASES=shards):
+            target = shard_for(self.first.pk)
+            out = StringIO()
+            call_command('rebalance_notes', stdout=out)
+        self.assertIn('заметок: 1', out.getvalue())
+        self.assertEqual(target, self.shards[1])
+        moved = Note.objects.using(target).get(pk=note.pk)
+        self.assertEqual(moved.text, 'Правка')
+        self.assertEqual(
+            NoteRevision.objects.using(target).filter(note=moved).count(),
+            revisions,
+        )
+        self.assertFalse(
+            Note.objects.using(self.shards[0]).filter(pk=note.pk).exists()
+        )
+        self.assertTrue(NoteIndex.objects.filter(slug='moved').exists())
+
+    def test_deleting_author_frees_slugs_in_all_shards(self):
+        """
+        Проверяем, что удаление пользователя удаляет его заметки из всех
+        шардов и освобождает slug в индексе.
+        """
+        # Заметка, оставшаяся в чужом шарде после смены NOTE_SHARDS.
+        self.create(self.first, 'left')
+        move_author(self.first.pk, *self.shards)
+        self.create(self.first, 'own')
+        self.create(self.second, 'other')
+        self.first.delete()
+        for alias in self.shards:
+            with self.subTest(alias=alias):
+                self.assertFalse(
+                    Note.objects.using(alias).filter(
+                        author_id=self.first.pk
+                    ).exists()
+                )
+        self.assertEqual(
+            list(NoteIndex.objects.values_list('slug', flat=True)),
+            ['other'],
+        )
+        self.create(self.second, 'own')
+
+    def test_failed_bulk_create_frees_slugs(self):
+        """Проверяем, что сбой пакетного создания не занимает slug."""
+        with mock.patch(
+            'notes.views.record_revisions', side_effect=DatabaseError
+        ), self.assertRaises(DatabaseError):
+            self.client.post(reverse('notes:batch_add'), {
+                'titles': 'Первая\nВторая', 'text': 'Текст',
+            })
+        self.assertFalse(NoteIndex.objects.exists())
+        self.assertEqual(Note.objects.using(self.shards[0]).count(), 0)
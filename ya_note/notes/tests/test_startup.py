@@ -0,0 +1,45 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from yacommon.startup import group_by_app, parse_importtime
+
+IMPORTTIME = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     pytils.typo
+import time:       300 |        420 |   pytils
+import time:        50 |         50 |       django.contrib.admin.widgets
+import time:       900 |        950 |   django.contrib.admin
+import time:       200 |        200 | notes.forms
+'''
+
+
+class TestStartupProfile(SimpleTestCase):
+    """Тесты профиля запуска."""
+
+    def test_parse_importtime(self):
+        """Проверяем разбор вывода -X importtime."""
+        self.assertEqual(parse_importtime(IMPORTTIME)[:2], [
+            ('pytils.typo', 120), ('pytils', 300)
+        ])
+
+    def test_group_by_app(self):
+        """
+        Проверяем, что модули приложений складываются по приложению,
+        а остальные — по пакету верхнего уровня.
+        """
+        self.assertEqual(group_by_app(parse_importtime(IMPORTTIME)), {
+            'pytils': 420, 'django.contrib.admin': 950, 'notes': 200,
+        })
+
+    def test_command_reports_cold_and_prefork_start(self):
+        """
+        Проверяем, что команда замеряет оба способа запуска,
+        а pytils при старте проекта не загружается.
+        """
+        output = StringIO()
+        call_command('startup_profile', runs=1, top=100, stdout=output)
+        self.assertIn('cold start to first response', output.getvalue())
+        self.assertIn('prefork worker to first response', output.getvalue())
+        self.assertNotIn('import pytils', output.getvalue())
@@ -0,0 +1,69 @@
+import tempfile
+from http import HTTPStatus
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from yacommon.staticfiles import IMMUTABLE, StaticFilesApplication
+
+
+class TestStaticFiles(SimpleTestCase):
+    """Тесты сборки и раздачи статических файлов."""
+
+    STYLESHEET = 'admin/css/base.css'
+
+    def setUp(self):
+        """Собирает статику во временный каталог."""
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings_override = override_settings(STATIC_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.application = StaticFilesApplication(None, root=root.name)
+        self.url = '/static/' + staticfiles_storage.stored_name(
+            self.STYLESHEET
+        )
+
+    def get(self, **environ):
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = int(status.split()[0])
+            response['headers'] = dict(headers)
+
+        b''.join(self.application(
+            {'REQUEST_METHOD': 'GET', 'PATH_INFO': self.url, **environ},
+            start_response
+        ))
+        return response['status'], response['headers']
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        """
+        Проверяем, что файл с хешем отдаётся с вечным
+        кешированием и в сжатом виде.
+        """
+        status, headers = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+
+    def test_unchanged_file_is_not_sent_again(self):
+        """Проверяем ответ 304 на условный запрос с тем же ETag."""
+        _, headers = self.get()
+        status, _ = self.get(HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, HTTPStatus.NOT_MODIFIED)
+
+    def test_compressed_file_has_own_etag(self):
+        """Проверяем, что у сжатой копии и самого файла разные ETag."""
+        _, plain = self.get()
+        _, gzipped = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(gzipped['ETag'], plain['ETag'][:-1] + '-gzip"')
+        status, _ = self.get(HTTP_IF_NONE_MATCH=gzipped['ETag'])
+        self.assertEqual(status, HTTPStatus.OK)
+        status, _ = self.get(
+            HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=gzipped['ETag']
+        )
+        self.assertEqual(status, HTTPStatus.NOT_MODIFIED)
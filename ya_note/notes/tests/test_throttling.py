@@ -0,0 +1,132 @@
+import threading
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
+
+from notes.checks import check_throttle_cache
+from notes.models import Note
+from notes.tests.conftest import BaseTest
+from yacommon.throttling import LOCK_TIMEOUT, take_token
+
+
+@override_settings(THROTTLE_RATES={'note': {'user': '2/m', 'ip': '3/m'}})
+class TestThrottling(BaseTest):
+    """Тесты ограничения частоты создания и изменения заметок."""
+
+    def setUp(self):
+        """Сбрасывает корзины ограничения частоты запросов."""
+        super().setUp()
+        caches[settings.THROTTLE_CACHE].clear()
+
+    def test_note_creation_is_throttled(self):
+        """
+        Проверяем, что после исчерпания лимита
+        заметка не создаётся и возвращается 429.
+        """
+        notes_count = Note.objects.count()
+        for index in range(2):
+            response = self.author_client.post(
+                self.add_url,
+                data={'title': f'Заметка {index}', 'text': 'Текст'}
+            )
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+        response = self.author_client.post(
+            self.add_url, data={'title': 'Лишняя', 'text': 'Текст'}
+        )
+
+        self.assertEqual(
+            response.status_code, HTTPStatus.TOO_MANY_REQUESTS
+        )
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Note.objects.count(), notes_count + 2)
+
+    def test_ip_limit_is_shared_between_users(self):
+        """Проверяем, что лимит IP-адреса общий для всех пользователей."""
+        clients = (
+            self.author_client, self.reader_client, self.author_client
+        )
+        for index, client in enumerate(clients):
+            client.post(
+                self.add_url,
+                data={'title': f'Заметка {index}', 'text': 'Текст'}
+            )
+
+        response = self.reader_client.post(
+            self.add_url, data={'title': 'Лишняя', 'text': 'Текст'}
+        )
+
+        self.assertEqual(
+            response.status_code, HTTPStatus.TOO_MANY_REQUESTS
+        )
+
+    def test_user_limit_does_not_spend_ip_tokens(self):
+        """Проверяем, что отказ по лимиту пользователя не тратит лимит IP."""
+        for index in range(3):
+            self.author_client.post(
+                self.add_url,
+                data={'title': f'Заметка {index}', 'text': 'Текст'}
+            )
+
+        response = self.reader_client.post(
+            self.add_url, data={'title': 'Ещё одна', 'text': 'Текст'}
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_reading_is_not_throttled(self):
+        """Проверяем, что GET-запросы не расходуют токены."""
+        for _ in range(5):
+            with self.subTest():
+                self.assertEqual(
+                    self.author_client.get(self.edit_url).status_code,
+                    HTTPStatus.OK
+                )
+
+    def test_concurrent_requests_share_bucket(self):
+        """Проверяем, что одновременные запросы не забирают лишних токенов."""
+        barrier = threading.Barrier(8)
+        waits = []
+
+        def request():
+            barrier.wait()
+            waits.append(take_token('throttle:test', '5/m'))
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(waits.count(0), 5)
+
+    def test_locked_bucket_is_not_spent(self):
+        """Проверяем, что корзину под чужой блокировкой запрос не трогает."""
+        cache = caches[settings.THROTTLE_CACHE]
+        cache.add('throttle:test:lock', 1)
+        self.assertEqual(take_token('throttle:test', '1/m'), LOCK_TIMEOUT)
+        cache.delete('throttle:test:lock')
+        self.assertEqual(take_token('throttle:test', '1/m'), 0)
+
+    def test_check_rejects_local_cache_with_workers(self):
+        """Проверяем, что процессы не держат корзины каждый в своей памяти."""
+        cases = (
+            (1, 'django.core.cache.backends.locmem.LocMemCache', []),
+            (4, 'django.core.cache.backends.locmem.LocMemCache',
+             ['notes.E001']),
+            (4, 'django.core.cache.backends.db.DatabaseCache', []),
+        )
+        for workers, backend, errors in cases:
+            with self.subTest(workers=workers, backend=backend):
+                with self.settings(WEB_CONCURRENCY=workers, CACHES={
+                    **settings.CACHES,
+                    settings.THROTTLE_CACHE: {
+                        'BACKEND': backend, 'LOCATION': 'throttle'
+                    },
+                }):
+                    self.assertEqual(
+                        [error.id for error in check_throttle_cache(None)],
+                        errors,
+                    )
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from notes import views
+from notes import api, views
 
 app_name = 'notes'
 
@@ -10,6 +10,30 @@ urlpatterns = [
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
+    path(
+        'history/<slug:slug>/', views.NoteHistory.as_view(), name='history'
+    ),
+    path(
+        'history/<slug:slug>/<int:number>/',
+        views.NoteRevisionDetail.as_view(),
+        name='revision'
+    ),
     path('notes/', views.NotesList.as_view(), name='list'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('batch/add/', views.NoteBulkCreate.as_view(), name='batch_add'),
+    path(
+        'batch/edit/', views.NoteBatchUpdate.as_view(), name='batch_edit'
+    ),
+    path(
+        'batch/delete/',
+        views.NoteBatchDelete.as_view(),
+        name='batch_delete'
+    ),
+    path('api/notes/', api.NoteListApi.as_view(), name='api_list'),
+    path('api/notes/<slug:slug>/', api.NoteApi.as_view(), name='api_note'),
+    path(
+        'api/notes/<slug:slug>/autosave/',
+        api.NoteAutosaveApi.as_view(),
+        name='api_autosave'
+    ),
 ]
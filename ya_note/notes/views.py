@@ -1,9 +1,30 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
+from django.db import router, transaction
+from django.db.models import Value
+from django.db.models.functions import Replace
+from django.http import Http404
+from django.urls import reverse, reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
-from .models import Note
+from yacommon.routers import ReplicaReadMixin
+from yacommon.throttling import ThrottleMixin
+
+from .autosave import draft_key, get_buffer
+from .forms import (
+    NoteBatchDeleteForm, NoteBatchUpdateForm, NoteBulkCreateForm, NoteForm
+)
+from .models import (
+    Note, NoteConflict, NoteRevision, allocate_slugs, record_revisions,
+    unregister_notes
+)
+from .rendering import forget_note_html
+from .shards import AuthorShardMixin
+
+
+CONFLICT_ERROR = (
+    'Заметку изменили, пока вы её редактировали. '
+    'Проверьте текст и сохраните ещё раз.'
+)
 
 
 class Home(generic.TemplateView):
@@ -16,8 +37,8 @@ class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
     template_name = 'notes/success.html'
 
 
-class NoteBase(LoginRequiredMixin):
-    """Базовый класс для остальных CBV."""
+class NoteBase(LoginRequiredMixin, AuthorShardMixin, ThrottleMixin):
+    """Базовый класс для остальных CBV: работает в шарде пользователя."""
     model = Note
     success_url = reverse_lazy('notes:success')
 
@@ -30,6 +51,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     """Добавление заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
+    throttle_scope = 'note'
 
     def form_valid(self, form):
         new_note = form.save(commit=False)
@@ -42,18 +64,189 @@ class NoteUpdate(NoteBase, generic.UpdateView):
     """Редактирование заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
+    throttle_scope = 'note'
+
+    def get(self, request, *args, **kwargs):
+        # Форма показывает текст вместе с автосохранёнными правками.
+        get_buffer().flush(draft_key(request.user, kwargs['slug']))
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        # Текст из формы полный и новее черновика.
+        get_buffer().discard(draft_key(request.user, kwargs['slug']))
+        return super().post(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            autosave_url=reverse(
+                'notes:api_autosave', args=(self.object.slug,)
+            ),
+            **kwargs,
+        )
+
+    def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except NoteConflict:
+            form.add_error(None, CONFLICT_ERROR)
+            return self.form_invalid(form)
+        if 'text' in form.changed_data:
+            forget_note_html(self.object.id, form.initial['text'])
+        return response
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
+    def post(self, request, *args, **kwargs):
+        get_buffer().discard(draft_key(request.user, kwargs['slug']))
+        return super().post(request, *args, **kwargs)
 
-class NotesList(NoteBase, generic.ListView):
+
+class NotesList(NoteBase, ReplicaReadMixin, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """Для списка не нужен текст заметок."""
+        return super().get_queryset().only('id', 'title', 'slug')
+
 
-class NoteDetail(NoteBase, generic.DetailView):
+class NoteDetail(NoteBase, ReplicaReadMixin, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+    def get(self, request, *args, **kwargs):
+        get_buffer().flush(draft_key(request.user, kwargs['slug']))
+        return super().get(request, *args, **kwargs)
+
+
+class NoteBatchBase(NoteBase, generic.FormView):
+    """Базовый класс для операций над несколькими заметками."""
+    template_name = 'notes/batch.html'
+    throttle_scope = 'note'
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        if 'slugs' in form.fields:
+            # Выборка ленивая: выполняется, только если форму рисуют.
+            form.fields['slugs'].widget.choices = (
+                self.get_queryset().values_list('slug', 'title')
+            )
+        return form
+
+    def get_selected(self, form):
+        """Выбранные заметки пользователя; чужие slug просто не найдутся."""
+        return self.get_queryset().filter(
+            slug__in=form.cleaned_data['slugs']
+        )
+
+    def discard_drafts(self, form):
+        """Черновики выбранных заметок не должны отменить операцию."""
+        get_buffer().discard(*(
+            draft_key(self.request.user, slug)
+            for slug in form.cleaned_data['slugs']
+        ))
+
+
+class NoteBatchDelete(NoteBatchBase):
+    """Удаление нескольких заметок одним запросом."""
+    form_class = NoteBatchDeleteForm
+    extra_context = {'title': 'Удалить заметки'}
+
+    def form_valid(self, form):
+        self.discard_drafts(form)
+        self.get_selected(form).delete()
+        return super().form_valid(form)
+
+
+class NoteBatchUpdate(NoteBatchBase):
+    """Изменение нескольких заметок одним запросом."""
+    form_class = NoteBatchUpdateForm
+    extra_context = {'title': 'Изменить заметки'}
+
+    def form_valid(self, form):
+        changes = {}
+        if form.cleaned_data['title']:
+            changes['title'] = form.cleaned_data['title']
+        if form.cleaned_data['find']:
+            changes['text'] = Replace(
+                'text',
+                Value(form.cleaned_data['find']),
+                Value(form.cleaned_data['replace']),
+            )
+        self.discard_drafts(form)
+        selected = self.get_selected(form)
+        with transaction.atomic(using=router.db_for_write(Note)):
+            # Строки заблокированы до конца транзакции: версии считаются
+            # от того текста, который меняет UPDATE.
+            previous = {
+                note_id: (title, text)
+                for note_id, title, text in selected.select_for_update(
+                ).values_list('id', 'title', 'text')
+            }
+            selected.update(**changes)
+            changed = [
+                note for note in selected.filter(id__in=previous)
+                if previous[note.id] != (note.title, note.text)
+            ]
+            record_revisions(changed, {
+                note_id: text for note_id, (_, text) in previous.items()
+            })
+        return super().form_valid(form)
+
+
+class NoteBulkCreate(NoteBatchBase):
+    """Добавление нескольких заметок одним запросом."""
+    form_class = NoteBulkCreateForm
+    extra_context = {'title': 'Добавить заметки'}
+
+    def form_valid(self, form):
+        titles = form.cleaned_data['titles']
+        notes = [
+            Note(
+                title=title,
+                text=form.cleaned_data['text'],
+                slug=slug,
+                author=self.request.user,
+            )
+            for title, slug in zip(titles, allocate_slugs(titles))
+        ]
+        try:
+            with transaction.atomic(using=router.db_for_write(Note)):
+                # id выдаёт индекс заметок, поэтому перечитывать не нужно.
+                Note.objects.bulk_create(notes)
+                record_revisions(notes)
+        except Exception:
+            # Откат шарда не затрагивает индекс: slug остались бы заняты.
+            unregister_notes(notes)
+            raise
+        return super().form_valid(form)
+
+
+class NoteHistory(NoteBase, ReplicaReadMixin, generic.DetailView):
+    """Список версий заметки."""
+    template_name = 'notes/history.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['revisions'] = self.object.revisions.only(
+            'number', 'title', 'is_snapshot', 'created'
+        ).order_by('-number')
+        return context
+
+
+class NoteRevisionDetail(NoteBase, ReplicaReadMixin, generic.DetailView):
+    """Одна версия заметки, восстановленная из снимка и дельт."""
+    template_name = 'notes/revision.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        number = self.kwargs['number']
+        try:
+            title, text = self.object.get_revision(number)
+        except NoteRevision.DoesNotExist:
+            raise Http404('Такой версии нет.')
+        context['revision'] = {'number': number, 'title': title, 'text': text}
+        return context
@@ -0,0 +1,14 @@
+"""
+Пакет настроек YaNote.
+
+Общий код проектов (yacommon) лежит в каталоге ya_common рядом
+с проектом и подключается отсюда: пакет настроек импортируется раньше
+всего остального кода.
+"""
+import sys
+from pathlib import Path
+
+COMMON_DIR = Path(__file__).resolve().parent.parent.parent / 'ya_common'
+
+if str(COMMON_DIR) not in sys.path:
+    sys.path.append(str(COMMON_DIR))
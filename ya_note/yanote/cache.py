@@ -0,0 +1,59 @@
+"""
+Кеш в памяти процесса с ограничением по объёму.
+
+``LocMemCache`` ограничивает только число записей, а отрендеренные
+заметки различаются по размеру в тысячи раз. ``SizeBoundedLocMemCache``
+следит за суммарным размером сериализованных значений и при переполнении
+вытесняет записи, которые дольше всех не читали (LRU).
+"""
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+# Объём каждого кеша: общий для всех экземпляров с тем же LOCATION,
+# как и сами данные LocMemCache.
+_sizes = {}
+
+
+class SizeBoundedLocMemCache(LocMemCache):
+    """LocMemCache не больше OPTIONS['MAX_SIZE'] байт."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._max_size = int(params.get('OPTIONS', {}).get('MAX_SIZE', 0))
+        self._size = _sizes.setdefault(name, {'bytes': 0})
+
+    @property
+    def size(self):
+        """Суммарный размер значений в байтах."""
+        return self._size['bytes']
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        if self._max_size and len(value) > self._max_size:
+            # Значение больше всего кеша вытеснило бы всё остальное.
+            self._delete(key)
+            return
+        self._delete(key)
+        super()._set(key, value, timeout)
+        self._size['bytes'] += len(value)
+        # Свежая запись стоит в начале, самая давняя — в конце.
+        while self._max_size and self._size['bytes'] > self._max_size:
+            old_key, old_value = self._cache.popitem()
+            del self._expire_info[old_key]
+            self._size['bytes'] -= len(old_value)
+
+    def _cull(self):
+        super()._cull()
+        self._size['bytes'] = sum(map(len, self._cache.values()))
+
+    def _delete(self, key):
+        value = self._cache.get(key)
+        if not super()._delete(key):
+            return False
+        self._size['bytes'] -= len(value)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._size['bytes'] = 0
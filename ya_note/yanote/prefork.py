@@ -0,0 +1,36 @@
+"""
+Запуск YaNote на сервере с fork рабочих процессов (yacommon.prefork).
+
+Запуск: ``python -m yanote.prefork --workers 4 --bind 127.0.0.1:8000``.
+"""
+from yacommon.prefork import argument_parser, prepare, serve, set_workers
+
+
+def stop_autosave():
+    """Записывает черновики заметок при выходе рабочего процесса."""
+    from notes.autosave import get_buffer
+    get_buffer().stop()
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.split('\n')[1])
+    parser.add_argument(
+        '--warm-note-html', action='store_true',
+        help='Отрендерить заметки в кеш до fork: его получат все процессы.',
+    )
+    args = parser.parse_args(argv)
+    # Проверка notes.E001 сверяет кеши с числом рабочих процессов.
+    set_workers(args.workers)
+    # Проект загружается только после разбора аргументов: --help не ждёт.
+    from django.core.management import call_command
+
+    from yanote.wsgi import application
+
+    prepare()
+    if args.warm_note_html:
+        call_command('warm_note_html')
+    serve(application, args.bind, args.workers, on_exit=stop_autosave)
+
+
+if __name__ == '__main__':
+    main()
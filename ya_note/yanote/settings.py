@@ -8,7 +8,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = config('SECRET_KEY')
 
-DEBUG = False
+DEBUG = config('DEBUG', default=False, cast=bool)
+
+# Боевой профиль шаблонов: скомпилированные шаблоны кешируются в памяти.
+CACHED_TEMPLATES = config('CACHED_TEMPLATES', default=not DEBUG, cast=bool)
 
 ALLOWED_HOSTS = ['*']
 
@@ -24,23 +27,36 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yacommon.middleware.RequestLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yacommon.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'yacommon.routers.ReplicaPinMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
 
+# API отвечает на ошибку CSRF в JSON.
+CSRF_FAILURE_VIEW = 'yacommon.api.csrf_failure'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ] if CACHED_TEMPLATES else TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -54,6 +70,32 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Корзины ограничения частоты общие для рабочих процессов и узлов;
+    # таблицу создаёт manage.py createcachetable.
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'throttle_cache',
+    },
+    # Отрендеренные заметки: вытесняются давно не читанные, когда объём
+    # превышает MAX_SIZE байт.
+    'notes_html': {
+        'BACKEND': 'yanote.cache.SizeBoundedLocMemCache',
+        'LOCATION': 'notes-html',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_SIZE': 64 * 1024 * 1024, 'MAX_ENTRIES': 100000},
+    },
+}
+
+# Сколько рабочих процессов обслуживают проект; prefork ставит сам.
+# С несколькими процессами проверка notes.E001 не пускает корзины
+# ограничения частоты в память процесса.
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -61,6 +103,43 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения — копии основной базы, которые обновляет
+# команда replicate. В тестах реплики указывают на тестовую основную базу.
+DATABASE_REPLICAS = config('DATABASE_REPLICAS', default=0, cast=int)
+REPLICA_DATABASES = [
+    f'replica{index}' for index in range(1, DATABASE_REPLICAS + 1)
+]
+for alias in REPLICA_DATABASES:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Заметки и их версии шардированы по автору: все заметки автора лежат
+# в одной из NOTE_SHARD_DATABASES, первая из них — основная база.
+# Уникальность slug и id заметок по всем шардам держит индекс заметок
+# в базе NOTE_INDEX_DATABASE. После изменения NOTE_SHARDS заметки
+# переносит команда rebalance_notes.
+NOTE_SHARDS = config('NOTE_SHARDS', default=1, cast=int)
+NOTE_SHARD_DATABASES = ['default'] + [
+    f'notes{index}' for index in range(1, NOTE_SHARDS)
+]
+for alias in NOTE_SHARD_DATABASES[1:]:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+    }
+NOTE_INDEX_DATABASE = 'default'
+
+DATABASE_ROUTERS = [
+    'notes.shards.AuthorShardRouter',
+    'yacommon.routers.PrimaryReplicaRouter',
+]
+
+# Сколько секунд после записи пользователь читает из основной базы.
+REPLICA_PIN_SECONDS = 10
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -85,7 +164,74 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+STATIC_ROOT = BASE_DIR / 'collected_static'
+
+# collectstatic сохраняет файлы с хешем в имени и сжатые копии.
+STATICFILES_STORAGE = 'yacommon.staticfiles.CompressedManifestStaticFilesStorage'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Ограничение частоты запросов на запись: корзины токенов на пользователя
+# и на IP-адрес. Хранилище корзин — кеш THROTTLE_CACHE, общий для
+# процессов: кеш в БД, memcached или redis.
+THROTTLE_ENABLED = True
+THROTTLE_CACHE = 'throttle'
+THROTTLE_RATES = {
+    'note': {'user': '30/m', 'ip': '120/m'},
+    'autosave': {'user': '120/m', 'ip': '600/m'},
+}
+
+# Сжатие ответов: более короткие ответы отдаются как есть.
+COMPRESSION_MIN_SIZE = 1024
+HTML_MINIFY = True
+
+# Сколько заметок можно обработать одним пакетным запросом.
+NOTES_BATCH_LIMIT = 5000
+
+# Каждая такая по счёту версия заметки хранится целиком, остальные —
+# дельтами к предыдущей. Больше — меньше места, дольше восстановление.
+NOTE_SNAPSHOT_EVERY = 20
+
+# Markdown в заметках: расширения Python-Markdown и кеш готового HTML.
+NOTE_MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'sane_lists']
+NOTE_HTML_CACHE = 'notes_html'
+
+# Автосохранение: черновик пишется в базу после NOTE_AUTOSAVE_DEBOUNCE
+# секунд без правок, но не реже раза в NOTE_AUTOSAVE_MAX_DELAY секунд.
+NOTE_AUTOSAVE_DEBOUNCE = 5
+NOTE_AUTOSAVE_MAX_DELAY = 30
+NOTE_AUTOSAVE_BACKGROUND = True
+
+# Журнал (yacommon.logs): JSON-строки в LOG_FILE или в stderr, их пишет
+# отдельный поток. LOG_SQL пишет в журнал каждый запрос к базе;
+# LOG_SAMPLING — доля записей частых логгеров, попадающая в журнал.
+LOG_FILE = config('LOG_FILE', default='')
+LOG_SQL = config('LOG_SQL', default=False, cast=bool)
+LOG_SAMPLING = {'yacommon.sql': 0.1}
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sample': {'()': 'yacommon.logs.SampleFilter', 'rates': LOG_SAMPLING},
+    },
+    'handlers': {
+        'json': {
+            'class': 'yacommon.logs.JsonQueueHandler',
+            'filename': LOG_FILE,
+            'filters': ['sample'],
+        },
+    },
+    'root': {'handlers': ['json'], 'level': 'WARNING'},
+    'loggers': {
+        'django': {'handlers': ['json'], 'level': 'INFO', 'propagate': False},
+        'yacommon': {'handlers': ['json'], 'level': 'INFO', 'propagate': False},
+        'yanote': {'handlers': ['json'], 'level': 'INFO', 'propagate': False},
+        'yacommon.sql': {'level': 'DEBUG' if LOG_SQL else 'INFO'},
+        'notes': {'handlers': ['json'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -0,0 +1,48 @@
+"""
+Настройки для тестов: всё, что не проверяется тестами, но стоит времени.
+
+База в памяти, схема создаётся по моделям без миграций, пароли
+хешируются MD5, шаблоны компилируются один раз на весь прогон.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import CACHES, TEMPLATE_LOADERS, TEMPLATES
+
+
+class DisableMigrations:
+    """Для всех приложений: «миграций нет», таблицы создаёт syncdb."""
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+MIGRATION_MODULES = DisableMigrations()
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+REPLICA_DATABASES = []
+NOTE_SHARD_DATABASES = ['default']
+
+# Тесты записывают черновики сами, без фонового потока.
+NOTE_AUTOSAVE_BACKGROUND = False
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+]
+
+# Тесты идут в одном процессе: корзины ограничения частоты — в его памяти.
+CACHES = {
+    **CACHES,
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}